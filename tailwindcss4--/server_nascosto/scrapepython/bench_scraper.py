@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dello scraper contro il finto FBref locale (fbref_standin.py).
+
+Avvia il server in un thread, esegue N job con `run_jobs` (stesso scheduler,
+stessa Session, stessi retry del run vero) e riporta:
+
+- pagine al minuto (job completati / tempo totale);
+- tempo di parsing + trasformazione per pagina;
+- tempo di risposta medio per richiesta;
+- attesa dello scheduler (token bucket, backoff su 429 compreso);
+- tentativi ripetuti e risposte del server per codice.
+
+I file prodotti e la cache HTTP finiscono in una cartella temporanea: il
+benchmark non tocca la cartella corrente.
+
+    python bench_scraper.py --jobs 12 --rate-limit 0.5 --workers 2 \\
+        --latency 300 --jitter 100 --error-rate 0.05 --rate-429 0.05
+    python bench_scraper.py --pages .fbref_cache --json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from fbref_standin import StandIn, add_fault_options, faults_from
+from http_cache import HttpCache
+from scrape_seriea_player_avgs import COMPETITIONS, Backoff, Job, RunStats, run_jobs
+
+
+def bench_jobs(n: int, competitions: list[str]) -> list[Job]:
+    """`n` job distinti: stagioni a ritroso dal 2024-2025, competizioni alternate."""
+    jobs: list[Job] = []
+    year = 2024
+    while len(jobs) < n:
+        for comp in competitions:
+            if len(jobs) < n:
+                jobs.append(Job(comp, f"{year}-{year + 1}"))
+        year -= 1
+    return jobs
+
+
+def run_bench(args: argparse.Namespace) -> dict[str, object]:
+    jobs = bench_jobs(args.jobs, args.competitions)
+    stats = RunStats()
+    log = StringIO()
+    cwd = os.getcwd()
+    pages_dir = os.path.abspath(args.pages) if args.pages else None
+    with tempfile.TemporaryDirectory(prefix="fbref_bench_") as tmp, \
+            StandIn(faults_from(args), pages_dir=pages_dir, synthetic=not args.no_synthetic,
+                    players=args.players, padding_kb=args.padding_kb) as server:
+        os.chdir(tmp)
+        try:
+            cache = HttpCache(os.path.join(tmp, "cache")) if args.with_cache else None
+            with redirect_stdout(sys.stdout if args.verbose else log):
+                failed = run_jobs(jobs, workers=args.workers, cache=cache,
+                                  backoff=Backoff(retries=args.retries, base=args.backoff),
+                                  base_url=server.url, rate_limit=args.rate_limit, stats=stats)
+        finally:
+            os.chdir(cwd)
+        responses = server.server.snapshot()
+
+    done = len(jobs) - failed
+    minutes = stats.elapsed / 60
+    return {
+        "jobs": len(jobs),
+        "failed": failed,
+        "workers": args.workers,
+        "rate_limit_s": args.rate_limit,
+        "elapsed_s": round(stats.elapsed, 3),
+        "pages_per_min": round(done / minutes, 2) if minutes else None,
+        "requests": stats.requests,
+        "retries": stats.retries,
+        "fetch_ms_per_request": round(1000 * stats.fetch_seconds / stats.requests, 1) if stats.requests else None,
+        "parse_ms_per_page": round(1000 * stats.parse_seconds / stats.parsed, 1) if stats.parsed else None,
+        "scheduler_idle_s": round(stats.idle_seconds, 3),
+        "scheduler_idle_pct": round(100 * stats.idle_seconds / stats.elapsed, 1) if stats.elapsed else None,
+        "responses": responses,
+    }
+
+
+def print_report(result: dict[str, object]) -> None:
+    print(f"📊 {result['jobs'] - result['failed']}/{result['jobs']} pagine in {result['elapsed_s']}s "
+          f"({result['workers']} worker, una richiesta ogni {result['rate_limit_s']}s)")
+    print(f"  pagine/min          {result['pages_per_min']}")
+    print(f"  parsing/pagina      {result['parse_ms_per_page']} ms")
+    print(f"  risposta/richiesta  {result['fetch_ms_per_request']} ms "
+          f"({result['requests']} richieste, {result['retries']} tentativi ripetuti)")
+    print(f"  attesa scheduler    {result['scheduler_idle_s']}s ({result['scheduler_idle_pct']}%)")
+    print(f"  risposte server     {result['responses']}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark dello scraper sul finto FBref locale.")
+    parser.add_argument("--jobs", type=int, default=12, help="pagine da scaricare")
+    parser.add_argument("--competitions", nargs="+", default=["serie_a"], choices=sorted(COMPETITIONS))
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rate-limit", type=float, default=0.5, metavar="SECONDI",
+                        help="secondi tra due richieste (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=0.5, metavar="SECONDI",
+                        help="prima attesa del backoff (default: %(default)s)")
+    parser.add_argument("--with-cache", action="store_true",
+                        help="usa una cache HTTP (vuota) come nel run vero")
+    parser.add_argument("--json", metavar="PATH", help="salva il risultato anche in JSON")
+    parser.add_argument("--verbose", action="store_true", help="mostra l'output dello scraper")
+    add_fault_options(parser)
+    args = parser.parse_args(argv)
+    if args.rate_limit <= 0 or args.jobs <= 0 or args.workers <= 0:
+        parser.error("--rate-limit, --jobs e --workers devono essere positivi.")
+    return args
+
+
+def cli(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    result = run_bench(args)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    sys.exit(1 if result["failed"] else 0)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Finto FBref locale per provare lo scraper senza fbref.com.
+
+Serve pagine FBref registrate e, per i percorsi che non ha, pagine sintetiche
+con la stessa forma: tabella ``stats_standard`` dentro un commento HTML,
+intestazione su due righe, intestazione ripetuta ogni 25 righe, altre tabelle
+commentate e qualche centinaio di KB di contorno.  Tutto è deterministico
+(seed fisso): stesse richieste → stesse risposte.
+
+- pagine registrate: la cartella di una cache HTTP dello scraper
+  (``--pages .fbref_cache``): basta un run reale con la cache attiva;
+- latenza configurabile (``--latency``/``--jitter``, millisecondi);
+- errori iniettati: ``--error-rate`` (500/503), ``--rate-429`` (429 con
+  Retry-After) e ``--max-rpm`` (429 oltre N richieste al minuto, come il
+  limite vero di FBref);
+- ETag su ogni pagina: le GET condizionali ricevono 304;
+- ``GET /__stats`` restituisce i contatori delle risposte in JSON.
+
+    python fbref_standin.py --port 8765 --latency 300 --rate-429 0.05
+    python scrape_seriea_player_avgs.py --base-url http://127.0.0.1:8765 \\
+        --rate-limit 0.5 --competitions serie_a --seasons 2020-2021 2021-2022
+
+Uso da Python (server in un thread)::
+
+    with StandIn(Faults(latency_ms=100)) as server:
+        run_jobs(jobs, base_url=server.url, rate_limit=0.2)
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Final
+from urllib.parse import urlsplit
+
+from http_cache import HttpCache
+
+ROWS_PER_HEADER: Final[int] = 25  # FBref ripete l'intestazione ogni 25 righe
+
+FIRST_NAMES: Final[list[str]] = [
+    "Lautaro", "Nicolò", "Federico", "Paulo", "Khvicha", "Mike", "Dušan", "Álvaro",
+    "Marco", "Luca", "Alessandro", "Matteo", "Giovanni", "Andrea", "Romelu", "Théo",
+]
+LAST_NAMES: Final[list[str]] = [
+    "Martínez", "Barella", "Chiesa", "Dybala", "Kvaratskhelia", "Maignan", "Vlahović",
+    "Morata", "Rossi", "Bianchi", "Lukaku", "Dimarco", "N'Dicka", "Hernández", "Pellegrini",
+    "Immobile", "Zaccagni", "Lookman", "Koopmeiners", "Politano", "Di Lorenzo", "Bastoni",
+]
+SQUADS: Final[list[str]] = [
+    "Atalanta", "Bologna", "Cagliari", "Como", "Empoli", "Fiorentina", "Genoa",
+    "Hellas Verona", "Inter", "Juventus", "Lazio", "Lecce", "Milan", "Monza",
+    "Napoli", "Parma", "Roma", "Torino", "Udinese", "Venezia",
+]
+POSITIONS: Final[list[str]] = ["GK", "DF", "DF", "DF", "MF", "MF", "MF", "FW", "FW", "DF,MF", "MF,FW"]
+
+# intestazione di "Player Standard Stats": (gruppo, colonna)
+STANDARD_COLUMNS: Final[list[tuple[str, str]]] = [
+    ("", "Rk"), ("", "Player"), ("", "Nation"), ("", "Pos"), ("", "Squad"),
+    ("", "Age"), ("", "Born"),
+    ("Playing Time", "MP"), ("Playing Time", "Starts"), ("Playing Time", "Min"),
+    ("Playing Time", "90s"),
+    ("Performance", "Gls"), ("Performance", "Ast"), ("Performance", "G+A"),
+    ("Performance", "G-PK"), ("Performance", "PK"), ("Performance", "PKatt"),
+    ("Performance", "CrdY"), ("Performance", "CrdR"),
+    ("", "Matches"),
+]
+
+
+# ---------------------------------------------------------------------------#
+# PAGINE                                                                     #
+# ---------------------------------------------------------------------------#
+def _header_rows() -> tuple[str, str]:
+    """Le due righe d'intestazione: gruppi ("Playing Time", …) e colonne."""
+    groups: list[tuple[str, int]] = []
+    for group, _ in STANDARD_COLUMNS:
+        if groups and groups[-1][0] == group:
+            groups[-1] = (group, groups[-1][1] + 1)
+        else:
+            groups.append((group, 1))
+    over = "".join(f'<th colspan="{n}" class="over_header">{g}</th>' for g, n in groups)
+    cols = "".join(f'<th scope="col">{c}</th>' for _, c in STANDARD_COLUMNS)
+    return f'<tr class="over_header">{over}</tr>', cols
+
+
+def _player_row(rng: random.Random, rank: int) -> str:
+    mp = rng.randint(0, 38)
+    starts = rng.randint(0, mp)
+    minutes = starts * rng.randint(60, 90) + (mp - starts) * rng.randint(1, 30)
+    pkatt = rng.choice([0, 0, 0, 1, 2, 4])
+    pk = rng.randint(0, pkatt)
+    gls = rng.randint(0, 12) + pk
+    ast = rng.randint(0, 10)
+    cells = [
+        f'<th scope="row">{rank}</th>',
+        f'<td><a href="/en/players/{rank:08x}/">{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}</a></td>',
+        '<td><span class="f-i">it</span> ITA</td>',
+        f"<td>{rng.choice(POSITIONS)}</td>",
+        f"<td>{rng.choice(SQUADS)}</td>",
+        f"<td>{rng.randint(18, 38)}-{rng.randint(0, 364):03d}</td>",
+        f"<td>{rng.randint(1986, 2006)}</td>",
+        f"<td>{mp}</td>", f"<td>{starts}</td>", f"<td>{minutes:,}</td>",
+        f"<td>{minutes / 90:.1f}</td>",
+        f"<td>{gls}</td>", f"<td>{ast}</td>", f"<td>{gls + ast}</td>", f"<td>{gls - pk}</td>",
+        f"<td>{pk}</td>", f"<td>{pkatt}</td>",
+        f"<td>{rng.randint(0, 12)}</td>", f"<td>{rng.choice([0, 0, 0, 1])}</td>",
+        '<td><a href="/en/players/matchlogs/">Matches</a></td>',
+    ]
+    return "<tr>" + "".join(cells) + "</tr>"
+
+
+def synthetic_page(path: str, players: int = 550, padding_kb: int = 600, seed: int = 0) -> str:
+    """Pagina "Standard Stats" con la forma di quelle vere di FBref.
+
+    Il contenuto dipende solo da `path` e `seed`.
+    """
+    rng = random.Random(f"{seed}:{path}")
+    over, cols = _header_rows()
+    body: list[str] = []
+    for i in range(1, players + 1):
+        body.append(_player_row(rng, i))
+        if i % ROWS_PER_HEADER == 0 and i < players:
+            body.append(f'<tr class="thead">{cols}</tr>')
+    table = (
+        '<div class="table_container" id="div_stats_standard">\n'
+        '<table class="min_width sortable stats_table" id="stats_standard" data-cols-to-freeze=",2">\n'
+        "<caption>Player Standard Stats Table</caption>\n"
+        f"<thead>\n{over}\n<tr>{cols}</tr>\n</thead>\n<tbody>\n" + "\n".join(body) + "\n</tbody>\n</table>\n</div>"
+    )
+    # altre tabelle commentate e contorno: il parser deve saltarle
+    squads = "".join(f"<tr><th>{s}</th><td>{rng.randint(20, 35)}</td></tr>" for s in SQUADS)
+    filler = "".join(
+        f'<div class="filler" data-n="{i}">{rng.getrandbits(256):064x}</div>\n'
+        for i in range(padding_kb * 1024 // 100)
+    )
+    return (
+        "<!DOCTYPE html>\n<html><head><title>Serie A Stats | FBref.com</title></head><body>\n"
+        '<table id="stats_squads_standard_for"><thead><tr><th>Squad</th><th># Pl</th></tr></thead>'
+        f"<tbody>{squads}</tbody></table>\n"
+        f"<div id=\"all_stats_keeper\"><!--\n<table id=\"stats_keeper\"><tbody>{squads}</tbody></table>\n-->\n</div>\n"
+        f'<div id="all_stats_standard" class="table_wrapper">\n<!--\n{table}\n-->\n</div>\n'
+        f"{filler}</body></html>\n"
+    )
+
+
+def recorded_pages(directory: str) -> dict[str, str]:
+    """Percorso URL → corpo, dalle pagine di una cache HTTP dello scraper."""
+    pages: dict[str, str] = {}
+    cache = HttpCache(directory)
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            url = json.load(f).get("url")
+        entry = cache.load(url) if url else None
+        if entry is not None:
+            pages[urlsplit(url).path] = entry.body
+    return pages
+
+
+# ---------------------------------------------------------------------------#
+# SERVER                                                                     #
+# ---------------------------------------------------------------------------#
+@dataclass
+class Faults:
+    """Latenza ed errori iniettati (probabilità per richiesta)."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0     # 500/503
+    rate_429: float = 0.0       # 429 casuali
+    max_rpm: int = 0            # 429 oltre N richieste/minuto (0 = nessun limite)
+    retry_after: int = 1        # secondi nell'header Retry-After
+    seed: int = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StandInServer"
+
+    def log_message(self, *args: object) -> None:  # niente log per richiesta
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(status)
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path == "/__stats":
+            self._send(200, json.dumps(self.server.snapshot()).encode(),
+                       {"Content-Type": "application/json"})
+            return
+        status, delay = self.server.decide()
+        if delay:
+            time.sleep(delay)
+        if status == 429:
+            self._send(429, b"Too Many Requests", {"Retry-After": str(self.server.faults.retry_after)})
+            return
+        if status != 200:
+            self._send(status, b"Server Error")
+            return
+        page = self.server.page(path)
+        if page is None:
+            self._send(404, b"Not Found")
+            return
+        body, etag = page
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return
+        self._send(200, body, {"Content-Type": "text/html; charset=utf-8", "ETag": etag})
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        faults: Faults,
+        pages: dict[str, str] | None = None,
+        synthetic: bool = True,
+        players: int = 550,
+        padding_kb: int = 600,
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.faults = faults
+        self.recorded = pages or {}
+        self.synthetic = synthetic
+        self.players = players
+        self.padding_kb = padding_kb
+        self.counts: Counter[int] = Counter()
+        self._pages: dict[str, tuple[bytes, str]] = {}
+        self._recent: deque[float] = deque()  # istanti delle ultime richieste (--max-rpm)
+        self._rng = random.Random(faults.seed)
+        self._lock = threading.Lock()
+
+    def decide(self) -> tuple[int, float]:
+        """Esito (200/429/500/503) e latenza della prossima richiesta."""
+        f = self.faults
+        with self._lock:
+            now = time.monotonic()
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            roll = self._rng.random()
+            delay = max(0.0, self._rng.gauss(f.latency_ms, f.jitter_ms)) / 1000 if f.latency_ms else 0.0
+            if f.max_rpm and len(self._recent) > f.max_rpm:
+                return 429, 0.0
+            if roll < f.rate_429:
+                return 429, 0.0
+            if roll < f.rate_429 + f.error_rate:
+                return self._rng.choice([500, 503]), delay
+            return 200, delay
+
+    def page(self, path: str) -> tuple[bytes, str] | None:
+        """Corpo ed ETag di `path` (registrato, sintetico o None)."""
+        with self._lock:
+            cached = self._pages.get(path)
+        if cached is not None:
+            return cached
+        text = self.recorded.get(path)
+        if text is None and self.synthetic and path.startswith("/en/comps/"):
+            text = synthetic_page(path, self.players, self.padding_kb, self.faults.seed)
+        if text is None:
+            return None
+        body = text.encode("utf-8")
+        page = body, '"' + hashlib.sha1(body).hexdigest() + '"'
+        with self._lock:
+            self._pages[path] = page
+        return page
+
+    def count(self, status: int) -> None:
+        with self._lock:
+            self.counts[status] += 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {str(k): v for k, v in sorted(self.counts.items())}
+
+
+class StandIn:
+    """Server in un thread di sfondo, per test e benchmark (context manager)."""
+
+    def __init__(
+        self,
+        faults: Faults | None = None,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        pages_dir: str | None = None,
+        synthetic: bool = True,
+        players: int = 550,
+        padding_kb: int = 600,
+    ) -> None:
+        faults = faults or Faults()
+        pages = recorded_pages(pages_dir) if pages_dir else None
+        self.server = StandInServer((host, port), faults, pages, synthetic, players, padding_kb)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StandIn":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ---------------------------------------------------------------------------#
+def add_fault_options(parser: argparse.ArgumentParser) -> None:
+    """Opzioni del server condivise con bench_scraper.py."""
+    parser.add_argument("--pages", metavar="DIR",
+                        help="cartella di una cache HTTP dello scraper con pagine registrate")
+    parser.add_argument("--no-synthetic", action="store_true",
+                        help="404 per i percorsi senza pagina registrata")
+    parser.add_argument("--players", type=int, default=550, help="righe delle pagine sintetiche")
+    parser.add_argument("--padding-kb", type=int, default=600,
+                        help="contorno HTML delle pagine sintetiche (KB)")
+    parser.add_argument("--latency", type=float, default=0.0, metavar="MS", help="latenza media")
+    parser.add_argument("--jitter", type=float, default=0.0, metavar="MS",
+                        help="deviazione standard della latenza")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="frazione di risposte 500/503")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="frazione di risposte 429")
+    parser.add_argument("--max-rpm", type=int, default=0,
+                        help="429 oltre queste richieste al minuto (0 = nessun limite)")
+    parser.add_argument("--retry-after", type=int, default=1, metavar="SECONDI",
+                        help="valore dell'header Retry-After sui 429")
+    parser.add_argument("--seed", type=int, default=0, help="seed di pagine ed errori")
+
+
+def faults_from(args: argparse.Namespace) -> Faults:
+    return Faults(
+        latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate,
+        rate_429=args.rate_429, max_rpm=args.max_rpm, retry_after=args.retry_after, seed=args.seed,
+    )
+
+
+def cli(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Finto FBref locale per lo scraper.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_fault_options(parser)
+    args = parser.parse_args(argv)
+
+    pages = recorded_pages(args.pages) if args.pages else None
+    server = StandInServer((args.host, args.port), faults_from(args), pages,
+                           not args.no_synthetic, args.players, args.padding_kb)
+    print(f"‑ FBref locale su http://{args.host}:{server.server_address[1]} "
+          f"({len(pages or {})} pagine registrate)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"‑ Risposte: {server.snapshot()}")
+
+
+if __name__ == "__main__":
+    cli()
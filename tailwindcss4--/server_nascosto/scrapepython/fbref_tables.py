@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Estrazione mirata delle tabelle FBref.
+
+FBref mette molte tabelle dentro commenti HTML e la pagina pesa megabyte:
+invece di togliere tutti i `<!--`/`-->` e far costruire a `pd.read_html`
+l'albero dell'intera pagina, qui si cercano gli `<table id="...">` nel testo
+grezzo (commentati o no) con una sola scansione, e si passa al parser HTML
+solo il frammento `<table>…</table>` di ciascuna tabella richiesta.
+"""
+
+from __future__ import annotations
+
+import re
+from io import StringIO
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_TABLE_END = re.compile(r"</table\s*>", re.IGNORECASE)
+
+
+def _table_start(ids: Iterable[str]) -> re.Pattern[str]:
+    alternatives = "|".join(re.escape(i) for i in ids)
+    return re.compile(
+        r"<table\b[^>]*?\bid\s*=\s*[\"']?(" + alternatives + r")[\"'\s/>]",
+        re.IGNORECASE,
+    )
+
+
+def find_tables(html: str, ids: Iterable[str]) -> dict[str, str]:
+    """Frammenti HTML ``id → "<table …>…</table>"`` in un solo passaggio.
+
+    Se un id compare più volte vale la prima occorrenza; gli id assenti non
+    compaiono nel risultato.
+    """
+    wanted = set(ids)
+    found: dict[str, str] = {}
+    if not wanted:
+        return found
+    for m in _table_start(wanted).finditer(html):
+        table_id = m.group(1)
+        if table_id in found:
+            continue
+        end = _TABLE_END.search(html, m.end())
+        if end is None:
+            continue  # tabella troncata: meglio il fallback che un frammento a metà
+        found[table_id] = html[m.start():end.end()]
+        if len(found) == len(wanted):
+            break
+    return found
+
+
+def read_tables(html: str, ids: Iterable[str]) -> dict[str, pd.DataFrame]:
+    """Come `find_tables`, ma già convertite in DataFrame."""
+    import pandas as pd  # solo qui: `find_tables` non ne ha bisogno
+
+    return {
+        table_id: pd.read_html(StringIO(fragment))[0]
+        for table_id, fragment in find_tables(html, ids).items()
+    }
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Cache HTTP su disco per lo scraper FBref.
+
+Per ogni URL salva il corpo della risposta più ETag / Last‑Modified:
+
+- entro la TTL la pagina viene servita dalla cache (nessuna richiesta, nessun
+  token di rate‑limit consumato);
+- oltre la TTL parte una GET condizionale (If‑None‑Match / If‑Modified‑Since):
+  su 304 si riusa il corpo salvato;
+- in modalità offline si legge solo dalla cache.
+
+Layout: ``<cartella>/<sha1(url)>.html`` + ``<sha1(url)>.json`` (metadati).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Final, Mapping
+
+DEFAULT_DIR: Final[str] = ".fbref_cache"
+DEFAULT_TTL: Final[float] = 6 * 3600  # sec
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body: str
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float = 0.0  # ultima volta che il server ha confermato il corpo
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class HttpCache:
+    """Risposte HTTP su disco, indicizzate per URL."""
+
+    def __init__(self, directory: str = DEFAULT_DIR, ttl: float = DEFAULT_TTL) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".html", base + ".json"
+
+    @staticmethod
+    def _write(path: str, text: str) -> None:
+        """Scrittura atomica: un'interruzione non lascia file a metà."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def load(self, url: str) -> CacheEntry | None:
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, encoding="utf-8") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        meta.pop("body", None)
+        return CacheEntry(body=body, **meta)
+
+    def store(self, url: str, body: str, headers: Mapping[str, str]) -> CacheEntry:
+        entry = CacheEntry(
+            url=url,
+            body=body,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            fetched_at=time.time(),
+        )
+        body_path, meta_path = self._paths(url)
+        self._write(body_path, body)
+        self._save_meta(entry)
+        return entry
+
+    def _save_meta(self, entry: CacheEntry) -> None:
+        meta = asdict(entry)
+        del meta["body"]
+        self._write(self._paths(entry.url)[1], json.dumps(meta, indent=2))
+
+    def touch(self, entry: CacheEntry) -> None:
+        """Il server ha risposto 304: il corpo è ancora valido."""
+        entry.fetched_at = time.time()
+        self._save_meta(entry)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return entry.age() < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry | None) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Coda persistente dei job dello scraper FBref.
+
+Ogni job (chiave ``competizione:stagione:tabella``) ha uno stato su disco:
+
+- ``pending``  da fare (o interrotto a metà: si rifà);
+- ``done``     completato, con i file prodotti;
+- ``failed``   fallito dopo i tentativi, con l'ultimo errore.
+
+Lo stato viene salvato a ogni cambiamento (scrittura atomica, come la cache
+HTTP): un'interruzione o un errore a metà backfill non perde i job già
+finiti, e il run successivo riparte solo da quelli mancanti.
+
+Layout: un file JSON ``{"version": 1, "jobs": {chiave: {...}}}``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Final, Iterable
+
+DEFAULT_PATH: Final[str] = ".fbref_jobs.json"
+VERSION: Final[int] = 1
+
+PENDING: Final[str] = "pending"
+DONE: Final[str] = "done"
+FAILED: Final[str] = "failed"
+
+
+@dataclass
+class JobRecord:
+    state: str = PENDING
+    attempts: int = 0              # run in cui il job è partito
+    error: str | None = None       # ultimo errore (solo se failed)
+    outputs: list[str] = field(default_factory=list)
+    updated_at: float = 0.0
+
+
+class JobQueue:
+    """Stato dei job su disco, condiviso tra i thread dello scraper."""
+
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        self.path = path
+        self.jobs: dict[str, JobRecord] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except OSError:
+            return  # primo run
+        except ValueError as err:
+            raise ValueError(f"Stato dei job illeggibile: {self.path}") from err
+        if data.get("version") != VERSION:
+            raise ValueError(f"Versione dello stato non supportata: {self.path}")
+        self.jobs = {key: JobRecord(**rec) for key, rec in data.get("jobs", {}).items()}
+
+    def _save(self) -> None:
+        """Scrittura atomica (chiamata con il lock preso)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        payload = {"version": VERSION, "jobs": {k: asdict(r) for k, r in self.jobs.items()}}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def _set(self, key: str, **changes: object) -> None:
+        with self._lock:
+            rec = self.jobs.setdefault(key, JobRecord())
+            for name, value in changes.items():
+                setattr(rec, name, value)
+            rec.updated_at = time.time()
+            self._save()
+
+    # ------------------------------------------------------------------ stato
+    def add(self, keys: Iterable[str]) -> None:
+        """Registra i job nuovi come pending (quelli già noti restano com'erano)."""
+        with self._lock:
+            new = [k for k in keys if k not in self.jobs]
+            for key in new:
+                self.jobs[key] = JobRecord(updated_at=time.time())
+            if new:
+                self._save()
+
+    def state(self, key: str) -> str | None:
+        rec = self.jobs.get(key)
+        return rec.state if rec else None
+
+    def is_done(self, key: str) -> bool:
+        """Completato e con tutti i file ancora presenti."""
+        rec = self.jobs.get(key)
+        return rec is not None and rec.state == DONE and all(os.path.exists(p) for p in rec.outputs)
+
+    def start(self, key: str) -> None:
+        rec = self.jobs.get(key)
+        self._set(key, state=PENDING, attempts=(rec.attempts if rec else 0) + 1, error=None)
+
+    def mark_done(self, key: str, outputs: list[str]) -> None:
+        self._set(key, state=DONE, outputs=list(outputs), error=None)
+
+    def mark_failed(self, key: str, error: str) -> None:
+        self._set(key, state=FAILED, error=error)
+
+    def reset(self) -> None:
+        """Dimentica tutto (``--restart``)."""
+        with self._lock:
+            self.jobs.clear()
+            self._save()
+
+    def counts(self) -> dict[str, int]:
+        out = {PENDING: 0, DONE: 0, FAILED: 0}
+        for rec in self.jobs.values():
+            out[rec.state] = out.get(rec.state, 0) + 1
+        return out
@@ -1,25 +1,69 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-fbref_serie_a_totali.py  –  v1.5  (luglio 2025)
+fbref_serie_a_totali.py  –  v1.5  (luglio 2025)
 
-Estrae la tabella “Player Standard Stats” Serie A 2024‑25 da FBref e salva
+Estrae la tabella “Player Standard Stats” Serie A 2024‑25 da FBref e salva
 un CSV con i **totali** di partite, minuti, gol, assist, rigori calciati,
 ammonizioni e espulsioni.  Ruoli tradotti in sigle italiane.
 
-Licenza MIT.  Requisiti: pandas, requests, lxml (o html5lib).
+Modalità multi‑job: una lista di (competizione, stagione, tabelle) viene
+eseguita con un unico scheduler token‑bucket (RATE_LIMIT) e una sola
+`requests.Session` con keep‑alive.  Le tabelle della stessa pagina FBref
+(es. `stats` e `squads`) stanno in un solo job: la pagina si scarica e si
+analizza una volta, e si scrive un CSV per tabella.
+
+Le pagine passano da una cache su disco (http_cache.py): entro la TTL nessuna
+richiesta, poi GET condizionale; se la pagina non è cambiata e il CSV esiste
+già, parsing e scrittura vengono saltati.  `--offline` usa solo la cache e
+rifà sempre parsing/trasformazione (utile in sviluppo).
+
+    python scrape_seriea_player_avgs.py                       # come prima
+    python scrape_seriea_player_avgs.py --competitions serie_a serie_b \\
+        --seasons 2020-2021 2021-2022 2022-2023 2023-2024 2024-2025
+    python scrape_seriea_player_avgs.py --job serie_a:2023-2024:stats
+    python scrape_seriea_player_avgs.py --job serie_a:2023-2024:stats,squads
+
+Output tipizzato: conteggi come interi piccoli (uint8/uint16), squadra e
+ruolo categorici; `--format csv parquet feather` scrive anche Parquet/Feather.
+
+Backfill lunghi: timeout, errori di rete, 5xx e 429 si ritentano con backoff
+esponenziale (un 429 con Retry-After ferma tutto lo scheduler per il tempo
+indicato).  Lo stato dei job (pending/done/failed) è salvato in `--state`
+(job_queue.py) dopo ogni job: rilanciando lo stesso comando si rifanno solo
+i job mancanti o falliti; `--restart` riparte da zero.
+
+`--base-url http://127.0.0.1:8765` manda le richieste a un altro host (es.
+il finto FBref locale di fbref_standin.py); `bench_scraper.py` misura pagine
+al minuto, tempo di parsing e attesa dello scheduler contro quel server.
+
+Licenza MIT.  Requisiti: pandas, requests, lxml (o html5lib); pyarrow per
+Parquet/Feather.
 """
 
 from __future__ import annotations
 
+import argparse
+import os
+import random
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
 from io import StringIO
-from typing import Final
+from typing import TYPE_CHECKING, Final
 
-import pandas as pd
-import requests
-from requests.exceptions import HTTPError, RequestException, Timeout
+from http_cache import DEFAULT_DIR, DEFAULT_TTL, HttpCache
+from job_queue import DEFAULT_PATH as STATE_PATH
+from job_queue import JobQueue
+
+# pandas e requests pesano: vengono importati solo dove servono, così
+# `--help` e l'import del modulo restano istantanei
+if TYPE_CHECKING:
+    import pandas as pd
+    import requests
 
 # ---------------------------------------------------------------------------#
 # CONFIGURAZIONE                                                             #
@@ -27,8 +71,9 @@ from requests.exceptions import HTTPError, RequestException, Timeout
 SEASON_TAG: Final[str] = "serie_a_24_25"
 TABLE_ID:   Final[str] = "stats_standard"
 TABLE_NAME: Final[str] = "player_standard_stats"
+FBREF_BASE: Final[str] = "https://fbref.com"
 FBREF_URL:  Final[str] = (
-    "https://fbref.com/en/comps/18/stats/Serie-B-Stats"
+    f"{FBREF_BASE}/en/comps/11/2024-2025/stats/2024-2025-Serie-A-Stats"
 )
 OUTPUT_CSV: Final[str] = f"{SEASON_TAG}_{TABLE_NAME}_totali.csv"
 
@@ -38,7 +83,23 @@ HEADERS: Final[dict[str, str]] = {
     )
 }
 REQUEST_TIMEOUT: Final[int] = 10
-RATE_LIMIT:      Final[float] = 7.5  # sec  (≈ 8 req/min)
+RATE_LIMIT:      Final[float] = 7.5  # sec  (≈ 8 req/min)
+MAX_RETRIES:     Final[int] = 5      # tentativi extra per richiesta (errori transitori)
+BACKOFF_BASE:    Final[float] = 15.0   # sec, raddoppia a ogni tentativo
+BACKOFF_MAX:     Final[float] = 900.0  # sec
+
+# Competizioni FBref: chiave → (id competizione, slug nell'URL, prefisso tag)
+COMPETITIONS: Final[dict[str, tuple[int, str, str]]] = {
+    "serie_a": (11, "Serie-A", "serie_a"),
+    "serie_b": (18, "Serie-B", "serie_b"),
+}
+
+# Tabelle FBref: chiave → (pagina nell'URL, id tabella HTML, nome usato nel CSV).
+# Le colonne di ciascuna sono in TABLE_COLUMNS (più sotto).
+TABLES: Final[dict[str, tuple[str, str, str]]] = {
+    "stats": ("stats", TABLE_ID, TABLE_NAME),
+    "squads": ("stats", "stats_squads_standard_for", "squad_standard_stats"),
+}
 
 # Mappa ruoli FBref → abbreviazioni italiane
 POS_MAP: Final[dict[str, str]] = {
@@ -49,17 +110,227 @@ POS_MAP: Final[dict[str, str]] = {
     # Aggiungi qui altri mapping se necessario
 }
 
+# Mapping colonne FBref → colonne del CSV
+COL_MAP: Final[dict[str, str]] = {
+    "Player": "player",
+    "Squad": "squad",
+    "Pos": "pos",
+    "MP": "partite",
+    "Min": "minuti",
+    "Gls": "goal",
+    "Ast": "assist",
+    "PKatt": "rigori",
+    "CrdY": "gialli",
+    "CrdR": "rossi",
+}
+NUM_COLS: Final[list[str]] = [
+    "partite", "minuti", "goal", "assist", "rigori", "gialli", "rossi",
+]
+COL_MAP_INV: Final[dict[str, str]] = {v: k for k, v in COL_MAP.items()}
+OUT_COLS: Final[list[str]] = ["player", "squad", "pos"] + NUM_COLS
+CATEGORY_COLS: Final[list[str]] = ["squad", "pos"]
+TEXT_COLS: Final[list[str]] = ["player"]  # il resto (non categorico) è un conteggio
+
+# Tabella "Squad Standard Stats": una riga per squadra
+SQUAD_COL_MAP: Final[dict[str, str]] = {
+    "Squad": "squad",
+    "# Pl": "giocatori",
+}
+# Colonne per tabella: la prima serve anche a riconoscere le intestazioni ripetute
+TABLE_COLUMNS: Final[dict[str, dict[str, str]]] = {
+    "stats": COL_MAP,
+    "squads": SQUAD_COL_MAP,
+}
+
+# Formati di output: il CSV resta il default, Parquet/Feather richiedono pyarrow
+OUTPUT_FORMATS: Final[dict[str, str]] = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+
+
+class ScrapeError(Exception):
+    """Errore di download/parsing di un singolo job (con eventuale causa).
+
+    `transient`: vale la pena ritentare (timeout, rete, 429, 5xx);
+    `retry_after`: secondi indicati dal server con l'header Retry-After.
+    """
+
+    def __init__(self, msg: str, *, transient: bool = False, retry_after: float | None = None) -> None:
+        super().__init__(msg)
+        self.transient = transient
+        self.retry_after = retry_after
+
+
+# ---------------------------------------------------------------------------#
+# JOB E SCHEDULER                                                            #
 # ---------------------------------------------------------------------------#
-def throttle(prev: float | None) -> float:
-    """Garanzia rate‑limit: max 8 req/min."""
-    now = time.time()
-    if prev is not None:
-        wait = RATE_LIMIT - (now - prev)
-        if wait > 0:
-            time.sleep(wait)
-    return time.time()
+@dataclass(frozen=True)
+class Job:
+    """Una pagina di una competizione in una stagione (es. serie_a, 2023-2024).
+
+    `tables` sono le tabelle da estrarre, tutte della stessa pagina FBref:
+    una richiesta, un parsing, un file per tabella.
+    """
+
+    competition: str
+    season: str      # "2023-2024"
+    tables: tuple[str, ...] = ("stats",)
+
+    @classmethod
+    def parse(cls, spec: str) -> "Job":
+        """`competizione:stagione[:tabella[,tabella…]]` → Job."""
+        parts = spec.split(":")
+        if len(parts) not in (2, 3):
+            raise ValueError(f"Job non valido: {spec!r} (atteso comp:stagione[:tabella,…])")
+        if len(parts) == 3:
+            parts[2] = tuple(dict.fromkeys(t.strip() for t in parts[2].split(",") if t.strip()))
+        job = cls(*parts)
+        job.validate()
+        return job
+
+    def validate(self) -> None:
+        if self.competition not in COMPETITIONS:
+            raise ValueError(f"Competizione sconosciuta: {self.competition}")
+        if not self.tables:
+            raise ValueError("Nessuna tabella richiesta.")
+        for table in self.tables:
+            if table not in TABLES:
+                raise ValueError(f"Tabella sconosciuta: {table}")
+        pages = {TABLES[t][0] for t in self.tables}
+        if len(pages) > 1:
+            raise ValueError(f"Tabelle di pagine diverse in un solo job: {', '.join(self.tables)}")
+        start, _, end = self.season.partition("-")
+        if not (start.isdigit() and end.isdigit() and len(start) == len(end) == 4):
+            raise ValueError(f"Stagione non valida: {self.season} (atteso AAAA-AAAA)")
+
+    @property
+    def key(self) -> str:
+        """Forma `competizione:stagione:tabella[,tabella…]` (inversa di `parse`)."""
+        return f"{self.competition}:{self.season}:{','.join(self.tables)}"
 
+    @property
+    def url(self) -> str:
+        comp_id, slug, _ = COMPETITIONS[self.competition]
+        page = TABLES[self.tables[0]][0]
+        return (
+            f"{FBREF_BASE}/en/comps/{comp_id}/{self.season}/"
+            f"{page}/{self.season}-{slug}-Stats"
+        )
+
+    @property
+    def outputs(self) -> dict[str, str]:
+        """Tabella → CSV, stesso schema di OUTPUT_CSV: serie_a_24_25_player_standard_stats_totali.csv"""
+        start, _, end = self.season.partition("-")
+        tag = f"{COMPETITIONS[self.competition][2]}_{start[2:]}_{end[2:]}"
+        return {table: f"{tag}_{TABLES[table][2]}_totali.csv" for table in self.tables}
+
+
+class TokenBucket:
+    """Rate‑limit condiviso tra thread: `rate` token/sec, al massimo `capacity`.
+
+    Con capacity=1 e rate=1/RATE_LIMIT equivale a una richiesta ogni
+    RATE_LIMIT secondi, indipendentemente da quanti job sono in coda.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.idle = 0.0  # secondi passati ad aspettare un token
+        self.paused_until = 0.0  # nessun token prima di questo istante (429)
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Nessuna richiesta per `seconds` (Retry-After vale per tutti i thread).
+
+        Senza lock: chi è fermo in `acquire` lo tiene, e un float si assegna
+        atomicamente; `acquire` ricontrolla il valore a ogni giro.
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
 
+    def acquire(self) -> None:
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                    self.tokens = 0.0
+                    self.updated = self.paused_until
+                    self.idle += wait
+                    time.sleep(wait)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.idle += wait
+                time.sleep(wait)
+
+
+@dataclass(frozen=True)
+class Backoff:
+    """Attese tra i tentativi: `base`·2^n secondi (max `cap`), con jitter ±25%."""
+
+    retries: int = MAX_RETRIES
+    base: float = BACKOFF_BASE
+    cap: float = BACKOFF_MAX
+
+    def delay(self, attempt: int) -> float:
+        return min(self.cap, self.base * 2 ** attempt) * random.uniform(0.75, 1.25)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Header Retry-After (secondi o data HTTP) → secondi da aspettare."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+@dataclass
+class RunStats:
+    """Contatori di un run, aggiornati dai worker (riepilogo e bench_scraper.py)."""
+
+    requests: int = 0            # richieste HTTP, tentativi compresi
+    fetch_seconds: float = 0.0
+    parsed: int = 0              # pagine parse-ate e scritte
+    parse_seconds: float = 0.0   # parsing + trasformazione
+    retries: int = 0
+    idle_seconds: float = 0.0    # attesa del rate‑limit (dal TokenBucket)
+    elapsed: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, **deltas: float) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+
+def make_session(pool_size: int = 4) -> requests.Session:
+    """Session con keep‑alive e pool di connessioni: un solo handshake TLS."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# ---------------------------------------------------------------------------#
 def die(msg: str, exc: Exception | None = None) -> None:
     print(f"ERRORE: {msg}", file=sys.stderr)
     if exc:
@@ -74,90 +345,458 @@ def translate_pos(pos_field: str) -> str:
 
 
 # ---------------------------------------------------------------------------#
-def main() -> None:
-    print("‑ Scarico tabella…")
-    last_req: float | None = None
+# FASI: download → tabella → trasformazione → CSV                           #
+# ---------------------------------------------------------------------------#
+def fetch(
+    url: str,
+    session: requests.Session | None = None,
+    headers: dict[str, str] | None = None,
+) -> requests.Response:
+    """HTTP GET; gli errori diventano ScrapeError con messaggio leggibile.
+
+    Un 304 (GET condizionale) non è un errore e viene restituito così com'è.
+    """
+    import requests
+    from requests.exceptions import HTTPError, RequestException, Timeout
 
-    # 1) HTTP GET
     try:
-        last_req = throttle(last_req)
-        resp = requests.get(FBREF_URL, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        getter = session.get if session is not None else requests.get
+        resp = getter(url, headers={**HEADERS, **(headers or {})}, timeout=REQUEST_TIMEOUT)
         resp.raise_for_status()
-    except Timeout:
-        die("Timeout durante la richiesta a FBref.")
+    except Timeout as err:
+        raise ScrapeError("Timeout durante la richiesta a FBref.", transient=True) from err
     except HTTPError as err:
-        die(f"HTTP {resp.status_code} nella richiesta a FBref.", err)
+        status = err.response.status_code
+        raise ScrapeError(
+            f"HTTP {status} nella richiesta a FBref.",
+            transient=status == 429 or status >= 500,
+            retry_after=parse_retry_after(err.response.headers.get("Retry-After")),
+        ) from err
     except RequestException as err:
-        die("Errore di rete durante la richiesta a FBref.", err)
+        raise ScrapeError("Errore di rete durante la richiesta a FBref.", transient=True) from err
+    return resp
+
 
-    html = resp.text.replace("<!--", "").replace("-->", "")
+class PageSource:
+    """Da dove arrivano le pagine: rete (rate‑limit + Session) e cache su disco."""
+
+    def __init__(
+        self,
+        session: requests.Session,
+        bucket: TokenBucket,
+        cache: HttpCache | None = None,
+        offline: bool = False,
+        backoff: Backoff | None = None,
+        base_url: str | None = None,
+        stats: RunStats | None = None,
+    ) -> None:
+        if offline and cache is None:
+            raise ValueError("La modalità offline richiede la cache.")
+        self.session = session
+        self.bucket = bucket
+        self.cache = cache
+        self.offline = offline
+        self.backoff = backoff or Backoff()
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.stats = stats if stats is not None else RunStats()
+        self.stop = threading.Event()   # interrompe le attese di backoff
+
+    def rebase(self, url: str) -> str:
+        """URL FBref → stesso percorso su `base_url` (se impostato)."""
+        if self.base_url and url.startswith(FBREF_BASE):
+            return self.base_url + url[len(FBREF_BASE):]
+        return url
+
+    def request(self, url: str, headers: dict[str, str]) -> requests.Response:
+        """GET con rate‑limit; gli errori transitori si ritentano con backoff.
+
+        Con Retry-After (429/503) si aspetta quanto chiede il server e lo
+        scheduler si ferma per tutti; altrimenti backoff esponenziale.
+        """
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            started = time.perf_counter()
+            try:
+                return fetch(url, self.session, headers)
+            except ScrapeError as err:
+                if not err.transient or attempt >= self.backoff.retries:
+                    raise
+                error = err
+            finally:
+                self.stats.add(requests=1, fetch_seconds=time.perf_counter() - started)
+
+            if error.retry_after is not None:
+                delay = error.retry_after
+                self.bucket.pause(delay)
+            else:
+                delay = self.backoff.delay(attempt)
+            attempt += 1
+            self.stats.add(retries=1)
+            print(f"  … {error} Nuovo tentativo tra {delay:.0f}s "
+                  f"({attempt}/{self.backoff.retries})", file=sys.stderr)
+            if self.stop.wait(delay):
+                raise ScrapeError("Interrotto durante l'attesa.") from error
+
+    def get(self, url: str) -> tuple[str, bool]:
+        """Ritorna ``(html, cambiato)``; `cambiato` è False se il corpo è quello in cache."""
+        url = self.rebase(url)
+        entry = self.cache.load(url) if self.cache else None
+        if self.offline:
+            if entry is None:
+                raise ScrapeError(f"Pagina non presente in cache (offline): {url}")
+            return entry.body, True
+        if entry is not None and self.cache.is_fresh(entry):
+            return entry.body, False
+
+        # solo le richieste vere consumano il rate‑limit
+        resp = self.request(url, HttpCache.conditional_headers(entry))
+        if resp.status_code == 304 and entry is not None:
+            self.cache.touch(entry)
+            return entry.body, False
+        if self.cache is not None:
+            self.cache.store(url, resp.text, resp.headers)
+        return resp.text, entry is None or entry.body != resp.text
+
+
+def parse_tables(html: str, table_ids: list[str]) -> dict[str, pd.DataFrame]:
+    """Estrae più tabelle (anche commentate) da una pagina già scaricata.
+
+    Prima via frammento mirato (fbref_tables.py); solo per gli id non trovati
+    si ripiega sul parsing della pagina intera.
+    """
+    import pandas as pd
+
+    from fbref_tables import read_tables
 
-    # 2) Estrai tabella
     try:
-        tables = pd.read_html(StringIO(html), attrs={"id": TABLE_ID})
-        if not tables:
-            raise ValueError("Tabella non trovata.")
-        df = tables[0]
+        tables = read_tables(html, table_ids)
+        missing = [t for t in table_ids if t not in tables]
+        if missing:
+            html = html.replace("<!--", "").replace("-->", "")
+            for table_id in missing:
+                found = pd.read_html(StringIO(html), attrs={"id": table_id})
+                if not found:
+                    raise ValueError("Tabella non trovata.")
+                tables[table_id] = found[0]
     except Exception as err:
-        die("Impossibile parse‑are la tabella richiesta.", err)
+        raise ScrapeError("Impossibile parse‑are la tabella richiesta.") from err
+    return tables
+
+
+def parse_table(html: str, table_id: str) -> pd.DataFrame:
+    """Estrae la tabella `table_id` (anche se commentata nell'HTML)."""
+    return parse_tables(html, [table_id])[table_id]
+
+
+def transform(df: pd.DataFrame, columns: dict[str, str] = COL_MAP) -> pd.DataFrame:
+    """Header, colonne, ruoli e numerici → DataFrame con le colonne di `columns`.
 
-    # 3) Header → ultimo livello
+    Con il default (COL_MAP) il risultato ha le colonne OUT_COLS.
+    """
+    import pandas as pd
+
+    # Header → ultimo livello
     if isinstance(df.columns, pd.MultiIndex):
         df.columns = df.columns.get_level_values(-1)
 
-    # 4) Rimuovi duplicati
+    # Rimuovi duplicati
     df = df.loc[:, ~df.columns.duplicated()]
 
-    # 5) Mapping colonne
-    col_map: Final[dict[str, str]] = {
-        "Player": "player",
-        "Squad": "squad",
-        "Pos": "pos",
-        "MP": "partite",
-        "Min": "minuti",
-        "Gls": "goal",
-        "Ast": "assist",
-        "PKatt": "rigori",
-        "CrdY": "gialli",
-        "CrdR": "rossi",
-    }
-    missing = [c for c in col_map if c not in df.columns]
+    missing = [c for c in columns if c not in df.columns]
     if missing:
-        die(
+        raise ScrapeError(
             "Colonne mancanti: "
             + ", ".join(missing)
             + "\nHeader disponibile: "
             + ", ".join(df.columns)
         )
 
-    df = df[list(col_map)].rename(columns=col_map)
-
-    # 6) Traduci ruoli
-    df["pos"] = df["pos"].apply(translate_pos)
-
-    # 7) Converte numerici
-    for col in ["partite", "minuti", "goal", "assist", "rigori", "gialli", "rossi"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-
-    # 8) Esporta CSV
-    out_cols = [
-        "player",
-        "squad",
-        "pos",
-        "partite",
-        "minuti",
-        "goal",
-        "assist",
-        "rigori",
-        "gialli",
-        "rossi",
-    ]
+    df = df[list(columns)].rename(columns=columns)
+
+    # FBref ripete l'intestazione ogni 25 righe dentro il tbody
+    first, first_out = next(iter(columns.items()))
+    df = df[df[first_out] != first]
+
+    # Traduci ruoli
+    if "pos" in df.columns:
+        df["pos"] = df["pos"].apply(translate_pos)
+    return apply_schema(df)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Tipi compatti: conteggi come interi piccoli, squadra/ruolo categorici.
+
+    I valori non numerici valgono 0 come prima; `downcast="unsigned"` sceglie
+    il tipo più piccolo che li contiene (uint8 per le partite, uint16 per i
+    minuti, …).
+    """
+    import pandas as pd
+
+    df = df.copy()
+    for col in df.columns:
+        if col in TEXT_COLS:
+            df[col] = df[col].astype("string")
+            continue
+        if col in CATEGORY_COLS:
+            df[col] = df[col].astype("string").astype("category")
+            continue
+        counts = pd.to_numeric(df[col], errors="coerce").fillna(0).round().astype("int64")
+        df[col] = pd.to_numeric(counts, downcast="unsigned")
+    return df.reset_index(drop=True)
+
+
+def output_paths(output_csv: str, formats: list[str]) -> list[str]:
+    """Un file per formato, stesso nome base di `output_csv`."""
+    base = os.path.splitext(output_csv)[0]
+    return [base + OUTPUT_FORMATS[fmt] for fmt in formats]
+
+
+def write_csv(df: pd.DataFrame, path: str) -> None:
     try:
-        df[out_cols].to_csv(OUTPUT_CSV, index=False)
-        print(f"✓ CSV creato: {OUTPUT_CSV}")
+        df.to_csv(path, index=False)
     except Exception as err:
-        die("Errore di scrittura del CSV.", err)
+        raise ScrapeError("Errore di scrittura del CSV.") from err
+
+
+def write_outputs(df: pd.DataFrame, output_csv: str, formats: list[str]) -> list[str]:
+    """Scrive il DataFrame in tutti i formati richiesti."""
+    paths = output_paths(output_csv, formats)
+    for fmt, path in zip(formats, paths):
+        if fmt == "csv":
+            write_csv(df, path)
+            continue
+        try:
+            if fmt == "parquet":
+                df.to_parquet(path, index=False)
+            else:
+                df.to_feather(path)
+        except ImportError as err:
+            raise ScrapeError(f"Il formato {fmt} richiede pyarrow.") from err
+        except Exception as err:
+            raise ScrapeError(f"Errore di scrittura del file {fmt}.") from err
+    return paths
+
+
+def scrape(
+    source: PageSource,
+    url: str,
+    outputs: dict[str, str],
+    formats: list[str] | None = None,
+) -> bool:
+    """Scarica, estrae e scrive; False se la pagina non è cambiata (file già ok).
+
+    `outputs`: tabella (chiave di TABLES) → CSV; tutte le tabelle vengono
+    estratte dalla stessa pagina in un solo passaggio.
+    """
+    formats = formats or ["csv"]
+    html, changed = source.get(url)
+    if not changed and all(
+        os.path.exists(p) for output in outputs.values() for p in output_paths(output, formats)
+    ):
+        return False
+    started = time.perf_counter()
+    frames = parse_tables(html, [TABLES[table][1] for table in outputs])
+    dfs = {table: transform(frames[TABLES[table][1]], TABLE_COLUMNS[table]) for table in outputs}
+    source.stats.add(parsed=1, parse_seconds=time.perf_counter() - started)
+    for table, output in outputs.items():
+        write_outputs(dfs[table], output, formats)
+    return True
+
+
+def report(created: bool, outputs: list[str], formats: list[str]) -> str:
+    files = ", ".join(p for output in outputs for p in output_paths(output, formats))
+    if not created:
+        return f"= Invariato: {files}"
+    single = formats == ["csv"] and len(outputs) == 1
+    return f"✓ CSV creato: {files}" if single else f"✓ File creati: {files}"
+
+
+def run_job(job: Job, source: PageSource, formats: list[str], queue: JobQueue | None = None) -> str:
+    """Esegue un job completo; il token viene preso solo per la richiesta HTTP.
+
+    Con la coda, lo stato del job viene salvato appena finisce (anche se
+    fallisce): un'interruzione successiva non lo perde.
+    """
+    if queue is not None:
+        queue.start(job.key)
+    try:
+        created = scrape(source, job.url, job.outputs, formats)
+    except ScrapeError as err:
+        if queue is not None:
+            cause = f" ({err.__cause__})" if err.__cause__ else ""
+            queue.mark_failed(job.key, f"{err}{cause}")
+        raise
+    outputs = list(job.outputs.values())
+    if queue is not None:
+        queue.mark_done(job.key, [p for output in outputs for p in output_paths(output, formats)])
+    return report(created, outputs, formats)
+
+
+def run_jobs(
+    jobs: list[Job],
+    workers: int = 2,
+    cache: HttpCache | None = None,
+    offline: bool = False,
+    formats: list[str] | None = None,
+    queue: JobQueue | None = None,
+    backoff: Backoff | None = None,
+    base_url: str | None = None,
+    rate_limit: float = RATE_LIMIT,
+    stats: RunStats | None = None,
+) -> int:
+    """Esegue i job con scheduler e Session condivisi; ritorna i job falliti.
+
+    Con più worker il parsing di una pagina si sovrappone all'attesa del
+    token per la richiesta successiva.  Con `queue` i job già completati (e
+    con i file ancora presenti) vengono saltati; `stats` raccoglie i
+    contatori del run.
+    """
+    formats = formats or ["csv"]
+    total = len(jobs)
+    if queue is not None:
+        queue.add(job.key for job in jobs)
+        jobs = [job for job in jobs if not queue.is_done(job.key)]
+        if total - len(jobs):
+            print(f"‑ Ripresa: {total - len(jobs)}/{total} job già completati ({queue.path})")
+
+    bucket = TokenBucket(rate=1 / rate_limit)
+    stats = stats if stats is not None else RunStats()
+    started = time.monotonic()
+    failed = 0
+    with make_session(pool_size=workers) as session:
+        source = PageSource(session, bucket, cache, offline, backoff, base_url, stats)
+        pool = ThreadPoolExecutor(workers)
+        try:
+            futures = {pool.submit(run_job, job, source, formats, queue): job for job in jobs}
+            for fut, job in futures.items():
+                try:
+                    print(fut.result())
+                except ScrapeError as err:
+                    failed += 1
+                    cause = f" ({err.__cause__})" if err.__cause__ else ""
+                    print(f"ERRORE [{job.competition} {job.season} {','.join(job.tables)}]: {err}{cause}",
+                          file=sys.stderr)
+        except KeyboardInterrupt:
+            # i job in corso restano pending: il prossimo run li riprende
+            source.stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+            print("\n‑ Interrotto: rilancia lo stesso comando per riprendere.", file=sys.stderr)
+            raise
+        pool.shutdown()
+    stats.idle_seconds = bucket.idle
+    stats.elapsed = time.monotonic() - started
+    print(f"‑ {total - failed}/{total} job completati "
+          f"(attesa rate‑limit {bucket.idle:.1f}s, tentativi ripetuti {stats.retries})")
+    return failed
+
+
+# ---------------------------------------------------------------------------#
+def main(
+    cache: HttpCache | None = None,
+    offline: bool = False,
+    formats: list[str] | None = None,
+    backoff: Backoff | None = None,
+    base_url: str | None = None,
+    rate_limit: float = RATE_LIMIT,
+) -> None:
+    print("‑ Scarico tabella…")
+    formats = formats or ["csv"]
+
+    try:
+        with make_session(pool_size=1) as session:
+            source = PageSource(session, TokenBucket(rate=1 / rate_limit), cache, offline,
+                                backoff, base_url)
+            # 1) HTTP GET (o cache)  2) tabella  3‑7) trasformazione e tipi  8) file
+            created = scrape(source, FBREF_URL, {"stats": OUTPUT_CSV}, formats)
+    except ScrapeError as err:
+        die(str(err), err.__cause__)
+    print(report(created, [OUTPUT_CSV], formats))
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scarica tabelle giocatori da FBref.")
+    parser.add_argument("--job", action="append", default=[], metavar="COMP:STAGIONE[:TABELLA,…]",
+                        help="job singolo, ripetibile (es. serie_a:2023-2024:stats,squads)")
+    parser.add_argument("--competitions", nargs="+", default=[], choices=sorted(COMPETITIONS))
+    parser.add_argument("--seasons", nargs="+", default=[], metavar="AAAA-AAAA")
+    parser.add_argument("--tables", nargs="+", default=["stats"], choices=sorted(TABLES))
+    parser.add_argument("--workers", type=int, default=2,
+                        help="thread per il parsing (le richieste restano a RATE_LIMIT)")
+    parser.add_argument("--cache-dir", default=DEFAULT_DIR, help="cartella della cache HTTP")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL, metavar="SECONDI",
+                        help="entro questa età la pagina in cache è usata senza richieste")
+    parser.add_argument("--no-cache", action="store_true", help="scarica sempre tutto")
+    parser.add_argument("--offline", action="store_true",
+                        help="solo cache, nessuna richiesta; rifà sempre il parsing")
+    parser.add_argument("--format", dest="formats", nargs="+", default=["csv"],
+                        choices=list(OUTPUT_FORMATS),
+                        help="formati di output (parquet/feather richiedono pyarrow)")
+    parser.add_argument("--state", default=STATE_PATH, metavar="PATH",
+                        help="file con lo stato dei job, per riprendere i backfill interrotti")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignora lo stato salvato e rifà tutti i job")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES,
+                        help="tentativi extra per timeout/429/5xx (default: %(default)s)")
+    parser.add_argument("--backoff", type=float, default=BACKOFF_BASE, metavar="SECONDI",
+                        help="prima attesa del backoff esponenziale (default: %(default)s)")
+    parser.add_argument("--base-url", metavar="URL",
+                        help=f"host al posto di {FBREF_BASE} (es. fbref_standin.py in locale)")
+    parser.add_argument("--rate-limit", type=float, default=RATE_LIMIT, metavar="SECONDI",
+                        help="secondi tra due richieste (default: %(default)s, da non ridurre su FBref)")
+    return parser.parse_args(argv)
+
+
+def build_jobs(args: argparse.Namespace) -> list[Job]:
+    """--job espliciti + prodotto cartesiano competizioni × stagioni × pagine.
+
+    Le `--tables` della stessa pagina finiscono nello stesso job.
+    """
+    if bool(args.competitions) != bool(args.seasons):
+        raise ValueError("--competitions e --seasons vanno indicati insieme.")
+    jobs = [Job.parse(spec) for spec in args.job]
+    pages: dict[str, list[str]] = {}
+    for table in dict.fromkeys(args.tables):
+        pages.setdefault(TABLES[table][0], []).append(table)
+    for comp in args.competitions:
+        for season in args.seasons:
+            for tables in pages.values():
+                job = Job(comp, season, tuple(tables))
+                job.validate()
+                jobs.append(job)
+    return list(dict.fromkeys(jobs))  # senza duplicati, ordine invariato
+
+
+def cli(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    try:
+        jobs = build_jobs(args)
+    except ValueError as err:
+        die(str(err))
+    if args.offline and args.no_cache:
+        die("--offline e --no-cache sono incompatibili.")
+    cache = None if args.no_cache else HttpCache(args.cache_dir, args.cache_ttl)
+    formats = list(dict.fromkeys(args.formats))
+    backoff = Backoff(retries=max(0, args.retries), base=args.backoff)
+    if args.rate_limit <= 0:
+        die("--rate-limit deve essere positivo.")
+    if not jobs:
+        main(cache, args.offline, formats, backoff, args.base_url, args.rate_limit)
+        return
+    try:
+        queue = JobQueue(args.state)
+    except ValueError as err:
+        die(str(err), err.__cause__)
+    if args.restart:
+        queue.reset()
+    try:
+        failed = run_jobs(jobs, workers=max(1, args.workers), cache=cache,
+                          offline=args.offline, formats=formats, queue=queue, backoff=backoff,
+                          base_url=args.base_url, rate_limit=args.rate_limit)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    sys.exit(1 if failed else 0)
 
 
 if __name__ == "__main__":
-    main()
+    cli()
@@ -0,0 +1,68 @@
+"""
+Unione listone ⇆ statistiche per il Fantacalcio
+===============================================
+
+Libreria di matching giocatore ⇆ statistiche e script di arricchimento del
+listone. L'import non legge file e non carica pandas: gli script partono
+solo dal loro ``main(argv)`` o dalla riga di comando::
+
+    python -m unioneCsvPython --help
+
+Uso come libreria::
+
+    from unioneCsvPython import PlayerIndex
+
+    index = PlayerIndex.from_csv("voti_2024_25.csv", ["Pv", "Mv", "Fm", "Au"])
+    record = index.lookup("Lautaro Martinez", "Inter")
+"""
+
+from .external import SortMergeJoin
+from .incremental import RunState
+from .ingest import open_csv, read_columns
+from .match_cache import MatchCache
+from .matching import (
+    PlayerIndex,
+    Record,
+    file_fingerprint,
+    is_zero,
+    iter_stats_rows,
+    normalize,
+    normalize_name,
+)
+from .pipeline import (
+    enrich_rows,
+    match_rows,
+    normalize_rows,
+    number_rows,
+    open_listone,
+    output_path,
+    read_listone,
+    write_rows,
+)
+from .store import PlayerStore
+from .teams import TeamAliases
+
+__all__ = [
+    "MatchCache",
+    "PlayerIndex",
+    "PlayerStore",
+    "Record",
+    "RunState",
+    "SortMergeJoin",
+    "TeamAliases",
+    "enrich_rows",
+    "file_fingerprint",
+    "is_zero",
+    "iter_stats_rows",
+    "match_rows",
+    "normalize",
+    "normalize_name",
+    "normalize_rows",
+    "number_rows",
+    "open_csv",
+    "open_listone",
+    "output_path",
+    "read_columns",
+    "read_listone",
+    "write_rows",
+]
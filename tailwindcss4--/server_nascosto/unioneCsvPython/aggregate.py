@@ -0,0 +1,326 @@
+"""
+Aggregazione dei voti di giornata in medie stagionali
+=====================================================
+
+I voti arrivano un file per giornata; gli script di arricchimento vogliono
+invece un unico CSV stagionale con **Pv / Mv / Fm / Au** per
+``(giocatore, squadra)``, lo schema letto da `matching.iter_stats_rows`.
+
+Qui ogni file di giornata viene letto in streaming e aggiorna somme e
+conteggi per ``(giocatore, squadra)``. La chiave è normalizzata come negli
+script che leggeranno il file (`matching.normalize`, squadra ricondotta al
+nome canonico di `teams.TeamAliases`): "Nicolò Barella" / "Nicolo Barella",
+"Inter" / "Internazionale" sono lo stesso giocatore. In output resta la
+prima grafia vista.
+
+- **Pv**  partite a voto (righe con un voto valido, "s.v." escluso)
+- **Mv**  media voto            = somma voti / Pv
+- **Fm**  fantamedia            = somma fantavoti / Pv
+- **Au**  autogol (totale)
+
+Lo stato (totali + contributo di ogni giornata) si può salvare in JSON: una
+nuova giornata si applica come aggiornamento incrementale, senza rileggere la
+stagione; una giornata già applicata con lo stesso contenuto viene saltata,
+una giornata corretta sostituisce il suo contributo precedente. La giornata
+viene dal nome del file (``giornata_07``, ``g38``) o da ``--giornata``; due
+file con la stessa giornata nello stesso run sono un errore.
+
+    python -m unioneCsvPython aggrega giornate/*.csv --output voti_2024_25.csv
+    python -m unioneCsvPython aggrega giornate/g38.csv --state data/voti_state.json \\
+        --output voti_2024_25.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .ingest import read_columns
+from .matching import file_fingerprint, normalize
+from .teams import TeamAliases
+
+# colonne riconosciute nei file di giornata (intestazioni in lowercase)
+NAME_COLUMNS = ("player", "nome", "giocatore")
+TEAM_COLUMNS = ("team", "squadra", "squad")
+VOTE_COLUMNS = ("voto", "v", "vt")
+FANTA_COLUMNS = ("fantavoto", "fv", "fanta voto")
+OWN_GOAL_COLUMNS = ("au", "autogol", "autogoal", "autoreti")
+
+# valori che indicano "senza voto"
+NO_VOTE = {"", "-", "sv", "s.v.", "s.v", "nv", "n.v."}
+
+STATE_VERSION = 2  # 1: chiavi con le grafie grezze (convertito da `load`)
+OUTPUT_FIELDS = ["player", "squad", "Pv", "Mv", "Fm", "Au"]
+
+Key = Tuple[str, str]  # (giocatore normalizzato, squadra canonica)
+# contributo/totale: [presenze, partite a voto, somma voti, somma fantavoti, autogol]
+Totals = List[float]
+
+
+def parse_number(text: Optional[str]) -> Optional[float]:
+    """``"6,5"`` → 6.5; vuoto / "s.v." / non numerico → None."""
+    value = (text or "").strip().lower()
+    if value in NO_VOTE:
+        return None
+    try:
+        return float(value.replace(",", "."))
+    except ValueError:
+        return None
+
+
+def _first(values: Tuple[str, ...]) -> str:
+    """Primo valore non vuoto (senza spazi) tra colonne alternative."""
+    for value in values:
+        value = value.strip()
+        if value:
+            return value
+    return ""
+
+
+def _column_groups(*groups: Tuple[str, ...]) -> Tuple[Tuple[str, ...], List[slice]]:
+    """Colonne da leggere (tutti i gruppi di alternative) e la fetta di ogni gruppo."""
+    slices, start = [], 0
+    for group in groups:
+        slices.append(slice(start, start + len(group)))
+        start += len(group)
+    return tuple(c for group in groups for c in group), slices
+
+
+def player_key(player: str, team: str, aliases: TeamAliases) -> Key:
+    """Chiave di aggregazione: nome normalizzato, squadra canonica ("" se manca)."""
+    team_norm = normalize(team)
+    return normalize(player), aliases.canonical(team_norm) if team_norm else ""
+
+
+def read_matchday(
+    path: str,
+    delimiter: Optional[str] = None,
+    aliases: Optional[TeamAliases] = None,
+) -> Iterator[Tuple[Key, Key, Totals]]:
+    """Righe di un file di giornata come ``(chiave, (giocatore, squadra) grezzi, contributo)``.
+
+    Senza `delimiter` separatore ed encoding vengono rilevati dal file (vedi
+    ingest.py); vengono lette solo le colonne riconosciute.
+    """
+    aliases = aliases if aliases is not None else TeamAliases(normalize)
+    columns, (name, team, vote, fanta, own_goal) = _column_groups(
+        NAME_COLUMNS, TEAM_COLUMNS, VOTE_COLUMNS, FANTA_COLUMNS, OWN_GOAL_COLUMNS
+    )
+    for values in read_columns(path, columns, delimiter=delimiter):
+        player = _first(values[name])
+        if not player:
+            continue
+        vote_value = parse_number(_first(values[vote]))
+        fanta_value = parse_number(_first(values[fanta]))
+        own_goals = parse_number(_first(values[own_goal])) or 0.0
+        raw = (player, _first(values[team]))
+        key = player_key(*raw, aliases)
+        if vote_value is None:
+            yield key, raw, [1, 0, 0.0, 0.0, own_goals]
+        else:
+            yield key, raw, [1, 1, vote_value, vote_value if fanta_value is None else fanta_value, own_goals]
+
+
+# numero di giornata nel nome del file: dopo "giornata"/"g" (giornata_07, g38, 2024_25_giornata_3)
+_MATCHDAY_RE = re.compile(r"(?:^|[^a-z])(?:giornata|g)[\s_\-.]*(\d+)", re.IGNORECASE)
+
+
+def matchday_id(path: str) -> str:
+    """Giornata dal nome del file, altrimenti il nome.
+
+    ``giornata_07.csv`` → ``"7"``, ``giornata_1_2024_25.csv`` → ``"1"``; senza
+    ``giornata``/``g`` vale il primo gruppo di cifre (``07_voti.csv`` → ``"7"``).
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    m = _MATCHDAY_RE.search(stem) or re.search(r"(\d+)", stem)
+    return str(int(m.group(1))) if m else stem
+
+
+def _add(target: Dict[Key, Totals], key: Key, values: Totals, sign: int = 1) -> None:
+    totals = target.get(key)
+    if totals is None:
+        totals = target[key] = [0, 0, 0.0, 0.0, 0.0]
+    for i, v in enumerate(values):
+        totals[i] += sign * v
+    if totals[0] <= 0:
+        del target[key]  # nessuna presenza rimasta (giornata corretta)
+
+
+class SeasonAggregate:
+    """Somme e conteggi per ``(giocatore, squadra)`` su tutte le giornate applicate."""
+
+    def __init__(self, team_aliases: Optional[TeamAliases] = None) -> None:
+        self.aliases = team_aliases if team_aliases is not None else TeamAliases(normalize)
+        self.totals: Dict[Key, Totals] = {}
+        self.names: Dict[Key, Key] = {}  # chiave → prima grafia (giocatore, squadra) vista
+        # giornata → (impronta del file, contributo per giocatore)
+        self.matchdays: Dict[str, Tuple[str, Dict[Key, Totals]]] = {}
+
+    def apply(self, path: str, delimiter: Optional[str] = None, day: Optional[str] = None) -> bool:
+        """Applica una giornata; False se era già applicata con lo stesso contenuto."""
+        day = day or matchday_id(path)
+        fingerprint = file_fingerprint(path, delimiter)
+        previous = self.matchdays.get(day)
+        if previous is not None:
+            if previous[0] == fingerprint:
+                return False
+            # giornata corretta: togli il vecchio contributo
+            for key, values in previous[1].items():
+                _add(self.totals, key, values, -1)
+
+        contribution: Dict[Key, Totals] = {}
+        for key, raw, values in read_matchday(path, delimiter, self.aliases):
+            _add(contribution, key, values)
+            self.names.setdefault(key, raw)
+        for key, values in contribution.items():
+            _add(self.totals, key, values)
+        self.matchdays[day] = (fingerprint, contribution)
+        return True
+
+    # -------------------------------------------------------------- output
+    def rows(self) -> Iterator[List[str]]:
+        """Righe stagionali nello schema di `iter_stats_rows` (vedi OUTPUT_FIELDS).
+
+        Ordinate per (squadra, giocatore) normalizzati: lo stesso stato dà
+        sempre lo stesso file, in qualunque ordine siano state applicate le
+        giornate. Nome e squadra sono la prima grafia vista.
+        """
+        for key, (_, pv, votes, fanta, own_goals) in sorted(
+            self.totals.items(), key=lambda item: (item[0][1], item[0][0])
+        ):
+            player, team = self.names.get(key, key)
+            pv = int(round(pv))
+            mv = votes / pv if pv else 0.0
+            fm = fanta / pv if pv else 0.0
+            yield [player, team, str(pv), f"{mv:.2f}", f"{fm:.2f}", str(int(round(own_goals)))]
+
+    def write(self, path: str, delimiter: str = ";") -> int:
+        """Scrive il CSV stagionale in un colpo solo; ritorna le righe scritte."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        count = 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter=delimiter)
+            writer.writerow(OUTPUT_FIELDS)
+            for row in self.rows():
+                writer.writerow(row)
+                count += 1
+        return count
+
+    # --------------------------------------------------------------- stato
+    def save(self, path: str) -> None:
+        """Stato in JSON (scrittura atomica)."""
+        state = {
+            "version": STATE_VERSION,
+            "totals": [[p, t, *v] for (p, t), v in self.totals.items()],
+            "names": [[*key, *self.names[key]] for key in self.totals if key in self.names],
+            "matchdays": {
+                day: {"fingerprint": fp, "rows": [[p, t, *v] for (p, t), v in contrib.items()]}
+                for day, (fp, contrib) in self.matchdays.items()
+            },
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, team_aliases: Optional[TeamAliases] = None) -> "SeasonAggregate":
+        """Stato salvato con `save`; file assente → aggregato vuoto.
+
+        Uno stato della versione 1 (chiavi grezze) viene convertito: le grafie
+        diverse dello stesso giocatore si sommano, la prima resta in output.
+        """
+        agg = cls(team_aliases)
+        if not os.path.exists(path):
+            return agg
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        version = state.get("version")
+        if version == 1:
+            def rows(items: List[list]) -> Dict[Key, Totals]:
+                merged: Dict[Key, Totals] = {}
+                for p, t, *v in items:
+                    key = player_key(p, t, agg.aliases)
+                    agg.names.setdefault(key, (p, t))
+                    _add(merged, key, v)
+                return merged
+        elif version == STATE_VERSION:
+            def rows(items: List[list]) -> Dict[Key, Totals]:
+                return {(p, t): list(v) for p, t, *v in items}
+            agg.names = {(p, t): (player, team) for p, t, player, team in state.get("names", [])}
+        else:
+            raise ValueError(f"Versione dello stato non supportata: {version}")
+        agg.totals = rows(state["totals"])
+        agg.matchdays = {
+            day: (entry["fingerprint"], rows(entry["rows"]))
+            for day, entry in state["matchdays"].items()
+        }
+        return agg
+
+
+def aggregate(
+    paths: List[str],
+    delimiter: Optional[str] = None,
+    state: Optional[str] = None,
+    days: Optional[List[str]] = None,
+    team_aliases: Optional[TeamAliases] = None,
+) -> Tuple[SeasonAggregate, int]:
+    """Applica le giornate (allo stato salvato, se indicato) → ``(aggregato, giornate nuove)``.
+
+    `days` sono le giornate dei file, nello stesso ordine (default: dal nome,
+    vedi `matchday_id`). Due file con la stessa giornata sono un errore: il
+    secondo non deve passare per la correzione del primo.
+    """
+    if days is None:
+        days = [matchday_id(path) for path in paths]
+    elif len(days) != len(paths):
+        raise ValueError(f"{len(days)} giornate indicate per {len(paths)} file")
+    seen: Dict[str, str] = {}
+    for path, day in zip(paths, days):
+        if day in seen:
+            raise ValueError(f"{seen[day]} e {path} sono entrambi la giornata {day} (usa --giornata)")
+        seen[day] = path
+
+    agg = SeasonAggregate.load(state, team_aliases) if state else SeasonAggregate(team_aliases)
+    applied = sum(agg.apply(path, delimiter, day) for path, day in zip(paths, days))
+    if state:
+        agg.save(state)
+    return agg, applied
+
+
+def main(argv: Optional[List[str]] = None) -> str:
+    parser = argparse.ArgumentParser(
+        prog="unioneCsvPython aggrega",
+        description="Aggrega i voti di giornata in Pv/Mv/Fm/Au stagionali.",
+    )
+    parser.add_argument("matchdays", nargs="*", help="file CSV di giornata")
+    parser.add_argument("--output", default="voti_2024_25.csv",
+                        help="CSV stagionale da scrivere (default: %(default)s)")
+    parser.add_argument("--state", help="stato JSON da aggiornare in modo incrementale")
+    parser.add_argument("--giornata", dest="days", action="append", metavar="N",
+                        help="giornata del file corrispondente (ripetibile, una per file; "
+                             "default: dal nome del file)")
+    parser.add_argument("--delimiter", help="separatore dei file di giornata (default: rilevato dal file)")
+    parser.add_argument("--team-aliases", metavar="PATH",
+                        help="CSV alias;squadra con grafie di squadra aggiuntive (vedi teams.py)")
+    parser.add_argument("--output-delimiter", default=";", help="separatore del CSV stagionale (default: %(default)r)")
+    args = parser.parse_args(argv)
+    if not args.matchdays and not args.state:
+        parser.error("servono dei file di giornata o uno --state da cui ripartire")
+
+    aliases = TeamAliases.load(args.team_aliases, normalize) if args.team_aliases else None
+    try:
+        agg, applied = aggregate(args.matchdays, args.delimiter, args.state, args.days, aliases)
+    except ValueError as err:
+        parser.error(str(err))
+    count = agg.write(args.output, args.output_delimiter)
+    print(f"✅ {applied} giornate applicate ({len(agg.matchdays)} in totale), "
+          f"{count} giocatori → {args.output}")
+    return args.output
+
+
+if __name__ == "__main__":
+    main()
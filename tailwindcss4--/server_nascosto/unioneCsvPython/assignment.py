@@ -0,0 +1,304 @@
+"""
+Assegnazione uno-a-uno degli omonimi per squadra
+================================================
+
+Il matcher riga per riga (`PlayerIndex.find_id`) risolve ogni riga del
+listone da sola: con due "Rossi" nella stessa squadra entrambe le righe
+possono prendere lo stesso record statistiche (il primo con quel cognome).
+
+Qui le righe vengono risolte **per squadra, tutte insieme**:
+
+1. per ogni squadra si costruisce con NumPy la matrice dei punteggi
+   righe del listone × record statistiche della squadra (nome completo,
+   cognome, nome proprio o abbreviazione, iniziale, ruolo ``R`` ⇆ ``pos``);
+2. un'assegnazione uno-a-uno (algoritmo ungherese) sceglie gli abbinamenti
+   con punteggio totale massimo: ogni record va al più a una riga;
+3. le righe rimaste senza record (squadra assente, serve il fuzzy, …)
+   passano dal matcher normale; se questo restituisce un record già
+   preso la riga resta senza statistiche (metodo ``assign:taken``) e viene
+   segnalata a fine run con il record conteso.
+
+L'algoritmo ungherese gira solo sulle componenti contese (più righe e più
+record collegati, di solito un cognome): il resto è un ``argmax``.
+
+Una coppia è ammessa solo se il cognome coincide (anche con nome e cognome
+invertiti, o nella forma del listone "Rossi M." con il nome abbreviato) o
+coincide il nome completo. Gli abbinamenti assegnati non entrano nella cache
+delle risoluzioni: dipendono dalle altre righe.
+
+    index = PlayerIndex.from_csv(path, fields, with_roles=True)
+    matched = assign_rows(pairs, index, report, roles=record_roles(index))
+"""
+
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .matching import PlayerIndex, Record, all_ids
+from .pipeline import Query
+
+FBREF_ROLES = {"GK": "P", "DF": "D", "MF": "C", "FW": "A"}
+ROLE_BITS = {"P": 1, "D": 2, "C": 4, "A": 8}
+
+# pesi del punteggio
+W_FULL = 10.0      # nome completo identico
+W_LAST = 6.0       # stesso cognome
+W_REVERSED = 5.0   # nome e cognome invertiti
+W_REV_PREFIX = 4.0 # cognome + nome abbreviato ("Rossi M." / "Marco Rossi")
+W_FIRST = 3.0      # stesso nome proprio
+W_PREFIX = 2.0     # nome abbreviato ("fede" / "federico", "m" / "marco")
+W_INITIAL = 1.0    # stessa iniziale
+P_INITIAL = -3.0   # iniziali diverse (entrambe note)
+W_ROLE = 1.0       # ruoli compatibili
+P_ROLE = -2.0      # ruoli incompatibili (entrambi noti)
+FORBIDDEN = 1e9    # costo di una coppia non ammessa
+TIE_BREAK = 0.5    # somma massima dei bonus di spareggio (< 1, il passo minimo dei pesi)
+TAKEN_SHOWN = 20   # righe ``assign:taken`` elencate a fine run (il totale è nel report)
+
+
+@lru_cache(maxsize=1024)
+def role_mask(text: Optional[str]) -> int:
+    """``"P/DC"``, ``"DF,MF"``, ``"A"`` → bitmask dei ruoli classici (0 = ignoto).
+
+    I valori distinti sono pochi: memoizzata.
+    """
+    mask = 0
+    for part in (text or "").replace(",", "/").replace(" ", "/").split("/"):
+        part = part.strip().upper()
+        role = FBREF_ROLES.get(part, part[:1])
+        mask |= ROLE_BITS.get(role, 0)
+    return mask
+
+
+def record_roles(index: PlayerIndex) -> List[int]:
+    """Ruoli (bitmask) dei record di `index`, letti con ``from_csv(..., with_roles=True)``."""
+    return [role_mask(role) for role in index.roles]
+
+# =============================================================
+# ASSEGNAZIONE
+# =============================================================
+
+
+def linear_assignment(cost: np.ndarray) -> List[Tuple[int, int]]:
+    """Assegnazione di costo minimo (algoritmo ungherese) → coppie ``(riga, colonna)``.
+
+    Matrice rettangolare qualsiasi: vengono assegnate ``min(righe, colonne)``
+    coppie. Il ciclo interno è vettoriale sulle colonne: O(n² m).
+    """
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # colonna → riga (1-based, 0 = libera)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:  # aggiorna il cammino aumentante
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    pairs = [(int(owner[j]) - 1, j - 1) for j in range(1, m + 1) if owner[j]]
+    return [(c, r) for r, c in pairs] if transposed else pairs
+
+
+def score_matrix(
+    queries: Sequence[Tuple[str, ...]],
+    row_roles: Sequence[int],
+    index: PlayerIndex,
+    rec_ids: Sequence[int],
+    roles: Optional[Sequence[int]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Punteggi righe × record e maschera delle coppie ammesse."""
+    q_first = np.array([t[0] for t in queries], dtype=str)
+    q_last = np.array([t[-1] for t in queries], dtype=str)
+    q_full = np.array([" ".join(t) for t in queries], dtype=str)
+    q_multi = np.array([len(t) > 1 for t in queries])
+    r_first = np.array([index.firsts[i] for i in rec_ids], dtype=str)
+    r_last = np.array([index.lasts[i] for i in rec_ids], dtype=str)
+    r_full = np.array([index.fulls[i] for i in rec_ids], dtype=str)
+    r_multi = np.char.find(r_full, " ") >= 0
+
+    qf, ql = q_first[:, None], q_last[:, None]
+    rf, rl = r_first[None, :], r_last[None, :]
+    last_eq = ql == rl
+    full_eq = q_full[:, None] == r_full[None, :]
+    reversed_eq = q_multi[:, None] & r_multi[None, :] & ~last_eq & (qf == rl) & (ql == rf)
+    # "Rossi M.": cognome davanti e nome abbreviato (o solo l'iniziale) in coda
+    rev_prefix = (q_multi[:, None] & r_multi[None, :] & ~last_eq & ~reversed_eq
+                  & (qf == rl) & np.char.startswith(rf, ql))
+    both = q_multi[:, None] & r_multi[None, :] & ~reversed_eq & ~rev_prefix  # nomi propri confrontabili
+    first_eq = both & (qf == rf)
+    prefix = both & ~first_eq & (np.char.startswith(rf, qf) | np.char.startswith(qf, rf))
+    initial_eq = both & (qf.astype("U1") == rf.astype("U1"))  # "U1" tiene il primo carattere
+
+    score = (
+        W_FULL * full_eq
+        + W_LAST * last_eq
+        + W_REVERSED * reversed_eq
+        + W_REV_PREFIX * rev_prefix
+        + W_FIRST * first_eq
+        + W_PREFIX * prefix
+        + np.where(both, np.where(initial_eq, W_INITIAL, P_INITIAL), 0.0)
+    )
+    if roles is not None:
+        q_role = np.array(row_roles, dtype=np.int64)[:, None]
+        r_role = np.array([roles[i] for i in rec_ids], dtype=np.int64)[None, :]
+        known = (q_role != 0) & (r_role != 0)
+        score += np.where(known, np.where(q_role & r_role, W_ROLE, P_ROLE), 0.0)
+    return score, full_eq | last_eq | reversed_eq | rev_prefix
+
+
+def tie_break(n: int, m: int) -> np.ndarray:
+    """Bonus di spareggio ``n × m``: più alto per le righe e i record che vengono prima.
+
+    Proporzionale a ``(n − riga) · (m − colonna)``: tra assegnazioni con lo
+    stesso punteggio vince quella che abbina in ordine le righe ai record
+    (disuguaglianza di riarrangiamento). La somma su un'assegnazione resta
+    sotto `TIE_BREAK`, quindi non ribalta mai una differenza di punteggio.
+    """
+    scale = TIE_BREAK / (n * m * min(n, m))
+    return np.outer(np.arange(n, 0, -1), np.arange(m, 0, -1)) * scale
+
+
+def components(allowed: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Componenti connesse righe–record del grafo delle coppie ammesse.
+
+    Le righe si contendono i record solo dentro una componente (di solito un
+    cognome): l'algoritmo ungherese serve solo dove ci sono più righe *e*
+    più record.
+    """
+    n = allowed.shape[0]
+    parent = list(range(n + allowed.shape[1]))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    rows, cols = np.nonzero(allowed)
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        a, b = find(r), find(n + c)
+        if a != b:
+            parent[a] = b
+    groups: Dict[int, Tuple[List[int], List[int]]] = defaultdict(lambda: ([], []))
+    for r in np.unique(rows).tolist():
+        groups[find(r)][0].append(r)
+    for c in np.unique(cols).tolist():
+        groups[find(n + c)][1].append(c)
+    return [(np.array(r), np.array(c)) for r, c in groups.values()]
+
+
+def assign_team(
+    queries: Sequence[Tuple[str, ...]],
+    row_roles: Sequence[int],
+    index: PlayerIndex,
+    rec_ids: Sequence[int],
+    roles: Optional[Sequence[int]] = None,
+) -> Dict[int, int]:
+    """Righe di una squadra → id del record assegnato (solo coppie ammesse).
+
+    A parità di punteggio la riga che viene prima prende il record che viene
+    prima nel file (`tie_break`), come nel matcher riga per riga.
+    """
+    score, allowed = score_matrix(queries, row_roles, index, rec_ids, roles)
+    # coppie isolate (una riga ⇆ un record): il caso comune, senza cicli
+    single = allowed & (allowed.sum(axis=1) == 1)[:, None] & (allowed.sum(axis=0) == 1)[None, :]
+    rows, cols = np.nonzero(single)
+    assigned: Dict[int, int] = {r: rec_ids[c] for r, c in zip(rows.tolist(), cols.tolist())}
+    allowed = allowed & ~single
+    for rows, cols in components(allowed):
+        sub = score[rows][:, cols] + tie_break(len(rows), len(cols))
+        ok = allowed[rows][:, cols]
+        if len(rows) == 1 or len(cols) == 1:
+            # nessuna contesa: la coppia ammessa migliore
+            best = np.unravel_index(np.argmax(np.where(ok, sub, -np.inf)), sub.shape)
+            chosen = [best]
+        else:
+            cost = np.where(ok, sub.max() - sub, FORBIDDEN)
+            chosen = [(r, c) for r, c in linear_assignment(cost) if ok[r, c]]
+        for r, c in chosen:
+            assigned[int(rows[r])] = rec_ids[int(cols[c])]
+    return assigned
+
+
+def assign_rows(
+    pairs: Iterable[Tuple[dict, Optional[Query]]],
+    index: PlayerIndex,
+    report=None,
+    roles: Optional[Sequence[int]] = None,
+) -> Iterator[Tuple[dict, Optional[Query], Optional[Record]]]:
+    """Come `pipeline.match_rows`, con gli omonimi di squadra assegnati uno a uno.
+
+    Le righe vengono raccolte tutte prima di risolverle (il listone sta in
+    memoria); l'ordine di uscita resta quello di ingresso. `roles` sono i
+    ruoli dei record (vedi `record_roles`): senza, il ruolo non conta.
+    """
+    pairs = list(pairs)
+    by_team: Dict[int, List[int]] = defaultdict(list)
+    for pos, (_, query) in enumerate(pairs):
+        if query is not None and query[0] and query[1]:
+            tid = index.team_aliases.team_id(query[0])
+            if tid in index.team_map:
+                by_team[tid].append(pos)
+
+    assigned: Dict[int, int] = {}  # posizione della riga → id record
+    for tid, positions in by_team.items():
+        nmap = index.team_map[tid]
+        rec_ids = sorted({i for ids in nmap.last.values() for i in all_ids(ids)})
+        queries = [pairs[p][1][1] for p in positions]
+        row_roles = [role_mask(pairs[p][0].get("R")) for p in positions]
+        for r, rec_id in assign_team(queries, row_roles, index, rec_ids, roles).items():
+            assigned[positions[r]] = rec_id
+    claimed = set(assigned.values())
+    taken: List[str] = []
+
+    for pos, (row, query) in enumerate(pairs):
+        if query is None:
+            record, method = None, "skipped"
+        elif pos in assigned:
+            record, method = index.record(assigned[pos]), "team:assign"
+        else:
+            # fuori dall'assegnazione: matcher normale, ma un record va a una riga sola
+            record, method = index.resolve_match(query)
+            if record is not None:
+                if record.id in claimed:
+                    taken.append(f"{' '.join(query[1])} ({query[0]}) → {record.full}")
+                    record, method = None, "assign:taken"
+                else:
+                    claimed.add(record.id)
+        if report is not None:
+            report.count("match", method or "not_found")
+        yield row, query, record
+
+    if taken:
+        # il record trovato era già di un'altra riga: meglio nessuna statistica che quelle di un omonimo
+        print(f"⚠️  {len(taken)} righe senza statistiche, record già assegnato a un'altra riga:")
+        for line in taken[:TAKEN_SHOWN]:
+            print(f"    {line}")
+        if len(taken) > TAKEN_SHOWN:
+            print(f"    … e altre {len(taken) - TAKEN_SHOWN} (assign:taken nel report)")
@@ -0,0 +1,140 @@
+"""
+Benchmark dell'arricchimento su dati sintetici
+==============================================
+
+Genera (synthetic.py) listone e voti a 1×, 10×, 100×, 1000× una stagione di
+Serie A e, per ogni scala, esegue gli script veri (`main(argv)` dei comandi
+di cli.py) su ciascun percorso:
+
+- **unione1 / unione2**  match esatto sul nome proprio (anche ``--vectorized``
+  e ``--out-of-core``);
+- **squadra / voti**     squadra + fuzzy, senza cache delle risoluzioni
+  (anche ``--out-of-core``, ``--workers 0``, ``--assign``).
+
+Tempi per fase e metodi di match vengono dal `RunReport` dello script (il
+``.report.json`` accanto all'output): i non trovati restano ``not_found``.
+Ogni percorso gira in un processo nuovo (spawn), così il picco di memoria
+(RSS) è quello dello script in streaming e di nient'altro.
+
+    python -m unioneCsvPython benchmark                     # 1 10 100, tutti i percorsi
+    python -m unioneCsvPython benchmark --scales 1 10 100 1000 --json bench.json
+    python -m unioneCsvPython benchmark --paths voti "voti assign"
+"""
+
+import argparse
+import contextlib
+import importlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from .cli import COMMANDS
+from .synthetic import VOTI_FIELDS, generate
+
+# percorso → argomenti del comando (oltre a file, colonne e cartella di output)
+PATHS: Dict[str, List[str]] = {
+    "unione1": ["unione1"],
+    "unione1 vectorized": ["unione1", "--vectorized"],
+    "unione1 out-of-core": ["unione1", "--out-of-core"],
+    "unione2": ["unione2"],
+    "unione2 vectorized": ["unione2", "--vectorized"],
+    "squadra": ["squadra", "--no-match-cache"],
+    "squadra out-of-core": ["squadra", "--out-of-core"],
+    "voti": ["voti", "--no-match-cache"],
+    "voti workers": ["voti", "--no-match-cache", "--workers", "0"],
+    "voti assign": ["voti", "--no-match-cache", "--assign"],
+}
+# opzioni che richiedono una libreria esterna: senza, il percorso viene saltato
+REQUIRES = {"--vectorized": "pandas", "--assign": "numpy"}
+
+
+def missing_library(argv: List[str]) -> Optional[str]:
+    for option, library in REQUIRES.items():
+        if option in argv and importlib.util.find_spec(library) is None:
+            return library
+    return None
+
+
+def run_path(argv: List[str]) -> Dict[str, object]:
+    """Esegue un comando di cli.py e ne legge il report; gira in un processo nuovo."""
+    command, *options = argv
+    module = importlib.import_module(f".{COMMANDS[command][0]}", __package__)
+    with contextlib.redirect_stdout(io.StringIO()):
+        output = module.main(options)
+    with open(os.path.splitext(output)[0] + ".report.json", encoding="utf-8") as f:
+        report = json.load(f)
+    return {
+        "elapsed_s": report["elapsed_s"],
+        "stages": {name: stage["seconds"] for name, stage in report["stages"].items()},
+        "methods": report["counters"].get("match", {}),
+        # su Linux ru_maxrss è in KiB
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def bench(scales: List[int], paths: List[str], workdir: str, seed: int) -> List[Dict[str, object]]:
+    results = []
+    spawn = multiprocessing.get_context("spawn")
+    for scale in scales:
+        directory = os.path.join(workdir, f"x{scale}")
+        meta = generate(directory, scale, seed)
+        print(f"\n× {scale}  (listone {meta['listone_rows']} righe, voti {meta['stats_rows']} righe)")
+        for name in paths:
+            argv = PATHS[name] + [
+                "--stats", meta["voti"], "--quote", meta["listone"],
+                "--stats-fields", ",".join(VOTI_FIELDS),
+                "--output-dir", os.path.join(directory, name.replace(" ", "_")),
+            ]
+            library = missing_library(argv)
+            if library:
+                print(f"  {name:<20} saltato ({library} non installato)")
+                continue
+            # processo nuovo: memoria misurata senza la generazione né gli altri percorsi
+            with ProcessPoolExecutor(1, mp_context=spawn) as pool:
+                result = pool.submit(run_path, argv).result()
+            result.update(scale=scale, path=name, listone_rows=meta["listone_rows"],
+                          stats_rows=meta["stats_rows"], variants=meta["variants"])
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def print_result(result: Dict[str, object]) -> None:
+    elapsed = result["elapsed_s"]
+    rate = result["listone_rows"] / elapsed if elapsed else 0.0
+    stages = ", ".join(f"{s}={sec:.3f}" for s, sec in result["stages"].items())
+    print(f"  {result['path']:<20} {elapsed:>8.3f} s {rate:>11,.0f} righe/s "
+          f"{result['peak_rss_mb']:>7.1f} MB  {stages}")
+    if result["methods"]:
+        print(f"  {'':<20} metodi: " + ", ".join(f"{m}={n}" for m, n in sorted(result["methods"].items())))
+
+
+def main(argv: Optional[List[str]] = None) -> List[Dict[str, object]]:
+    parser = argparse.ArgumentParser(
+        prog="unioneCsvPython benchmark", description="Benchmark arricchimento listone."
+    )
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100],
+                        help="multipli di una stagione di Serie A (es. 1 10 100 1000)")
+    parser.add_argument("--paths", nargs="+", choices=list(PATHS), default=list(PATHS),
+                        metavar="PATH", help="percorsi da misurare (default: tutti: %(default)s)")
+    parser.add_argument("--workdir", help="dove generare i file (default: cartella temporanea)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="salva i risultati in JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench_unione_") as tmp:
+        results = bench(args.scales, args.paths, args.workdir or tmp, args.seed)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
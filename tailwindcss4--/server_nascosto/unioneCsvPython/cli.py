@@ -0,0 +1,154 @@
+"""
+Riga di comando del pacchetto
+=============================
+
+Un solo ingresso per tutti gli script, ognuno con il suo ``main(argv)``::
+
+    python -m unioneCsvPython voti --quote data.csv --stats voti_2024_25.csv
+    python -m unioneCsvPython unione2 --stats-fields partite,minuti,goal
+    python -m unioneCsvPython benchmark --scales 1 10
+    python -m unioneCsvPython.unione1 --help     # equivalente a "unione1"
+
+I moduli dei comandi vengono importati solo quando servono: ``--help`` e i
+comandi che non usano pandas non lo caricano.
+"""
+
+import argparse
+import importlib
+import sys
+from typing import List, Optional, Sequence
+
+# comando → (modulo, descrizione)
+COMMANDS = {
+    "unione1": ("unione1", "listone + voti, match esatto sul nome proprio"),
+    "unione2": ("unione2", "listone + statistiche, aggiorna solo le colonne esistenti"),
+    "squadra": ("unione3ConSquadra", "listone + voti cercando prima nella squadra"),
+    "voti": ("unionePerVoti", "quotazioni + voti (Pv/Mv/Fm/Au) con fuzzy e cache"),
+    "multi": ("multisource", "listone + più sorgenti statistiche in un solo passaggio"),
+    "aggrega": ("aggregate", "voti di giornata → Pv/Mv/Fm/Au stagionali (incrementale)"),
+    "benchmark": ("benchmark", "benchmark su dati sintetici"),
+    "verifica": ("equivalence", "percorsi veloci ≡ implementazioni di riferimento (dati sintetici)"),
+}
+
+
+def field_list(text: str) -> List[str]:
+    """``"Pv,Mv,Fm"`` → ``["Pv", "Mv", "Fm"]``."""
+    return [f.strip() for f in text.split(",") if f.strip()]
+
+
+def enrichment_parser(
+    command: str,
+    description: str,
+    *,
+    stats: str,
+    quote: str,
+    stats_fields: Sequence[str],
+    stats_delimiter: Optional[str] = None,
+    quote_delimiter: Optional[str] = None,
+    output_dir: str = "data",
+    prefix: str = "quotazioni_enriched",
+) -> argparse.ArgumentParser:
+    """Opzioni comuni agli script di arricchimento; i default sono quelli storici.
+
+    Senza separatore esplicito viene rilevato dal file (vedi ingest.py).
+    """
+    parser = argparse.ArgumentParser(prog=f"unioneCsvPython {command}", description=description)
+    parser.add_argument("--stats", default=stats,
+                        help="CSV statistiche/voti (default: %(default)s)")
+    parser.add_argument("--quote", default=quote,
+                        help="listone/quotazioni da arricchire (default: %(default)s)")
+    parser.add_argument("--stats-fields", type=field_list, default=list(stats_fields),
+                        help="colonne statistiche separate da virgola (default: %(default)s)")
+    parser.add_argument("--stats-delimiter", default=stats_delimiter,
+                        help="separatore del CSV statistiche (default: rilevato dal file)")
+    parser.add_argument("--quote-delimiter", default=quote_delimiter,
+                        help="separatore del listone (default: rilevato dal file)")
+    parser.add_argument("--output-delimiter", default=";",
+                        help="separatore del CSV di output (default: %(default)r)")
+    parser.add_argument("--output-dir", default=output_dir,
+                        help="cartella di output (default: %(default)s)")
+    parser.add_argument("--prefix", default=prefix,
+                        help="prefisso del file di output, seguito dal timestamp (default: %(default)s)")
+    parser.add_argument("--store", metavar="PATH",
+                        help="scrive il risultato anche in un database SQLite indicizzato (vedi store.py)")
+    parser.add_argument("--season",
+                        help="stagione delle righe nel --store (default: quella in corso, es. 2024-25)")
+    return parser
+
+
+def add_vectorized(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--vectorized", action="store_true",
+                        help="join con pandas (stesso output, file molto grandi)")
+
+
+def add_out_of_core(parser: argparse.ArgumentParser) -> None:
+    """Join sort-merge su disco per file statistiche che non stanno in memoria."""
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="join con ordinamento esterno e memoria limitata, senza cache delle "
+                             "risoluzioni e --workers; SENZA fallback fuzzy: i nomi scritti "
+                             "diversamente risultano non trovati, quindi l'output può differire "
+                             "dal run in memoria (vedi external.py)")
+    parser.add_argument("--memory-mb", type=float, default=64,
+                        help="budget di memoria del join out-of-core in MB (default: %(default)s)")
+    parser.add_argument("--tmp-dir", metavar="DIR",
+                        help="cartella dei file di spill (default: temporanea di sistema)")
+
+
+def add_match_options(parser: argparse.ArgumentParser) -> None:
+    """Cache persistente delle risoluzioni, matching su più processi, alias squadre, omonimi."""
+    parser.add_argument("--match-cache", metavar="PATH",
+                        help="file SQLite della cache (default: <output-dir>/match_cache.sqlite)")
+    parser.add_argument("--no-match-cache", action="store_true",
+                        help="non usare la cache delle risoluzioni")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processi per il matching (0 = tutti i core, default: 1)")
+    parser.add_argument("--team-aliases", metavar="PATH",
+                        help="CSV alias;squadra con grafie di squadra aggiuntive (vedi teams.py)")
+    parser.add_argument("--assign", action="store_true",
+                        help="omonimi della stessa squadra assegnati uno a uno (NumPy, vedi assignment.py)")
+
+
+def add_incremental_options(parser: argparse.ArgumentParser) -> None:
+    """Riuso degli abbinamenti del run precedente (vedi incremental.py)."""
+    parser.add_argument("--incremental", choices=["snapshot", "delta"],
+                        help="riusa gli abbinamenti ancora validi e scrive lo snapshot completo "
+                             "o solo le righe cambiate")
+    parser.add_argument("--state", metavar="PATH",
+                        help="file SQLite dello stato incrementale "
+                             "(default: incremental_state.sqlite nella cartella del listone)")
+
+
+def parse_enrichment_args(parser: argparse.ArgumentParser, argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Opzioni di `pipeline.run_enrichment` (squadra, voti) e loro combinazioni ammesse."""
+    add_match_options(parser)
+    add_incremental_options(parser)
+    add_out_of_core(parser)
+    args = parser.parse_args(argv)
+    if args.out_of_core and args.incremental:
+        parser.error("--incremental richiede l'indice in memoria (senza --out-of-core)")
+    if args.assign and (args.out_of_core or args.incremental):
+        parser.error("--assign richiede l'indice in memoria e un run completo (senza --out-of-core/--incremental)")
+    return args
+
+
+def usage() -> str:
+    width = max(len(c) for c in COMMANDS)
+    lines = ["uso: python -m unioneCsvPython <comando> [opzioni]", "", "comandi:"]
+    lines += [f"  {c:<{width}}  {d}" for c, (_, d) in COMMANDS.items()]
+    lines += ["", "`<comando> --help` per le opzioni del singolo comando."]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    if argv[0] not in COMMANDS:
+        print(f"comando sconosciuto: {argv[0]}\n\n{usage()}", file=sys.stderr)
+        return 2
+    module = importlib.import_module(f".{COMMANDS[argv[0]][0]}", __package__)
+    result = module.main(argv[1:])
+    # i comandi che ritornano un int lo usano come codice di uscita; gli altri
+    # ritornano l'output scritto (o i risultati) e terminano con 0
+    return result if isinstance(result, int) else 0
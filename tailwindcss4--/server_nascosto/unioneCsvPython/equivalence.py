@@ -0,0 +1,153 @@
+"""
+Verifica di equivalenza sui dati sintetici
+==========================================
+
+Alcuni percorsi veloci promettono lo *stesso risultato* di un'implementazione
+di riferimento più semplice. Questo comando lo controlla su listone e voti
+generati da synthetic.py, così una modifica che rompe l'equivalenza non passa
+inosservata:
+
+- **fuzzy**  `fuzzy.SurnameIndex.best` contro ``difflib.get_close_matches(..., n=1)``
+  per ogni cognome del listone, sulla mappa della lega e su quella della
+  squadra, a più soglie;
+- **join**   `external.SortMergeJoin` (``--out-of-core``) contro il join in
+  memoria con `PlayerIndex` a ``fuzzy_cutoff=None``, con le opzioni di
+  squadra/voti e con `MATCH_OPTIONS` (unione1); la memoria è limitata a
+  `JOIN_MEMORY_MB` per passare davvero dai file di spill.
+
+Codice di uscita 1 se trova differenze (stampa i primi casi di ogni controllo).
+
+    python -m unioneCsvPython verifica                  # scala 1
+    python -m unioneCsvPython verifica --scales 1 2 --seed 7
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from difflib import get_close_matches
+from typing import Iterator, List, Optional, Tuple
+
+from .external import SortMergeJoin, join_rows
+from .fuzzy import SurnameIndex
+from .matching import MATCH_OPTIONS, PlayerIndex, iter_stats_rows
+from .pipeline import normalize_rows, open_listone
+from .synthetic import VOTI_FIELDS, generate
+
+CUTOFFS = [0.6, 0.78, 0.9]   # 0.78 è la soglia di default di PlayerIndex
+JOIN_MEMORY_MB = 0.05        # abbastanza poca da forzare lo spill su disco
+MAX_SHOWN = 10               # differenze stampate per controllo
+
+# =============================================================
+# CONTROLLI
+# =============================================================
+
+
+def _queries(index: PlayerIndex, listone: str) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+    with open_listone(listone) as (_, rows):
+        for _, query in normalize_rows(rows, index):
+            yield query
+
+
+def check_fuzzy(voti: str, listone: str) -> List[str]:
+    """`SurnameIndex.best` ≡ ``get_close_matches(target, cognomi, n=1, cutoff)``."""
+    index = PlayerIndex(VOTI_FIELDS)
+    for name_raw, team_raw, stats in iter_stats_rows(voti, VOTI_FIELDS):
+        index.add_record(name_raw, team_raw, stats)
+
+    targets = set()
+    for team_norm, tokens in _queries(index, listone):
+        if not tokens:
+            continue
+        tid = index.team_aliases.team_id(team_norm) if team_norm else None
+        for token in {tokens[0], tokens[-1]}:
+            targets.add((tid, token))
+
+    diffs = []
+    for cutoff in CUTOFFS:
+        surnames = {None: SurnameIndex(index.global_map.last, cutoff=cutoff)}
+        for tid, nmap in index.team_map.items():
+            surnames[tid] = SurnameIndex(nmap.last, cutoff=cutoff)
+        for tid, token in sorted(targets, key=str):
+            # la mappa della squadra (se c'è) e quella della lega
+            for key in {tid, None}:
+                if key not in surnames:
+                    continue
+                keys = list(index.team_map[key].last if key is not None else index.global_map.last)
+                expected = (get_close_matches(token, keys, n=1, cutoff=cutoff) or [None])[0]
+                got = surnames[key].best(token)
+                if got != expected:
+                    where = "lega" if key is None else f"squadra {key}"
+                    diffs.append(f"fuzzy {token!r} ({where}, cutoff {cutoff}): "
+                                 f"indice {got!r}, difflib {expected!r}")
+    return diffs
+
+
+def _joined(index, listone: str) -> List[Optional[Tuple[object, ...]]]:
+    with open_listone(listone) as (_, rows):
+        return [
+            (rec.id, rec.full, rec.team, rec.stats) if rec is not None else None
+            for _, _, rec in join_rows(normalize_rows(rows, index), index)
+        ]
+
+
+def check_join(voti: str, listone: str) -> List[str]:
+    """`SortMergeJoin` ≡ `PlayerIndex` senza fuzzy, riga per riga."""
+    diffs = []
+    for label, options in (("squadra", {}), ("unione1", MATCH_OPTIONS)):
+        expected = _joined(PlayerIndex.from_csv(voti, VOTI_FIELDS, **{**options, "fuzzy_cutoff": None}), listone)
+        join = SortMergeJoin.from_csv(voti, VOTI_FIELDS, memory_mb=JOIN_MEMORY_MB, **options)
+        got = _joined(join, listone)
+        if not join.spill_files:
+            diffs.append(f"join {label}: nessun file di spill, il merge su disco non è stato provato")
+        for line, (a, b) in enumerate(zip(got, expected), 2):
+            if a != b:
+                diffs.append(f"join {label} riga {line}: sort-merge {a and a[:3]}, memoria {b and b[:3]}")
+        if len(got) != len(expected):
+            diffs.append(f"join {label}: {len(got)} righe dal sort-merge, {len(expected)} in memoria")
+    return diffs
+
+
+CHECKS = {
+    "fuzzy": check_fuzzy,
+    "join": check_join,
+}
+
+# =============================================================
+# MAIN
+# =============================================================
+
+
+def verify(scales: List[int], workdir: str, seed: int) -> int:
+    """Esegue tutti i controlli per ogni scala → numero di differenze."""
+    failures = 0
+    for scale in scales:
+        meta = generate(os.path.join(workdir, f"x{scale}"), scale, seed)
+        for name, check in CHECKS.items():
+            diffs = check(meta["voti"], meta["listone"])
+            failures += len(diffs)
+            status = "ok" if not diffs else f"{len(diffs)} differenze"
+            print(f"× {scale}  {name:<6} {status}")
+            for line in diffs[:MAX_SHOWN]:
+                print(f"    {line}")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="unioneCsvPython verifica",
+        description="Confronta i percorsi veloci con le implementazioni di riferimento.",
+    )
+    parser.add_argument("--scales", type=int, nargs="+", default=[1],
+                        help="multipli di una stagione di Serie A (es. 1 2; difflib è lento oltre)")
+    parser.add_argument("--workdir", help="dove generare i file (default: cartella temporanea)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="verifica_unione_") as tmp:
+        failures = verify(args.scales, args.workdir or tmp, args.seed)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""
+Join out-of-core (sort-merge) per file molto grandi
+===================================================
+
+`PlayerIndex` tiene in memoria tutto il file statistiche. Per gli archivi
+storici (più leghe, più stagioni) qui si fa lo stesso join con memoria
+limitata da un budget:
+
+1. i record statistiche vengono ordinati per chiave ``(ambito, cognome)``
+   con un ordinamento esterno: run ordinati scritti su file temporanei,
+   ognuno grande al massimo quanto il budget, poi merge a k vie;
+2. ogni riga del listone genera le sue *sonde* con la stessa chiave
+   (cognome = ultimo token; con ``reverse_tokens`` anche il primo token,
+   per l'ordine invertito), ordinate allo stesso modo; le righe vengono
+   intanto parcheggiate su disco nell'ordine di arrivo;
+3. un unico passaggio di merge scorre i due flussi ordinati e, gruppo per
+   gruppo, applica le regole di `PlayerIndex.locate_id`: nome completo,
+   nome proprio (prefisso o uguale), primo record con quel cognome,
+   ordine invertito;
+4. i risultati, riordinati per riga, vengono riuniti alle righe del listone.
+
+L'ambito è l'id della squadra (vedi `teams.TeamAliases`, con
+``team_scoped``) oppure ``-1`` per tutta la lega; le priorità delle sonde riproducono `PlayerIndex.find_id`
+(prima la squadra, poi la lega).
+
+**Differenza dal run in memoria**: il fallback fuzzy non è disponibile (vuole
+tutti i cognomi in memoria), quindi i nomi scritti diversamente nel listone e
+nel file statistiche ("Lautaro Martines") risultano non trovati. Il risultato
+coincide con `PlayerIndex(..., fuzzy_cutoff=None)`, non con il default di
+`squadra`/`voti`; per `unione1`/`unione2`, che non usano il fuzzy, è identico.
+
+Uso::
+
+    join = SortMergeJoin.from_csv("storico.csv", ["Pv", "Mv"], memory_mb=64)
+    pairs = normalize_rows(rows, join)                 # stessa `query` dell'indice
+    enriched = enrich_rows(join.match_rows(pairs, report))
+"""
+
+import heapq
+import itertools
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .matching import Record, iter_stats_rows, normalize
+from .pipeline import Query, match_rows
+from .teams import TeamAliases
+
+DEFAULT_MEMORY_MB = 64
+MAX_FANIN = 64   # run aperti insieme durante un merge
+ROWS_CHUNK = 128  # righe del listone per blocco nel file di parcheggio
+
+# priorità delle sonde: l'ordine in cui `PlayerIndex.find_id` prova le regole
+TEAM, TEAM_REVERSED, GLOBAL, GLOBAL_REVERSED = range(4)
+LEAGUE = -1  # ambito "tutta la lega" (gli id squadra partono da 0)
+
+# avviso degli script con fuzzy (squadra, voti) quando si usa --out-of-core
+NO_FUZZY_WARNING = ("⚠️  --out-of-core: niente fallback fuzzy, i nomi scritti diversamente "
+                    "risultano non trovati (l'output può differire dal run in memoria)")
+
+# record ordinato: (ambito, cognome, id, nome, nome completo, squadra, valori)
+StatsItem = Tuple[int, str, int, str, str, str, Tuple[str, ...]]
+# sonda: (ambito, cognome cercato, riga, priorità, nome cercato, nome completo o None)
+Probe = Tuple[int, str, int, int, str, Optional[str]]
+
+_group_key = itemgetter(0, 1)
+
+
+# =============================================================
+# ORDINAMENTO ESTERNO
+# =============================================================
+
+
+def _size(item: tuple) -> int:
+    """Stima (per eccesso) della memoria di una tupla di stringhe e numeri."""
+    getsizeof = sys.getsizeof
+    size = getsizeof(item)
+    for value in item:
+        size += getsizeof(value)
+        if type(value) is tuple:
+            size += sum(map(getsizeof, value))
+    return size
+
+
+def _write_run(items: Iterable, path: str, chunk_size: int) -> str:
+    """Scrive gli elementi a blocchi di `chunk_size` (un pickle per blocco)."""
+    items = iter(items)
+    with open(path, "wb") as f:
+        for chunk in iter(lambda: list(itertools.islice(items, chunk_size)), []):
+            pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path: str) -> Iterator:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield from pickle.load(f)
+            except EOFError:
+                return
+
+
+class ExternalSorter:
+    """Ordina tuple con al più `budget` byte in memoria; il resto va su disco.
+
+    Le tuple devono essere confrontabili e distinte nei primi campi (qui
+    contengono sempre un id di riga), così l'ordine è totale e stabile.
+    Durante il merge ogni run aperto tiene in memoria un blocco: i blocchi
+    sono dimensionati perché MAX_FANIN blocchi stiano in metà budget.
+    """
+
+    def __init__(self, budget: int, directory: str) -> None:
+        self.budget = budget
+        self.directory = directory
+        self.buffer: List[tuple] = []
+        self.used = 0
+        self.runs: List[str] = []
+        self.chunk_size = 1
+
+    def add(self, item: tuple) -> None:
+        self.buffer.append(item)
+        self.used += _size(item) + 8  # + il puntatore nella lista
+        if self.used >= self.budget:
+            self._spill()
+
+    def _spill(self) -> None:
+        if self.buffer:
+            if not self.runs:
+                item_size = self.used / len(self.buffer)
+                self.chunk_size = max(1, int(self.budget / (2 * MAX_FANIN * item_size)))
+            self.buffer.sort()
+            self.runs.append(_write_run(self.buffer, self._new_run(), self.chunk_size))
+            self.buffer = []
+            self.used = 0
+
+    def _new_run(self) -> str:
+        fd, path = tempfile.mkstemp(suffix=".run", dir=self.directory)
+        os.close(fd)
+        return path
+
+    def __iter__(self) -> Iterator[tuple]:
+        if not self.runs:
+            # è stato tutto in memoria: niente file
+            self.buffer.sort()
+            return iter(self.buffer)
+        self._spill()
+        # troppi run per un solo merge → merge intermedi di MAX_FANIN run
+        while len(self.runs) > MAX_FANIN:
+            group, self.runs = self.runs[:MAX_FANIN], self.runs[MAX_FANIN:]
+            self.runs.append(_write_run(
+                heapq.merge(*map(_read_run, group)), self._new_run(), self.chunk_size
+            ))
+            for path in group:
+                os.remove(path)
+        return heapq.merge(*map(_read_run, self.runs))
+
+
+# =============================================================
+# JOIN
+# =============================================================
+
+
+class SortMergeJoin:
+    """Join listone ⇆ statistiche per ordinamento e merge, a memoria limitata.
+
+    Le opzioni sono quelle di `PlayerIndex` (``fuzzy_cutoff`` è accettata
+    ma non ha effetto). ``memory_mb`` limita la memoria dei tre ordinamenti
+    (record, sonde, risultati), un terzo ciascuno; ``tmp_dir`` è la cartella
+    dei file di spill (default: quella temporanea di sistema).
+    """
+
+    def __init__(
+        self,
+        stats_fields: Iterable[str],
+        *,
+        normalizer: Callable[[Optional[str]], str] = normalize,
+        prefix_first: bool = True,
+        reverse_tokens: bool = True,
+        fuzzy_cutoff: Optional[float] = None,
+        team_scoped: bool = True,
+        team_aliases: Optional[TeamAliases] = None,
+        memory_mb: float = DEFAULT_MEMORY_MB,
+        tmp_dir: Optional[str] = None,
+    ) -> None:
+        self.stats_fields: List[str] = list(stats_fields)
+        self.normalizer = normalizer
+        self.prefix_first = prefix_first
+        self.reverse_tokens = reverse_tokens
+        self.team_scoped = team_scoped
+        self.team_aliases = team_aliases if team_aliases is not None else TeamAliases(normalizer)
+        self.memory_mb = memory_mb
+        self.tmp_dir = tmp_dir
+        # file statistiche: (path, delimitatore, require_team)
+        self.sources: List[Tuple[str, str, bool]] = []
+        # valorizzati da `match_rows` (vedi instrumentation.RunReport.as_dict)
+        self.size = 0
+        self.spill_files = 0
+        self.cache = None
+
+    def options(self) -> Dict[str, object]:
+        return {
+            "stats_fields": self.stats_fields,
+            "normalizer": getattr(self.normalizer, "__name__", repr(self.normalizer)),
+            "prefix_first": self.prefix_first,
+            "reverse_tokens": self.reverse_tokens,
+            "fuzzy_cutoff": None,
+            "team_scoped": self.team_scoped,
+            "team_aliases": self.team_aliases.fingerprint(),
+            "out_of_core": {"memory_mb": self.memory_mb, "spill_files": self.spill_files},
+        }
+
+    @classmethod
+    def from_csv(
+        cls,
+        path: str,
+        stats_fields: Iterable[str],
+        *,
+        delimiter: Optional[str] = None,
+        require_team: bool = True,
+        **options,
+    ) -> "SortMergeJoin":
+        """Come `PlayerIndex.from_csv`, ma il file viene letto solo da `match_rows`."""
+        join = cls(stats_fields, **options)
+        join.sources.append((path, delimiter, require_team))
+        return join
+
+    def query(self, name_raw: Optional[str], team_raw: Optional[str] = "") -> Query:
+        """Stessa normalizzazione di `PlayerIndex.query` (vale `pipeline.normalize_rows`)."""
+        team_norm = self.normalizer(team_raw) if self.team_scoped and team_raw else ""
+        return team_norm, tuple(self.normalizer(name_raw).split())
+
+    # ---------------------------------------------------------------- chiavi
+    def _stats_items(self) -> Iterator[StatsItem]:
+        """Record statistiche, una volta per la lega e una per la squadra."""
+        rec_id = 0
+        for path, delimiter, require_team in self.sources:
+            for name_raw, team_raw, stats in iter_stats_rows(
+                path, self.stats_fields, delimiter=delimiter, require_team=require_team
+            ):
+                tokens = self.normalizer(name_raw).split()
+                if not tokens:
+                    continue
+                first, last, full = tokens[0], tokens[-1], " ".join(tokens)
+                team = self.normalizer(team_raw) if team_raw else ""
+                values = tuple(stats[f] for f in self.stats_fields)
+                if team and self.team_scoped:
+                    yield self.team_aliases.team_id(team), last, rec_id, first, full, team, values
+                yield LEAGUE, last, rec_id, first, full, team, values
+                rec_id += 1
+        self.size = rec_id
+
+    def _probes(self, seq: int, query: Query) -> Iterator[Probe]:
+        team_norm, tokens = query
+        if not tokens:
+            return
+        first, last, full = tokens[0], tokens[-1], " ".join(tokens)
+        if team_norm:
+            scopes = ((self.team_aliases.team_id(team_norm), TEAM), (LEAGUE, GLOBAL))
+        else:
+            scopes = ((LEAGUE, GLOBAL),)
+        for scope, priority in scopes:
+            yield scope, last, seq, priority, first, full
+            if self.reverse_tokens and len(tokens) > 1:
+                # (cognome, nome): si cerca il primo token tra i cognomi
+                yield scope, first, seq, priority + 1, last, None
+
+    # ----------------------------------------------------------------- merge
+    def _pick(self, group: Sequence[StatsItem], probe: Probe) -> tuple:
+        """Regole di `PlayerIndex.locate_id` dentro un gruppo (ambito, cognome)."""
+        _, _, seq, priority, first, full = probe
+        chosen, rule = None, None
+        if full is not None:
+            chosen = next((item for item in group if item[4] == full), None)
+            rule = "full"
+        if chosen is None:
+            if self.prefix_first:
+                chosen = next((item for item in group if item[3].startswith(first)), None)
+            else:
+                chosen = next((item for item in group if item[3] == first), None)
+            # nessun match sul nome → primo record con quel cognome
+            chosen, rule = (chosen, "first") if chosen is not None else (group[0], "surname")
+        if full is None:
+            rule = "reversed"
+        _, last, rec_id, rec_first, rec_full, team, values = chosen
+        return seq, priority, rule, rec_id, rec_first, last, rec_full, team, values
+
+    def _merge(self, stats: Iterable[StatsItem], probes: Iterable[Probe]) -> Iterator[tuple]:
+        """Unico passaggio sui due flussi ordinati per (ambito, cognome)."""
+        groups = ((key, list(items)) for key, items in itertools.groupby(stats, _group_key))
+        current = next(groups, None)
+        for key, group_probes in itertools.groupby(probes, _group_key):
+            while current is not None and current[0] < key:
+                current = next(groups, None)
+            if current is None:
+                return
+            if current[0] == key:
+                for probe in group_probes:
+                    yield self._pick(current[1], probe)
+
+    def match_rows(
+        self,
+        pairs: Iterable[Tuple[dict, Optional[Query]]],
+        report=None,
+    ) -> Iterator[Tuple[dict, Optional[Query], Optional[Record]]]:
+        """Come `pipeline.match_rows`: ``(riga, query, record o None)`` in ordine.
+
+        Le righe escono solo dopo il merge: prima vengono lette tutte (su
+        disco), poi restituite nell'ordine originale.
+        """
+        budget = max(int(self.memory_mb * 2**20) // 3, 1)
+        workdir = tempfile.mkdtemp(prefix="unione_join_", dir=self.tmp_dir)
+        try:
+            stats = ExternalSorter(budget, workdir)
+            for item in self._stats_items():
+                stats.add(item)
+
+            probes = ExternalSorter(budget, workdir)
+
+            def park() -> Iterator[Tuple[dict, Optional[Query]]]:
+                # le righe vanno su disco così come arrivano, le sonde nell'ordinamento
+                for seq, (row, query) in enumerate(pairs):
+                    if query is not None:
+                        for probe in self._probes(seq, query):
+                            probes.add(probe)
+                    yield row, query
+
+            rows_path = _write_run(park(), os.path.join(workdir, "rows.run"), ROWS_CHUNK)
+
+            results = ExternalSorter(budget, workdir)
+            for result in self._merge(stats, probes):
+                results.add(result)
+            self.spill_files = len(stats.runs) + len(probes.runs) + len(results.runs)
+
+            # per ogni riga vince la sonda con priorità più bassa
+            best = (next(items) for _, items in itertools.groupby(results, itemgetter(0)))
+            hit = next(best, None)
+            for seq, (row, query) in enumerate(_read_run(rows_path)):
+                record, method = None, None
+                if query is None:
+                    method = "skipped"
+                elif hit is not None and hit[0] == seq:
+                    _, priority, rule, rec_id, first, last, full, team, values = hit
+                    record = Record(rec_id, first, last, full, team, dict(zip(self.stats_fields, values)))
+                    method = f"{'team' if priority < GLOBAL else 'global'}:{rule}"
+                if hit is not None and hit[0] == seq:
+                    hit = next(best, None)
+                if report is not None:
+                    report.count("match", method or "not_found")
+                yield row, query, record
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def join_rows(
+    pairs: Iterable[Tuple[dict, Optional[Query]]],
+    index,
+    report=None,
+) -> Iterator[Tuple[dict, Optional[Query], Optional[Record]]]:
+    """`pipeline.match_rows` per un `PlayerIndex`, sort-merge per un `SortMergeJoin`."""
+    if isinstance(index, SortMergeJoin):
+        return index.match_rows(pairs, report)
+    return match_rows(pairs, index, report)
@@ -0,0 +1,106 @@
+"""
+Ricerca fuzzy dei cognomi con indice a bigrammi
+===============================================
+
+`difflib.get_close_matches(target, keys)` calcola un SequenceMatcher per *ogni*
+cognome della lega. `SurnameIndex` restituisce lo stesso risultato (stessa
+soglia, stesso spareggio) confrontando solo i cognomi che possono davvero
+superare la soglia.
+
+Perché il filtro è esatto
+-------------------------
+Con ``ratio = 2·M / (la + lb) ≥ cutoff`` (M = caratteri in comune nei blocchi
+di SequenceMatcher):
+
+- ``M ≤ min(la, lb)``  → esclude le lunghezze troppo diverse;
+- tra due blocchi consecutivi c'è almeno un carattere non abbinato, quindi
+  ``blocchi ≤ (la − M) + (lb − M) + 1``; un blocco di s caratteri contiene
+  s − 1 bigrammi presenti in entrambe le stringhe, per cui i bigrammi in comune
+  sono almeno ``M − blocchi ≥ 3·M − la − lb − 1``.
+
+Un cognome che non ha abbastanza bigrammi in comune col target non può
+raggiungere la soglia e viene scartato senza calcolare il ratio.
+"""
+
+import math
+from collections import Counter
+from difflib import SequenceMatcher, get_close_matches
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# oltre questa lunghezza difflib attiva l'euristica "autojunk" e il limite
+# sui blocchi non vale più → si torna al confronto completo
+_AUTOJUNK_LEN = 200
+
+
+def _bigrams(word: str) -> Counter:
+    return Counter(word[i:i + 2] for i in range(len(word) - 1))
+
+
+class SurnameIndex:
+    """Indice a bigrammi sui cognomi di una mappa, costruito una volta sola."""
+
+    def __init__(self, keys: Iterable[str], cutoff: float = 0.78) -> None:
+        self.cutoff = cutoff
+        self.keys: List[str] = list(keys)
+        self.by_len: Dict[int, List[int]] = {}                # lunghezza → id cognomi
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}  # bigramma → (id, occorrenze)
+        for kid, key in enumerate(self.keys):
+            self.by_len.setdefault(len(key), []).append(kid)
+            for bg, cnt in _bigrams(key).items():
+                self.postings.setdefault(bg, []).append((kid, cnt))
+        self.comparisons = 0  # SequenceMatcher effettivamente calcolati
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _required(self, la: int) -> Dict[int, int]:
+        """Per ogni lunghezza ammissibile, bigrammi in comune minimi."""
+        required = {}
+        for lb in self.by_len:
+            # margine di 1e-9: meglio un candidato in più che uno in meno
+            m_min = math.ceil(self.cutoff * (la + lb) / 2 - 1e-9)
+            if m_min <= min(la, lb):
+                required[lb] = 3 * m_min - la - lb - 1
+        return required
+
+    def candidates(self, target: str) -> List[int]:
+        """Id dei cognomi che possono superare la soglia."""
+        required = self._required(len(target))
+        shared: Dict[int, int] = {}
+        for bg, qcnt in _bigrams(target).items():
+            for kid, cnt in self.postings.get(bg, ()):
+                shared[kid] = shared.get(kid, 0) + min(qcnt, cnt)
+
+        out = [
+            kid for kid, n in shared.items()
+            if n >= required.get(len(self.keys[kid]), math.inf)
+        ]
+        # lunghezze per cui il vincolo sui bigrammi è banale (nomi cortissimi)
+        for lb, need in required.items():
+            if need <= 0:
+                out.extend(kid for kid in self.by_len[lb] if kid not in shared)
+        return out
+
+    def best(self, target: str) -> Optional[str]:
+        """Equivalente a ``get_close_matches(target, keys, n=1, cutoff)[0]``."""
+        if not self.keys:
+            return None
+        if len(target) >= _AUTOJUNK_LEN:
+            match = get_close_matches(target, self.keys, n=1, cutoff=self.cutoff)
+            return match[0] if match else None
+
+        best: Optional[Tuple[float, str]] = None
+        s = SequenceMatcher()
+        s.set_seq2(target)
+        for kid in self.candidates(target):
+            key = self.keys[kid]
+            s.set_seq1(key)
+            self.comparisons += 1
+            if (s.real_quick_ratio() >= self.cutoff
+                    and s.quick_ratio() >= self.cutoff
+                    and s.ratio() >= self.cutoff):
+                # stesso spareggio di heapq.nlargest su (score, chiave)
+                scored = (s.ratio(), key)
+                if best is None or scored > best:
+                    best = scored
+        return best[1] if best else None
@@ -0,0 +1,336 @@
+"""
+Ri-arricchimento incrementale
+=============================
+
+Tra un run e l'altro (nuova giornata, aggiornamento prezzi) cambia quasi
+nulla. Qui si salva, in SQLite, per ogni riga del listone l'hash del suo
+contenuto e il record statistiche a cui è stata abbinata; al run successivo:
+
+- riga del listone **identica** → l'abbinamento precedente viene riusato
+  senza passare dal matcher (le statistiche però sono sempre quelle
+  *attuali* del record);
+- dal lato statistiche si salva la chiave (squadra, nome completo) di ogni
+  record: i record aggiunti o tolti invalidano solo le righe che possono
+  dipenderne, cioè quelle con un nome in comune col record, quelle finite
+  nel fuzzy della stessa squadra e, se qualcosa è cambiato, quelle non
+  trovate o risolte col fuzzy sulla lega (vedi `RosterChange`);
+- righe nuove o modificate passano dal matcher come sempre.
+
+Per l'output si salva anche l'hash di ogni riga scritta (per id): si può
+scrivere lo snapshot completo oppure un **delta** con le sole righe cambiate
+(``op=upsert``) e gli id spariti (``op=delete``). In nessuno dei due casi le
+righe restano in memoria: passano in streaming come nel run normale.
+
+Uso::
+
+    with RunState("data/incremental.sqlite", "unionePerVoti", index) as state:
+        matched = state.match_rows(pairs, index)
+        ...
+        write_rows(state.track(number_rows(enriched), fieldnames), path, fieldnames)
+        # oppure, solo le righe cambiate:
+        state.write_delta(number_rows(enriched), delta_path, fieldnames)
+"""
+
+import csv
+import hashlib
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .matching import PlayerIndex, Record
+from .pipeline import Query, output_path, write_rows
+
+# file di stato di default, nella cartella del listone (vedi `open_state`)
+STATE_FILE = "incremental_state.sqlite"
+
+# riga listone → (metodo, squadra e nome completo del record abbinato)
+Match = Tuple[Optional[str], str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    name     TEXT PRIMARY KEY,
+    options  TEXT NOT NULL,     -- opzioni di matching dell'indice
+    names    TEXT NOT NULL      -- PlayerIndex.names_fingerprint()
+);
+CREATE TABLE IF NOT EXISTS records (
+    name     TEXT NOT NULL,
+    team     TEXT NOT NULL,     -- chiave del record statistiche, normalizzata
+    full     TEXT NOT NULL,
+    PRIMARY KEY (name, team, full)
+);
+CREATE TABLE IF NOT EXISTS rows (
+    name     TEXT NOT NULL,
+    row_hash TEXT NOT NULL,
+    method   TEXT,              -- NULL = non trovato
+    team     TEXT NOT NULL,
+    full     TEXT NOT NULL,
+    PRIMARY KEY (name, row_hash)
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    name     TEXT NOT NULL,
+    id       INTEGER NOT NULL,
+    hash     TEXT NOT NULL,
+    PRIMARY KEY (name, id)
+);
+"""
+
+
+def content_hash(values: Iterable[object]) -> str:
+    """Hash compatto (16 caratteri) di una sequenza di valori."""
+    digest = hashlib.blake2b(digest_size=8)
+    for value in values:
+        digest.update(str(value).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def row_hash(row: dict) -> str:
+    return content_hash(f"{k}={v}" for k, v in row.items())
+
+
+RecordKey = Tuple[str, str]  # (squadra, nome completo) normalizzati
+
+
+class RosterChange:
+    """Record statistiche aggiunti o tolti dall'ultimo run, e quali righe toccano.
+
+    Il risultato di `PlayerIndex.find_id` per una riga dipende solo dai record
+    che hanno un nome in comune con lei (nome completo, cognome, nome, anche
+    invertiti) e, per il fuzzy, dai cognomi della mappa in cui è stato
+    cercato: squadra per ``team:fuzzy``, lega per ``global:fuzzy`` e i non
+    trovati (che nella lega ci sono arrivati comunque).
+    """
+
+    def __init__(self, changed: Set[RecordKey], index: PlayerIndex) -> None:
+        self.count = len(changed)
+        self.tokens: Set[str] = set()
+        self.teams: Set[int] = set()
+        for team, full in changed:
+            tokens = full.split()
+            if tokens:
+                self.tokens.update((tokens[0], tokens[-1]))
+            if team:
+                self.teams.add(index.team_aliases.team_id(team))
+
+    def affects(self, method: Optional[str], query: Query, index: PlayerIndex) -> bool:
+        if not self.count:
+            return False
+        team_norm, tokens = query
+        if self.tokens.intersection(tokens):
+            return True
+        if method is None or method == "global:fuzzy":
+            return True
+        if method == "team:fuzzy":
+            return bool(team_norm) and index.team_aliases.team_id(team_norm) in self.teams
+        return False
+
+
+class RunState:
+    """Abbinamenti e output del run precedente di uno script (`name`)."""
+
+    def __init__(self, path: str, name: str, index: PlayerIndex) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.created = not os.path.exists(path)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        self.name = name
+        self.options = repr(index.options())
+        self.names = index.names_fingerprint()
+
+        previous = self.conn.execute(
+            "SELECT options, names FROM runs WHERE name = ?", (name,)
+        ).fetchone()
+        # nessun run precedente o opzioni di matching diverse → niente da riusare
+        self.first_run = previous is None
+        self.fresh = self.first_run or previous[0] != self.options
+        self.same_names = not self.fresh and previous[1] == self.names
+        self.records: Set[RecordKey] = set(zip(index.teams, index.fulls))
+        previous_records: Set[RecordKey] = self.records if self.same_names else {
+            (t, f) for t, f in self.conn.execute("SELECT team, full FROM records WHERE name = ?", (name,))
+        }
+        self.roster = RosterChange(self.records ^ previous_records, index)
+        self.previous: Dict[str, Match] = {} if self.fresh else {
+            h: (m, t, f)
+            for h, m, t, f in self.conn.execute(
+                "SELECT row_hash, method, team, full FROM rows WHERE name = ?", (name,)
+            )
+        }
+        self.previous_outputs: Dict[int, str] = dict(
+            self.conn.execute("SELECT id, hash FROM outputs WHERE name = ?", (name,))
+        )
+        self.matches: Dict[str, Match] = {}
+        self.outputs: Dict[int, str] = {}
+        self.changed = 0
+        self.reused = 0
+        self.rematched = 0
+
+    # ---------------------------------------------------------------- match
+    def _reusable(self, match: Match, query: Query, index: PlayerIndex) -> bool:
+        return not self.roster.affects(match[0], query, index)
+
+    def _reuse(self, match: Match, index: PlayerIndex) -> Tuple[bool, Optional[Record]]:
+        method, team, full = match
+        if method is None or method == "skipped":
+            return True, None
+        rec_id = index.find_key(team, full)
+        return rec_id is not None, (index.record(rec_id) if rec_id is not None else None)
+
+    def match_rows(
+        self,
+        pairs: Iterable[Tuple[dict, Optional[Query]]],
+        index: PlayerIndex,
+        report=None,
+    ) -> Iterator[Tuple[dict, Optional[Query], Optional[Record]]]:
+        """Come `pipeline.match_rows`, ma riusa gli abbinamenti ancora validi."""
+        for row, query in pairs:
+            h = row_hash(row)
+            if query is None:
+                self.matches[h] = ("skipped", "", "")
+                if report is not None:
+                    report.count("match", "skipped")
+                yield row, None, None
+                continue
+
+            previous = self.previous.get(h)
+            if previous is not None and self._reusable(previous, query, index):
+                ok, record = self._reuse(previous, index)
+                if ok:
+                    self.matches[h] = previous
+                    self.reused += 1
+                    if report is not None:
+                        report.count("match", "reused")
+                    yield row, query, record
+                    continue
+
+            record, method = index.resolve_match(query)
+            self.rematched += 1
+            self.matches[h] = (method, record.team, record.full) if record else (None, "", "")
+            if report is not None:
+                report.count("match", method or "not_found")
+            yield row, query, record
+
+    # --------------------------------------------------------------- output
+    def _output(self, row: dict, fieldnames: List[str]) -> bool:
+        """Registra l'hash della riga in uscita (per id) → True se è cambiata."""
+        rid = int(row["id"])
+        h = content_hash(row.get(f, "") for f in fieldnames)
+        self.outputs[rid] = h
+        changed = self.previous_outputs.get(rid) != h
+        self.changed += changed
+        return changed
+
+    def track(self, rows: Iterable[dict], fieldnames: List[str]) -> Iterator[dict]:
+        """Registra l'hash di ogni riga in uscita (per id) e la lascia passare."""
+        for row in rows:
+            self._output(row, fieldnames)
+            yield row
+
+    def removed_ids(self) -> List[int]:
+        return sorted(set(self.previous_outputs) - set(self.outputs))
+
+    def write_delta(self, rows: Iterable[dict], path: str, fieldnames: List[str], delimiter: str = ";") -> int:
+        """CSV con le sole righe cambiate (``op=upsert``) e gli id spariti (``op=delete``).
+
+        Le righe di `rows` vengono registrate come in `track` e scritte appena
+        arrivano se sono cambiate; gli id spariti si conoscono solo alla fine.
+        """
+        count = 0
+        with open(path, "w", newline="", encoding="utf-8") as fo:
+            writer = csv.DictWriter(fo, fieldnames=["op"] + fieldnames, delimiter=delimiter,
+                                    extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                if self._output(row, fieldnames):
+                    writer.writerow({"op": "upsert", **row})
+                    count += 1
+            for rid in self.removed_ids():
+                writer.writerow({"op": "delete", "id": rid})
+                count += 1
+        return count
+
+    # ---------------------------------------------------------------- stato
+    def save(self) -> None:
+        """Sostituisce lo stato dello script con quello di questo run (una transazione)."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO runs (name, options, names) VALUES (?, ?, ?)",
+                (self.name, self.options, self.names),
+            )
+            if not self.same_names:
+                self.conn.execute("DELETE FROM records WHERE name = ?", (self.name,))
+                self.conn.executemany(
+                    "INSERT INTO records (name, team, full) VALUES (?, ?, ?)",
+                    [(self.name, t, f) for t, f in self.records],
+                )
+            self.conn.execute("DELETE FROM rows WHERE name = ?", (self.name,))
+            self.conn.executemany(
+                "INSERT INTO rows (name, row_hash, method, team, full) VALUES (?, ?, ?, ?, ?)",
+                [(self.name, h, m, t, f) for h, (m, t, f) in self.matches.items()],
+            )
+            self.conn.execute("DELETE FROM outputs WHERE name = ?", (self.name,))
+            self.conn.executemany(
+                "INSERT INTO outputs (name, id, hash) VALUES (?, ?, ?)",
+                [(self.name, rid, h) for rid, h in self.outputs.items()],
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "RunState":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        # lo stato si aggiorna solo se il run è arrivato in fondo
+        if exc_type is None:
+            self.save()
+        self.close()
+
+    def opening(self) -> str:
+        """Cosa si può riusare, da mostrare prima del run."""
+        if self.created:
+            return f"🆕 Nuovo stato incrementale {self.path}: nessun abbinamento da riusare"
+        if self.first_run:
+            return f"🆕 Nessun run precedente di questo script e listone in {self.path}: nessun abbinamento da riusare"
+        if self.fresh:
+            return "🆕 Opzioni di matching cambiate dall'ultimo run: nessun abbinamento da riusare"
+        if self.roster.count:
+            return (f"♻️  Stato incrementale {self.path}: {self.roster.count} giocatori aggiunti o tolti "
+                    f"nel file statistiche, si ri-abbinano solo le righe che li riguardano")
+        return f"♻️  Stato incrementale {self.path}"
+
+    def summary(self) -> str:
+        return (f"♻️  Abbinamenti riusati: {self.reused}, ri-abbinati: {self.rematched}, "
+                f"righe cambiate: {self.changed}, rimosse: {len(self.removed_ids())}")
+
+
+def open_state(args, name: str, index: PlayerIndex) -> Optional[RunState]:
+    """Stato dello script per ``--incremental`` (None se l'opzione non è attiva).
+
+    Lo stato è per script *e* listone: listoni diversi non si pestano i piedi.
+    Di default sta accanto al listone (`STATE_FILE`), così run con
+    ``--output-dir`` diversi ripartono dallo stesso stato; se non c'è nulla da
+    riusare lo si dice subito.
+    """
+    if not args.incremental:
+        return None
+    quote = os.path.abspath(args.quote)
+    path = args.state or os.path.join(os.path.dirname(quote), STATE_FILE)
+    state = RunState(path, f"{name}:{quote}", index)
+    print(state.opening())
+    return state
+
+
+def write_output(rows: Iterable[dict], fieldnames: List[str], args, state: Optional[RunState]) -> str:
+    """Scrive lo snapshot completo o, con ``--incremental delta``, solo il delta."""
+    if state is None:
+        filepath = output_path(args.output_dir, args.prefix)
+        write_rows(rows, filepath, fieldnames, args.output_delimiter)
+        return filepath
+    if args.incremental == "delta":
+        filepath = output_path(args.output_dir, args.prefix + "_delta")
+        state.write_delta(rows, filepath, fieldnames, args.output_delimiter)
+    else:
+        filepath = output_path(args.output_dir, args.prefix)
+        write_rows(state.track(rows, fieldnames), filepath, fieldnames, args.output_delimiter)
+    return filepath
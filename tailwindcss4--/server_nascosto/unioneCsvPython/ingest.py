@@ -0,0 +1,196 @@
+"""
+Lettura veloce dei CSV in ingresso
+==================================
+
+Listone, voti e statistiche arrivano in formati che cambiano da una
+settimana all'altra: ``;`` o ``,``, UTF-8 con o senza BOM, export di Excel in
+cp1252, a volte compressi. Qui c'è un solo punto di lettura per tutti:
+
+- **dialetto**: separatore ed encoding vengono rilevati dal primo blocco del
+  file (BOM, poi UTF-8, altrimenti cp1252; il separatore è il candidato più
+  frequente nell'header), a meno che non siano indicati esplicitamente;
+- **gzip**: riconosciuto dai byte iniziali, non dall'estensione;
+- **mmap**: i file non compressi vengono mappati in memoria e decodificati a
+  blocchi, senza il buffering riga per riga di ``open``;
+- **proiezione**: `read_columns` restituisce solo le colonne richieste come
+  tuple, invece di un dizionario per riga con tutte le colonne.
+
+La lettura resta in streaming (blocchi di `CHUNK_SIZE`): la memoria non
+cresce con la dimensione del file, come richiesto dal join out-of-core.
+
+Esempio::
+
+    for name, team, pv in read_columns("voti_2024_25.csv", ["nome", "squadra", "pv"]):
+        ...
+
+    with open_csv("listone.csv.gz") as (dialect, lines):
+        reader = csv.reader(lines, delimiter=dialect.delimiter)
+"""
+
+import codecs
+import csv
+import gzip
+import io
+import mmap
+import os
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+SNIFF_SIZE = 1 << 16     # byte esaminati per encoding e separatore
+CHUNK_SIZE = 1 << 22     # byte decodificati per volta
+DELIMITERS = (";", ",", "\t", "|")  # a parità di conteggio vince il primo
+DEFAULT_DELIMITER = ","
+FALLBACK_ENCODING = "cp1252"
+
+GZIP_MAGIC = b"\x1f\x8b"
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class Dialect(NamedTuple):
+    encoding: str
+    delimiter: str
+    compressed: bool = False
+
+# =============================================================
+# RILEVAMENTO DEL DIALETTO
+# =============================================================
+
+
+def detect_encoding(head: bytes) -> str:
+    """Encoding dal primo blocco: BOM, poi UTF-8 valido, altrimenti cp1252."""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        # final=False: un carattere multibyte tagliato a fine blocco non è un errore
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return "utf-8"
+
+
+def detect_delimiter(text: str) -> str:
+    """Il separatore candidato più frequente nella riga di header."""
+    header = text.splitlines()[0] if text else ""
+    counts = [header.count(d) for d in DELIMITERS]
+    best = max(range(len(DELIMITERS)), key=counts.__getitem__)
+    return DELIMITERS[best] if counts[best] else DEFAULT_DELIMITER
+
+
+def sniff(head: bytes, delimiter: Optional[str] = None, encoding: Optional[str] = None) -> Tuple[str, str]:
+    """``(encoding, separatore)``; quelli indicati esplicitamente non vengono rilevati."""
+    encoding = encoding or detect_encoding(head)
+    if not delimiter:
+        text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(head)
+        delimiter = detect_delimiter(text)
+    return encoding, delimiter
+
+# =============================================================
+# APERTURA (gzip / mmap) E DECODIFICA A BLOCCHI
+# =============================================================
+
+
+@contextmanager
+def _open_raw(path: str) -> Iterator[Tuple[object, bool]]:
+    """Sorgente di byte con ``read(n)`` e flag di compressione."""
+    with open(path, "rb") as f:
+        compressed = f.read(2) == GZIP_MAGIC
+        f.seek(0)
+        if compressed:
+            with gzip.GzipFile(fileobj=f) as gz:
+                yield gz, True
+            return
+        if os.fstat(f.fileno()).st_size == 0:
+            yield io.BytesIO(b""), False  # mmap non accetta file vuoti
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm, False
+
+
+def _decode_lines(raw, head: bytes, encoding: str) -> Iterator[str]:
+    """Righe di testo (terminatori inclusi) decodificando `CHUNK_SIZE` byte per volta.
+
+    Ogni blocco viene tagliato all'ultimo ``\\n`` e il resto passa al blocco
+    successivo, così `csv.reader` riceve sempre righe intere (anche i campi
+    tra virgolette su più righe restano corretti).
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    carry = ""
+    block = head
+    while block:
+        text = carry + decoder.decode(block)
+        cut = text.rfind("\n") + 1
+        if cut:
+            yield from io.StringIO(text[:cut], newline="")
+        carry = text[cut:]
+        block = raw.read(CHUNK_SIZE)
+    text = carry + decoder.decode(b"", final=True)
+    if text:
+        yield from io.StringIO(text, newline="")
+
+
+@contextmanager
+def open_csv(
+    path: str,
+    *,
+    delimiter: Optional[str] = None,
+    encoding: Optional[str] = None,
+) -> Iterator[Tuple[Dialect, Iterator[str]]]:
+    """Apre `path` (semplice o gzip) → ``(dialetto, righe di testo)`` per `csv.reader`."""
+    with _open_raw(path) as (raw, compressed):
+        head = raw.read(SNIFF_SIZE)
+        encoding, delimiter = sniff(head, delimiter, encoding)
+        yield Dialect(encoding, delimiter, compressed), _decode_lines(raw, head, encoding)
+
+
+def sniff_file(path: str, delimiter: Optional[str] = None, encoding: Optional[str] = None) -> Dialect:
+    """Dialetto di `path` senza leggerne le righe (es. per pandas)."""
+    with open_csv(path, delimiter=delimiter, encoding=encoding) as (dialect, _):
+        return dialect
+
+# =============================================================
+# PROIEZIONE DELLE COLONNE
+# =============================================================
+
+
+def header_positions(header: Sequence[str]) -> Dict[str, int]:
+    """Colonna (lowercase, senza spazi) → indice; con nomi ripetuti vale l'ultimo, come `csv.DictReader`."""
+    return {name.lower().strip(): i for i, name in enumerate(header) if name}
+
+
+def read_columns(
+    path: str,
+    columns: Sequence[str],
+    *,
+    delimiter: Optional[str] = None,
+    encoding: Optional[str] = None,
+) -> Iterator[Tuple[str, ...]]:
+    """Solo le colonne `columns` (nomi senza distinzione di maiuscole) come tuple.
+
+    Colonne assenti dall'header e celle mancanti nelle righe corte valgono
+    ""; le righe vuote vengono saltate.
+    """
+    if not columns:
+        raise ValueError("Nessuna colonna richiesta")
+    with open_csv(path, delimiter=delimiter, encoding=encoding) as (dialect, lines):
+        reader = csv.reader(lines, delimiter=dialect.delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = header_positions(header)
+        missing = len(header)  # le colonne assenti puntano a una cella "" aggiunta in coda
+        indices = [positions.get(c.lower().strip(), missing) for c in columns]
+        width = max(indices) + 1
+        pick = itemgetter(*indices)
+        single = len(indices) == 1
+        for row in reader:
+            if len(row) < width:
+                if not row:
+                    continue
+                row.extend([""] * (width - len(row)))
+            yield (pick(row),) if single else pick(row)
@@ -0,0 +1,164 @@
+"""
+Strumentazione dei run di arricchimento
+=======================================
+
+Tempi per fase e contatori (es. righe per metodo di match) raccolti in un
+`RunReport`, salvato come JSON accanto al CSV di output
+(``quotazioni_enriched_….csv`` → ``quotazioni_enriched_….report.json``).
+
+I tempi sono *esclusivi*: quando una fase ne apre un'altra (o un generatore
+ne consuma un altro, come negli stadi di `pipeline.py`) il tempo della fase
+esterna resta in pausa, così nessun tratto viene contato due volte.
+
+Con la variabile d'ambiente ``UNIONE_PROFILE=1`` il run viene anche profilato
+con cProfile e le statistiche salvate in ``….prof`` (``python -m pstats``).
+
+Uso::
+
+    run = RunReport("unionePerVoti").start()
+    with run.stage("index"):
+        index = PlayerIndex.from_csv(...)
+    rows = run.timed_iter("read", rows)
+    ...
+    run.stop()
+    run.write(filepath, index=index)
+"""
+
+import cProfile
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from .matching import normalize_cache_stats
+
+T = TypeVar("T")
+
+PROFILE_ENV = "UNIONE_PROFILE"
+
+
+class RunReport:
+    """Tempi per fase (esclusivi), numero di chiamate e contatori di un run."""
+
+    def __init__(self, script: str, profile: Optional[bool] = None) -> None:
+        self.script = script
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.timings: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self._stack: List[List] = []  # [fase, inizio tratto corrente]
+        self._t0 = time.perf_counter()
+        self.elapsed = 0.0
+        if profile is None:
+            profile = os.environ.get(PROFILE_ENV, "") not in ("", "0")
+        self.profiler = cProfile.Profile() if profile else None
+
+    # ------------------------------------------------------------- run intero
+    def start(self) -> "RunReport":
+        self._t0 = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def stop(self) -> None:
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.elapsed = time.perf_counter() - self._t0
+
+    def __enter__(self) -> "RunReport":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ------------------------------------------------------------------ fasi
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Cronometra il blocco; la fase che lo contiene va in pausa."""
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.timings[parent[0]] = self.timings.get(parent[0], 0.0) + now - parent[1]
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            _, start = self._stack.pop()
+            self.timings[name] = self.timings.get(name, 0.0) + now - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def timed(self, name: Optional[str] = None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+        """Decoratore: ogni chiamata della funzione conta nella fase `name`."""
+        def decorator(func: Callable[..., T]) -> Callable[..., T]:
+            stage = name or func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def timed_iter(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Attribuisce alla fase `name` il tempo speso a produrre ogni elemento."""
+        it = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    # -------------------------------------------------------------- contatori
+    def count(self, group: str, key: str, n: int = 1) -> None:
+        bucket = self.counters.setdefault(group, {})
+        bucket[key] = bucket.get(key, 0) + n
+
+    # ------------------------------------------------------------------ report
+    def as_dict(self, index=None) -> Dict[str, object]:
+        report: Dict[str, object] = {
+            "script": self.script,
+            "started_at": self.started_at,
+            "elapsed_s": round(self.elapsed, 6),
+            "stages": {
+                name: {"seconds": round(sec, 6), "calls": self.calls.get(name, 0)}
+                for name, sec in self.timings.items()
+            },
+            "counters": {g: dict(sorted(c.items())) for g, c in self.counters.items()},
+        }
+        match = self.counters.get("match")
+        if match:
+            # stessa regola a prescindere dall'ambito: "team:fuzzy" + "global:fuzzy" → "fuzzy"
+            rules: Dict[str, int] = {}
+            for method, n in match.items():
+                rule = method.rsplit(":", 1)[-1]
+                rules[rule] = rules.get(rule, 0) + n
+            report["match_rules"] = dict(sorted(rules.items()))
+        if index is not None:
+            report["index"] = {"records": index.size, **index.options()}
+            report["normalize_cache"] = normalize_cache_stats()
+            cache = index.cache
+            if cache is not None:
+                report["match_cache"] = {
+                    "hits": cache.hits,
+                    "misses": cache.misses,
+                    "invalidated": cache.invalidated,
+                }
+        return report
+
+    def write(self, output_csv: str, index=None) -> str:
+        """Salva ``<output>.report.json`` (e ``<output>.prof`` se profilato)."""
+        base = os.path.splitext(output_csv)[0]
+        path = base + ".report.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(index), f, indent=2, ensure_ascii=False)
+        if self.profiler is not None:
+            self.profiler.dump_stats(base + ".prof")
+        return path
@@ -0,0 +1,121 @@
+"""
+Cache persistente delle risoluzioni listone ⇆ statistiche
+=========================================================
+
+Tra una giornata e l'altra il 95% dei nomi del listone non cambia: qui si
+salva, in un file SQLite, ``(squadra, nome) normalizzati → (id record, metodo)``
+così che i run successivi risolvano i giocatori noti con un lookup e mandino
+al matcher (fuzzy compreso) solo i nomi nuovi o modificati.
+
+La cache è legata all'impronta dei soli giocatori della sorgente (squadra +
+nome, più le opzioni di matching, vedi `PlayerIndex.names_fingerprint`): una
+nuova giornata che cambia solo i valori delle statistiche la riusa intera; le
+voci di quella sorgente vengono cancellate all'apertura solo se cambia
+l'elenco dei giocatori (o le opzioni), perché gli id dei record sono
+posizionali.
+
+Uso::
+
+    index = PlayerIndex.from_csv(VOTI_CSV, stats_fields)
+    with MatchCache.attach("data/match_cache.sqlite", index):
+        ...  # index.resolve(...) usa e alimenta la cache
+"""
+
+import os
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+Key = Tuple[str, str]
+Entry = Tuple[Optional[int], Optional[str]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    source      TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL  -- PlayerIndex.names_fingerprint()
+);
+CREATE TABLE IF NOT EXISTS matches (
+    source  TEXT NOT NULL,
+    team    TEXT NOT NULL,
+    name    TEXT NOT NULL,
+    record  INTEGER,           -- NULL = giocatore non trovato
+    method  TEXT,
+    PRIMARY KEY (source, team, name)
+);
+"""
+
+
+class MatchCache:
+    """Risoluzioni di una sorgente statistiche, caricate in memoria all'apertura."""
+
+    def __init__(self, path: str, source: str, fingerprint: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        self.invalidated = self._check_source(fingerprint)
+        self.entries: Dict[Key, Entry] = {
+            (team, name): (record, method)
+            for team, name, record, method in self.conn.execute(
+                "SELECT team, name, record, method FROM matches WHERE source = ?",
+                (self.source,),
+            )
+        }
+        self._pending: Dict[Key, Entry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def attach(cls, path: str, index) -> "MatchCache":
+        """Apre la cache per la sorgente di `index` e la collega all'indice."""
+        cache = cls(path, index.source, index.names_fingerprint())
+        index.cache = cache
+        return cache
+
+    def _check_source(self, fingerprint: str) -> bool:
+        """Cancella le voci se i giocatori della sorgente (o le opzioni) sono cambiati."""
+        row = self.conn.execute(
+            "SELECT fingerprint FROM sources WHERE source = ?", (self.source,)
+        ).fetchone()
+        if row is not None and row[0] == fingerprint:
+            return False
+        with self.conn:
+            self.conn.execute("DELETE FROM matches WHERE source = ?", (self.source,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources (source, fingerprint) VALUES (?, ?)",
+                (self.source, fingerprint),
+            )
+        return row is not None
+
+    def get(self, key: Key) -> Optional[Entry]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: Key, record: Optional[int], method: Optional[str]) -> None:
+        self.entries[key] = self._pending[key] = (record, method)
+
+    def flush(self) -> None:
+        """Scrive in un'unica transazione le risoluzioni nuove."""
+        if not self._pending:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO matches (source, team, name, record, method) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(self.source, t, n, r, m) for (t, n), (r, m) in self._pending.items()],
+            )
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self) -> "MatchCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,565 @@
+"""
+Motore di matching condiviso giocatore ⇆ statistiche
+===================================================
+
+Tutti gli script `unione*.py` devono risolvere lo stesso problema: dato un nome
+del listone (ed eventualmente la squadra) trovare la riga corrispondente in un
+CSV di statistiche (FBref, voti, ...). Qui l'indice viene costruito **una sola
+volta** e interrogato in batch con `PlayerIndex.match`.
+
+Chiavi dell'indice (sia a livello di lega sia per singola squadra):
+
+- **nome completo** normalizzato  → match esatto immediato
+- **cognome** (ultimo token)      → lista dei record con quel cognome
+- **iniziale + cognome**          → restringe la ricerca sul nome proprio
+
+Ogni risoluzione riporta anche il *metodo* usato, nella forma
+``"<ambito>:<regola>"`` con ambito ``team``/``global`` e regola tra
+``full``, ``first``, ``surname``, ``reversed``, ``fuzzy``.
+"""
+
+import hashlib
+import string
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .fuzzy import SurnameIndex
+from .ingest import read_columns
+from .teams import TeamAliases
+
+# =============================================================
+# NORMALIZZAZIONE
+# =============================================================
+
+# tabella di traduzione che rimuove tutta la punteggiatura (string.punctuation)
+_punct_tbl = str.maketrans("", "", string.punctuation)
+
+# I nomi si ripetono moltissimo tra stagioni e file: i normalizzatori sono
+# memoizzati con una LRU limitata (statistiche via `normalize_cache_stats`).
+NORMALIZE_CACHE_SIZE = 65536
+
+
+def _strip_accents(txt: str) -> str:
+    """Converte gli accenti (é → e) tenendo solo i caratteri base."""
+    # fast path: una stringa ASCII non ha caratteri combinanti → niente NFD
+    if txt.isascii():
+        return txt
+    return "".join(
+        ch for ch in unicodedata.normalize("NFD", txt) if unicodedata.category(ch) != "Mn"
+    )
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize(txt: Optional[str]) -> str:
+    """Rimuove accenti, punteggiatura, spazi multipli; lowercase.
+
+    È la normalizzazione usata dagli script con matching per squadra.
+    """
+    if not txt:
+        return ""
+    return " ".join(_strip_accents(txt).lower().translate(_punct_tbl).split())
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_name(name: Optional[str]) -> str:
+    """Rimuove solo accenti e spazi esterni; lowercase (punteggiatura invariata).
+
+    È la normalizzazione storica di `unione1.py` / `unione2.py`.
+    """
+    if name is None:
+        return ""
+    return _strip_accents(name.strip()).lower()
+
+
+def normalize_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss/dimensione delle cache dei normalizzatori."""
+    return {fn.__name__: fn.cache_info()._asdict() for fn in (normalize, normalize_name)}
+
+
+def normalize_cache_clear() -> None:
+    """Svuota le cache (es. tra due run nello stesso processo)."""
+    normalize.cache_clear()
+    normalize_name.cache_clear()
+
+
+def is_zero(val: Optional[str]) -> bool:
+    """True se la stringa rappresenta 0 oppure è vuota/None.
+
+    Alcuni dataset usano la virgola come separatore decimale → la convertiamo a
+    punto per `float()`.
+    """
+    if val is None:
+        return True
+    val = val.strip().replace(",", ".")
+    if val == "":
+        return True
+    try:
+        return float(val) == 0.0
+    except ValueError:
+        # non numerico → non è zero
+        return False
+
+
+def file_fingerprint(path: str, *extra: object) -> str:
+    """sha1 del contenuto del file più eventuali parametri che ne cambiano la lettura."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    for item in extra:
+        digest.update(repr(item).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# colonne del CSV statistiche con nome (prime tre) e squadra (ultime tre), in ordine di preferenza
+STATS_KEY_COLUMNS = ("player", "nome", "giocatore", "team", "squadra", "squad")
+# colonne con il ruolo (FBref: "pos", già tradotta dallo scraper), lette con `with_roles`
+ROLE_COLUMNS = ("pos", "ruolo", "role", "r")
+
+
+def iter_stats_rows(
+    path: str,
+    stats_fields: Sequence[str],
+    *,
+    delimiter: Optional[str] = None,
+    require_team: bool = True,
+) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+    """Righe del CSV statistiche come ``(nome, squadra, stats)``.
+
+    Le intestazioni vengono lette in lowercase; il nome può stare in
+    ``player``/``nome``/``giocatore`` e la squadra in ``team``/``squadra``/
+    ``squad``. Le statistiche mancanti o vuote valgono "0". Senza
+    `delimiter` separatore ed encoding vengono rilevati dal file, che può
+    essere anche compresso con gzip (vedi `ingest.py`); vengono lette solo
+    queste colonne.
+    """
+    columns = STATS_KEY_COLUMNS + tuple(stats_fields)
+    for values in read_columns(path, columns, delimiter=delimiter):
+        name_raw = values[0] or values[1] or values[2]
+        if not name_raw:
+            continue
+        team_raw = values[3] or values[4] or values[5]
+        if require_team and not team_raw:
+            continue
+        stats = {field: value if value.strip() else "0" for field, value in zip(stats_fields, values[6:])}
+        yield name_raw, team_raw, stats
+
+# =============================================================
+# STRUTTURE DELL'INDICE
+# =============================================================
+
+
+class Record:
+    """Vista di un record statistiche, creata solo per i giocatori risolti.
+
+    L'indice tiene i record in colonne (vedi `PlayerIndex`); questa è la
+    forma restituita dal matching, con le statistiche come dizionario.
+    """
+
+    __slots__ = ("id", "first", "last", "full", "team", "stats")
+
+    def __init__(self, id: int, first: str, last: str, full: str, team: str, stats: Dict[str, str]) -> None:
+        self.id = id          # posizione nel file statistiche
+        self.first = first    # nome normalizzato (solo primo token)
+        self.last = last      # cognome / ultimo token
+        self.full = full
+        self.team = team
+        self.stats = stats
+
+    def __repr__(self) -> str:
+        return f"Record({self.id}, {self.full!r}, team={self.team!r})"
+
+
+# valore delle mappe: un id, o una lista di id se la chiave è condivisa (omonimi)
+Ids = Union[int, List[int]]
+
+
+def first_id(ids: Ids) -> int:
+    return ids if type(ids) is int else ids[0]
+
+
+def all_ids(ids: Ids) -> Sequence[int]:
+    return (ids,) if type(ids) is int else ids
+
+
+def _push(d: Dict, key, rec_id: int) -> None:
+    cur = d.get(key)
+    if cur is None:
+        d[key] = rec_id
+    elif type(cur) is int:
+        d[key] = [cur, rec_id]
+    else:
+        cur.append(rec_id)
+
+
+class NameMap:
+    """Chiavi di lookup per un gruppo di record (tutta la lega o una squadra).
+
+    I valori sono id di riga del `PlayerIndex` (vedi `Ids`), non record.
+    """
+
+    __slots__ = ("full", "last", "initial", "fuzzy")
+
+    def __init__(self) -> None:
+        self.full: Dict[str, Ids] = {}                 # "nome cognome" → id
+        self.last: Dict[str, Ids] = {}                 # cognome → id
+        self.initial: Dict[Tuple[str, str], Ids] = {}  # (iniziale, cognome) → id
+        self.fuzzy: Optional[SurnameIndex] = None       # costruito al primo fuzzy
+
+    def add(self, rec_id: int, first: str, last: str, full: str) -> None:
+        _push(self.full, full, rec_id)
+        if last not in self.last:
+            self.fuzzy = None  # nuovo cognome → indice fuzzy da ricostruire
+        _push(self.last, last, rec_id)
+        _push(self.initial, (first[:1], last), rec_id)
+
+    def __contains__(self, last: str) -> bool:
+        return last in self.last
+
+    def __len__(self) -> int:
+        return len(self.last)
+
+
+# Regole di matching di unione1/unione2 (e ``multi --match exact``): match esatto
+# sul nome proprio, niente squadra né fuzzy. Opzioni di `PlayerIndex.from_csv`.
+MATCH_OPTIONS = dict(
+    normalizer=normalize_name,
+    require_team=False,
+    prefix_first=False,
+    reverse_tokens=False,
+    fuzzy_cutoff=None,
+    team_scoped=False,
+)
+
+
+class PlayerIndex:
+    """Indice dei giocatori di un CSV statistiche, costruito una volta sola.
+
+    Le opzioni riproducono le varianti di matching dei vari script:
+
+    - ``prefix_first``: il nome proprio del record deve solo *iniziare* con quello
+      del listone (nomi lunghi/abbreviati); se False serve l'uguaglianza.
+    - ``reverse_tokens``: prova anche l'ordine (cognome, nome).
+    - ``fuzzy_cutoff``: soglia difflib per il fallback sul cognome (None = off).
+    - ``team_scoped``: cerca prima nella squadra, poi in tutta la lega.
+    - ``team_aliases``: grafie di squadra → id (vedi `teams.TeamAliases`);
+      "Inter" e "Internazionale" finiscono nella stessa mappa di squadra.
+
+    I record sono memorizzati per colonne (una lista per campo, indicizzata
+    dall'id di riga) con stringhe internate: nomi, squadre e valori ripetuti
+    esistono una volta sola. Le mappe contengono solo id; `record(id)`
+    ricostruisce il `Record` quando serve.
+    """
+
+    def __init__(
+        self,
+        stats_fields: Iterable[str],
+        *,
+        normalizer: Callable[[Optional[str]], str] = normalize,
+        prefix_first: bool = True,
+        reverse_tokens: bool = True,
+        fuzzy_cutoff: Optional[float] = 0.78,
+        team_scoped: bool = True,
+        team_aliases: Optional[TeamAliases] = None,
+    ) -> None:
+        self.stats_fields: List[str] = list(stats_fields)
+        self.normalizer = normalizer
+        self.prefix_first = prefix_first
+        self.reverse_tokens = reverse_tokens
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.team_scoped = team_scoped
+        self.team_aliases = team_aliases if team_aliases is not None else TeamAliases(normalizer)
+
+        self.team_map: Dict[int, NameMap] = {}  # id squadra → chiavi della squadra
+        self.global_map = NameMap()              # chiavi di tutta la lega
+        # colonne dei record (id di riga = posizione)
+        self.firsts: List[str] = []
+        self.lasts: List[str] = []
+        self.fulls: List[str] = []
+        self.teams: List[str] = []
+        self.values: List[Tuple[str, ...]] = []  # statistiche nell'ordine di stats_fields
+        self.roles: List[str] = []               # ruolo grezzo ("" se non letto, vedi `from_csv`)
+        self.size = 0
+        # impronta di file statistiche + opzioni (vedi `from_csv`)
+        self.source: str = ""
+        self.fingerprint: str = ""
+        # (squadra, nome completo) normalizzati → (record, metodo) già risolti
+        self._resolved: Dict[Tuple[str, str], Tuple[Optional[Record], Optional[str]]] = {}
+        # cache persistente tra run (es. match_cache.MatchCache), opzionale
+        self.cache = None
+
+    def options(self) -> Dict[str, object]:
+        """Opzioni che influenzano il risultato del matching."""
+        return {
+            "stats_fields": self.stats_fields,
+            "normalizer": getattr(self.normalizer, "__name__", repr(self.normalizer)),
+            "prefix_first": self.prefix_first,
+            "reverse_tokens": self.reverse_tokens,
+            "fuzzy_cutoff": self.fuzzy_cutoff,
+            "team_scoped": self.team_scoped,
+            "team_aliases": self.team_aliases.fingerprint(),
+        }
+
+    # ---------------------------------------------------------
+    # Costruzione
+    # ---------------------------------------------------------
+
+    def add_record(self, name_raw: str, team_raw: str, stats: Dict[str, str], role: str = "") -> Optional[int]:
+        """Normalizza nome/squadra e inserisce il record; ritorna il suo id."""
+        tokens = self.normalizer(name_raw).split()
+        if not tokens:
+            return None
+        intern = sys.intern
+        first, last = intern(tokens[0]), intern(tokens[-1])
+        full = intern(" ".join(tokens))
+        team = intern(self.normalizer(team_raw)) if team_raw else ""
+        rec_id = self.size
+
+        self.firsts.append(first)
+        self.lasts.append(last)
+        self.fulls.append(full)
+        self.teams.append(team)
+        self.values.append(tuple(intern(stats[f]) for f in self.stats_fields))
+        self.roles.append(intern(role))
+        if team:
+            tid = self.team_aliases.team_id(team)
+            nmap = self.team_map.get(tid)
+            if nmap is None:
+                nmap = self.team_map[tid] = NameMap()
+            nmap.add(rec_id, first, last, full)
+        self.global_map.add(rec_id, first, last, full)
+        self.size += 1
+        self._resolved.clear()  # nuovi record → le risoluzioni precedenti non valgono più
+        return rec_id
+
+    def record(self, rec_id: int) -> Record:
+        """Ricostruisce il record `rec_id` dalle colonne."""
+        return Record(
+            rec_id,
+            self.firsts[rec_id],
+            self.lasts[rec_id],
+            self.fulls[rec_id],
+            self.teams[rec_id],
+            dict(zip(self.stats_fields, self.values[rec_id])),
+        )
+
+    def find_key(self, team: str, full: str) -> Optional[int]:
+        """Id del primo record con questa (squadra, nome completo) normalizzati."""
+        nmap = self.team_map.get(self.team_aliases.team_id(team)) if team else self.global_map
+        ids = nmap.full.get(full) if nmap is not None else None
+        return first_id(ids) if ids is not None else None
+
+    def names_fingerprint(self) -> str:
+        """Impronta dei soli giocatori (squadra + nome), esclusi i valori.
+
+        Cambia quando si aggiungono/tolgono giocatori, non quando cambiano
+        le statistiche: è ciò da cui dipende il risultato del matching.
+        """
+        digest = hashlib.sha1(repr(self.options()).encode("utf-8"))
+        for team, full in zip(self.teams, self.fulls):
+            digest.update(f"{team}\t{full}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    @classmethod
+    def from_csv(
+        cls,
+        path: str,
+        stats_fields: Iterable[str],
+        *,
+        delimiter: Optional[str] = None,
+        require_team: bool = True,
+        with_roles: bool = False,
+        **options,
+    ) -> "PlayerIndex":
+        """Legge il CSV statistiche (vedi `iter_stats_rows`) e costruisce l'indice.
+
+        Con `with_roles` legge nella stessa passata anche il ruolo del record
+        (`ROLE_COLUMNS`, prima colonna valorizzata) in `roles`.
+        """
+        index = cls(stats_fields, **options)
+        index.source = path
+        index.fingerprint = file_fingerprint(path, index.options(), delimiter, require_team)
+        fields = index.stats_fields + list(ROLE_COLUMNS) if with_roles else index.stats_fields
+        for name_raw, team_raw, stats in iter_stats_rows(
+            path, fields, delimiter=delimiter, require_team=require_team
+        ):
+            role = next((stats[c] for c in ROLE_COLUMNS if stats[c] != "0"), "") if with_roles else ""
+            index.add_record(name_raw, team_raw, stats, role)
+        return index
+
+    # ---------------------------------------------------------
+    # Matching
+    # ---------------------------------------------------------
+
+    def _pick(self, nmap: NameMap, first: str, last: str) -> Tuple[int, str]:
+        """Record con cognome `last` il cui nome proprio corrisponde a `first`."""
+        firsts = self.firsts
+        for rec_id in all_ids(nmap.initial.get((first[:1], last), ())):
+            if firsts[rec_id].startswith(first) if self.prefix_first else firsts[rec_id] == first:
+                return rec_id, "first"
+        # nessun match sul nome → primo record con quel cognome
+        return first_id(nmap.last[last]), "surname"
+
+    def fuzzy_one(self, nmap: NameMap, target: str) -> Optional[str]:
+        """Ritorna il cognome della mappa più simile a `target`.
+
+        Stesso risultato di ``difflib.get_close_matches(..., n=1)``, ma tramite
+        l'indice a bigrammi della mappa (vedi `fuzzy.py`).
+        """
+        if nmap.fuzzy is None:
+            nmap.fuzzy = SurnameIndex(nmap.last, cutoff=self.fuzzy_cutoff)
+        return nmap.fuzzy.best(target)
+
+    def locate_id(self, nmap: NameMap, tokens: Sequence[str]) -> Tuple[Optional[int], Optional[str]]:
+        """Cerca un record in una sotto-mappa (squadra o lega) → ``(id, regola)``.
+
+        1. nome completo identico;
+        2. (nome, cognome) e, se abilitato, (cognome, nome);
+        3. fuzzy sul cognome.
+        """
+        if not tokens:
+            return None, None
+        exact = nmap.full.get(" ".join(tokens))
+        if exact is not None:
+            return first_id(exact), "full"
+
+        first_token, last_token = tokens[0], tokens[-1]
+        if last_token in nmap:
+            return self._pick(nmap, first_token, last_token)
+        if self.reverse_tokens and len(tokens) > 1 and first_token in nmap:
+            return self._pick(nmap, last_token, first_token)[0], "reversed"
+
+        if self.fuzzy_cutoff is None:
+            return None, None
+        best_last = self.fuzzy_one(nmap, last_token)
+        return (first_id(nmap.last[best_last]), "fuzzy") if best_last else (None, None)
+
+    def locate(self, nmap: NameMap, tokens: Sequence[str]) -> Tuple[Optional[Record], Optional[str]]:
+        """Come `locate_id`, con il record ricostruito."""
+        rec_id, rule = self.locate_id(nmap, tokens)
+        return (self.record(rec_id) if rec_id is not None else None), rule
+
+    def find_in_map(self, nmap: NameMap, tokens: Sequence[str]) -> Optional[Record]:
+        """Come `locate`, senza la regola usata."""
+        return self.locate(nmap, tokens)[0]
+
+    def find_id(self, team_norm: str, tokens: Sequence[str]) -> Tuple[Optional[int], Optional[str]]:
+        """Prima cerca nella squadra (evita omonimi), poi in tutta la lega → ``(id, metodo)``.
+
+        La squadra passa dall'indice alias: grafie diverse della stessa squadra
+        usano la stessa mappa.
+        """
+        nmap = None
+        if self.team_scoped and team_norm:
+            nmap = self.team_map.get(self.team_aliases.team_id(team_norm))
+        if nmap is not None:
+            rec_id, rule = self.locate_id(nmap, tokens)
+            if rec_id is not None:
+                return rec_id, f"team:{rule}"
+        rec_id, rule = self.locate_id(self.global_map, tokens)
+        return (rec_id, f"global:{rule}") if rec_id is not None else (None, None)
+
+    def find_match(self, team_norm: str, tokens: Sequence[str]) -> Tuple[Optional[Record], Optional[str]]:
+        """Come `find_id`, con il record ricostruito."""
+        rec_id, method = self.find_id(team_norm, tokens)
+        return (self.record(rec_id) if rec_id is not None else None), method
+
+    def find_record(self, team_norm: str, tokens: Sequence[str]) -> Optional[Record]:
+        """Come `find_match`, senza il metodo usato."""
+        return self.find_match(team_norm, tokens)[0]
+
+    def query(self, name_raw: Optional[str], team_raw: Optional[str] = "") -> Tuple[str, Tuple[str, ...]]:
+        """Normalizza una riga del listone in ``(squadra, token del nome)``."""
+        team_norm = self.normalizer(team_raw) if self.team_scoped and team_raw else ""
+        return team_norm, tuple(self.normalizer(name_raw).split())
+
+    @staticmethod
+    def _key(query: Tuple[str, Tuple[str, ...]]) -> Tuple[str, str]:
+        team_norm, tokens = query
+        return team_norm, " ".join(tokens)
+
+    def _from_cache(self, key: Tuple[str, str]) -> Optional[Tuple[Optional[Record], Optional[str]]]:
+        """Risoluzione dalla cache persistente (se collegata), già memorizzata."""
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is None:
+            return None
+        rec_id, method = cached
+        hit = (self.record(rec_id) if rec_id is not None else None), method
+        self._resolved[key] = hit
+        return hit
+
+    def remember(
+        self, query: Tuple[str, Tuple[str, ...]], rec_id: Optional[int], method: Optional[str]
+    ) -> Tuple[Optional[Record], Optional[str]]:
+        """Registra una risoluzione calcolata altrove (es. in un worker)."""
+        key = self._key(query)
+        hit = (self.record(rec_id) if rec_id is not None else None), method
+        self._resolved[key] = hit
+        if self.cache is not None:
+            self.cache.put(key, rec_id, method)
+        return hit
+
+    def resolve_match(self, query: Tuple[str, Tuple[str, ...]]) -> Tuple[Optional[Record], Optional[str]]:
+        """Risolve una query già normalizzata → ``(record, metodo)``.
+
+        Le query ripetute costano O(1): prima la memoria del processo, poi la
+        cache persistente (se collegata), solo alla fine il matcher.
+        """
+        key = self._key(query)
+        hit = self._resolved.get(key) or self._from_cache(key)
+        if hit is None:
+            hit = self.remember(query, *self.find_id(*query))
+        return hit
+
+    def unresolved(self, queries: Iterable[Tuple[str, Tuple[str, ...]]]) -> List[Tuple[str, Tuple[str, ...]]]:
+        """Query distinte che dovranno passare dal matcher (nell'ordine di arrivo).
+
+        Quelle già in memoria o nella cache persistente vengono escluse.
+        """
+        seen = set()
+        todo = []
+        for query in queries:
+            key = self._key(query)
+            if key in seen or key in self._resolved or self._from_cache(key) is not None:
+                continue
+            seen.add(key)
+            todo.append(query)
+        return todo
+
+    def build_fuzzy(self) -> None:
+        """Costruisce subito gli indici fuzzy di tutte le mappe.
+
+        Prima di un fork i worker li ereditano già pronti invece di
+        ricostruirseli ciascuno.
+        """
+        if self.fuzzy_cutoff is None:
+            return
+        for nmap in [self.global_map, *self.team_map.values()]:
+            if nmap.fuzzy is None:
+                nmap.fuzzy = SurnameIndex(nmap.last, cutoff=self.fuzzy_cutoff)
+
+    def __getstate__(self) -> Dict[str, object]:
+        # snapshot per i worker: niente connessione alla cache né risoluzioni
+        state = self.__dict__.copy()
+        state["cache"] = None
+        state["_resolved"] = {}
+        return state
+
+    def resolve(self, query: Tuple[str, Tuple[str, ...]]) -> Optional[Record]:
+        """Risolve una query già normalizzata (solo il record)."""
+        return self.resolve_match(query)[0]
+
+    def lookup(self, name_raw: Optional[str], team_raw: Optional[str] = "") -> Optional[Record]:
+        """Risolve un singolo giocatore del listone."""
+        return self.resolve(self.query(name_raw, team_raw))
+
+    def match(self, rows: Iterable[Tuple[Optional[str], Optional[str]]]) -> Iterator[Optional[Record]]:
+        """Risolve in batch coppie ``(nome, squadra)``, nello stesso ordine.
+
+        Le coppie ripetute (stesso giocatore in più file/righe) vengono risolte
+        una volta sola.
+        """
+        for name_raw, team_raw in rows:
+            yield self.lookup(name_raw, team_raw)
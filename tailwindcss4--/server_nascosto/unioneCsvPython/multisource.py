@@ -0,0 +1,239 @@
+"""
+Arricchimento multi-sorgente in un solo passaggio
+=================================================
+
+La catena storica (``unione2`` → ``unione1``/``voti`` → ``squadra``) rilegge
+ogni volta l'intero listone, rinormalizza tutti i nomi e scrive un CSV
+intermedio per script. Qui il listone viene letto **una volta**, ogni riga
+viene normalizzata una volta (per tipo di normalizzazione) e interroga gli
+indici di tutte le sorgenti, poi il file finale viene scritto una volta.
+
+Ogni sorgente ha le sue colonne e la sua regola (``--mode``):
+
+- ``existing``  aggiorna solo le colonne già presenti nel listone (unione2);
+- ``overwrite`` crea le colonne a "0" e le sovrascrive se il giocatore è
+  trovato (unione1);
+- ``fill``      cerca solo le righe con qualche colonna a zero
+  (unionePerVoti), o con ``--only-if-zero COL,...`` solo quelle con le
+  colonne indicate tutte a zero (squadra); nelle righe cercate le colonne
+  mancanti partono da "0", nelle altre restano vuote come negli script.
+
+e il suo matching (``--match``): ``exact`` (regole di unione1/unione2) o
+``team`` (squadra, ordine invertito, fuzzy: regole di squadra/voti).
+
+Le sorgenti si applicano nell'ordine dato: una sorgente successiva vede i
+valori scritti dalle precedenti (precedenza = ordine). Le opzioni dopo un
+``--source`` valgono per quella sorgente::
+
+    python -m unioneCsvPython multi --quote listone_serieAstats.csv \\
+        --source stats-serieA-2024-2025.csv --fields partite,minuti,goal \\
+            --match exact --mode existing \\
+        --source voti_2024_25.csv --delimiter ';' --fields Pv,Mv,Fm,Au \\
+            --only-if-zero partite,minuti
+"""
+
+import argparse
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .cli import field_list
+from .instrumentation import RunReport
+from .matching import MATCH_OPTIONS, PlayerIndex, Record, is_zero, normalize
+from .pipeline import number_rows, open_listone, output_path, write_rows
+from .store import stored
+from .teams import TeamAliases
+
+MODES = ("existing", "overwrite", "fill")
+MATCHES = ("exact", "team")
+
+# catena storica: statistiche FBref (unione2) + voti cercando per squadra (squadra)
+DEFAULT_QUOTE = "listone_serieAstats.csv"
+DEFAULT_SOURCES = [
+    {"path": "stats-serieA-2024-2025.csv",
+     "fields": ["partite", "minuti", "goal", "assist", "rigori", "gialli", "rossi"],
+     "match": "exact", "mode": "existing"},
+    {"path": "voti_2024_25.csv", "fields": ["Pv", "Mv", "Fm", "Au"],
+     "match": "team", "mode": "fill", "only_if_zero": ["partite", "minuti"]},
+]
+
+
+class Source:
+    """Un file statistiche con le sue colonne, la sua regola e il suo indice."""
+
+    def __init__(
+        self,
+        path: str,
+        fields: Sequence[str],
+        *,
+        delimiter: Optional[str] = None,
+        match: str = "team",
+        mode: str = "fill",
+        only_if_zero: Optional[Sequence[str]] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Regola sconosciuta: {mode}")
+        if match not in MATCHES:
+            raise ValueError(f"Matching sconosciuto: {match}")
+        self.path = path
+        self.name = os.path.basename(path)
+        self.fields: List[str] = list(fields)
+        self.delimiter = delimiter
+        self.match = match
+        self.mode = mode
+        self.only_if_zero = list(only_if_zero) if only_if_zero else None
+        self.index: Optional[PlayerIndex] = None
+        self.present: List[str] = []  # per "existing": colonne presenti nel listone
+
+    def build(self, team_aliases: Optional[TeamAliases] = None) -> PlayerIndex:
+        if self.match == "exact":
+            self.index = PlayerIndex.from_csv(self.path, self.fields, delimiter=self.delimiter, **MATCH_OPTIONS)
+        else:
+            self.index = PlayerIndex.from_csv(self.path, self.fields, delimiter=self.delimiter,
+                                              team_aliases=team_aliases)
+        return self.index
+
+    def output_fields(self, listone_fields: Sequence[str]) -> List[str]:
+        """Colonne che la sorgente aggiunge al listone."""
+        self.present = [f for f in self.fields if f in listone_fields]
+        if self.mode == "existing":
+            return []
+        return [f for f in self.fields if f not in listone_fields]
+
+    # ------------------------------------------------------------ per riga
+    def needs_match(self, row: dict) -> bool:
+        if self.mode != "fill":
+            return True
+        if self.only_if_zero:
+            return all(is_zero(row.get(f)) for f in self.only_if_zero)
+        return any(is_zero(row.get(f)) for f in self.fields)
+
+    def prepare(self, row: dict) -> None:
+        """Prima del match, su tutte le righe: "overwrite" azzera le colonne (unione1)."""
+        if self.mode == "overwrite":
+            for f in self.fields:
+                row[f] = "0"
+
+    def apply(self, row: dict, record: Optional[Record]) -> None:
+        """Dopo il match, solo sulle righe cercate (`needs_match`)."""
+        if self.mode == "fill":
+            # come pipeline.stats_filler: le righe saltate non ricevono gli "0"
+            for f in self.fields:
+                row.setdefault(f, "0")
+        if record is None:
+            return
+        if self.mode == "existing":
+            for f in self.present:
+                row[f] = record.stats[f]
+        else:
+            row.update(record.stats)
+
+
+def enrich_all(rows: Iterable[dict], sources: Sequence[Source], report: Optional[RunReport] = None) -> Iterator[dict]:
+    """Applica tutte le sorgenti a ogni riga; la query si calcola una volta per normalizzazione."""
+    for row in rows:
+        name_raw = row.get("Nome") or row.get("nome")
+        team_raw = row.get("Squadra") or row.get("squadra")
+        queries: Dict[tuple, tuple] = {}
+        for source in sources:
+            source.prepare(row)
+            index = source.index
+            if not source.needs_match(row):
+                method = "skipped"
+            else:
+                key = (index.normalizer, index.team_scoped)
+                query = queries.get(key)
+                if query is None:
+                    query = queries[key] = index.query(name_raw, team_raw)
+                record, method = index.resolve_match(query)
+                source.apply(row, record)
+            if report is not None:
+                report.count(f"match:{source.name}", method or "not_found")
+        yield row
+
+
+def run(args) -> str:
+    report = RunReport("multisource").start()
+    sources = [Source(**spec) for spec in args.sources]
+    aliases = TeamAliases.load(args.team_aliases, normalize) if args.team_aliases else None
+
+    with report.stage("index"):
+        for source in sources:
+            source.build(aliases)
+
+    with open_listone(args.quote, args.quote_delimiter) as (original_fields, rows):
+        fieldnames = ["id"] + original_fields
+        for source in sources:
+            fieldnames += [f for f in source.output_fields(original_fields) if f not in fieldnames]
+
+        enriched = report.timed_iter("enrich", enrich_all(report.timed_iter("read", rows), sources, report))
+        filepath = output_path(args.output_dir, args.prefix)
+        with report.stage("write"):
+            write_rows(stored(number_rows(enriched), args, fieldnames), filepath, fieldnames,
+                       args.output_delimiter)
+
+    report.stop()
+    report_path = report.write(filepath)
+    print(f"✅ File creato: {filepath} ({len(sources)} sorgenti)")
+    print(f"📊 Report: {report_path}")
+    return filepath
+
+
+# =============================================================
+# RIGA DI COMANDO
+# =============================================================
+
+
+class _SourceOption(argparse.Action):
+    """``--source`` apre una nuova sorgente; le altre opzioni modificano l'ultima."""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        sources = list(getattr(namespace, "sources", None) or [])
+        if self.dest == "path":
+            sources.append({"path": values})
+        elif not sources:
+            parser.error(f"{option_string} va indicato dopo un --source")
+        else:
+            sources[-1][self.dest] = values
+        namespace.sources = sources
+
+
+def main(argv: Optional[List[str]] = None) -> str:
+    parser = argparse.ArgumentParser(
+        prog="unioneCsvPython multi",
+        description="Arricchisce il listone con più sorgenti statistiche in un solo passaggio.",
+    )
+    parser.add_argument("--quote", default=DEFAULT_QUOTE, help="listone da arricchire (default: %(default)s)")
+    parser.add_argument("--quote-delimiter", help="separatore del listone (default: rilevato dal file)")
+
+    group = parser.add_argument_group("sorgenti (le opzioni seguono il loro --source)")
+    group.add_argument("--source", dest="path", action=_SourceOption, default=argparse.SUPPRESS,
+                       metavar="PATH", help="CSV statistiche (ripetibile; default: catena unione2 + squadra)")
+    group.add_argument("--fields", type=field_list, action=_SourceOption, default=argparse.SUPPRESS,
+                       help="colonne della sorgente separate da virgola")
+    group.add_argument("--delimiter", action=_SourceOption, default=argparse.SUPPRESS,
+                       help="separatore della sorgente (default: rilevato dal file)")
+    group.add_argument("--match", choices=MATCHES, action=_SourceOption, default=argparse.SUPPRESS,
+                       help="exact = regole di unione1/2, team = squadra + fuzzy (default: team)")
+    group.add_argument("--mode", choices=MODES, action=_SourceOption, default=argparse.SUPPRESS,
+                       help="regola di scrittura delle colonne (default: fill)")
+    group.add_argument("--only-if-zero", type=field_list, action=_SourceOption, default=argparse.SUPPRESS,
+                       metavar="COLS", help="con fill: cerca solo le righe con queste colonne a zero")
+
+    parser.add_argument("--team-aliases", metavar="PATH", help="CSV alias;squadra aggiuntivi (vedi teams.py)")
+    parser.add_argument("--output-delimiter", default=";", help="separatore del CSV di output (default: %(default)r)")
+    parser.add_argument("--output-dir", default="data", help="cartella di output (default: %(default)s)")
+    parser.add_argument("--prefix", default="listone_enriched",
+                        help="prefisso del file di output, seguito dal timestamp (default: %(default)s)")
+    parser.add_argument("--store", metavar="PATH", help="scrive il risultato anche nel database SQLite (store.py)")
+    parser.add_argument("--season", help="stagione delle righe nel --store (default: quella in corso)")
+    args = parser.parse_args(argv)
+
+    args.sources = getattr(args, "sources", None) or [dict(spec) for spec in DEFAULT_SOURCES]
+    for spec in args.sources:
+        if not spec.get("fields"):
+            parser.error(f"--fields mancante per la sorgente {spec['path']}")
+    return run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Matching in parallelo su più processi
+=====================================
+
+Il matcher (soprattutto il fallback fuzzy) è CPU puro Python: con
+``--workers N`` le query *distinte* ancora da risolvere vengono divise in
+blocchi e risolte in un `ProcessPoolExecutor`.
+
+- L'indice è di sola lettura e arriva ai worker **una volta sola**: con il
+  fork viene ereditato dal processo padre (indici fuzzy compresi, costruiti
+  prima di creare il pool); dove il fork non c'è viene passato come snapshot
+  all'avvio di ciascun worker (`PlayerIndex.__getstate__`). Ai task viaggiano
+  solo le query e tornano solo ``(id record, metodo)``.
+- I risultati vengono registrati nell'indice (`PlayerIndex.remember`, cache
+  persistente compresa); poi le righe attraversano la pipeline normale
+  nell'ordine originale, quindi id e output sono identici al run seriale.
+
+Uso::
+
+    pairs = normalize_rows(rows, index, need_update)
+    pairs = resolve_in_pool(pairs, index, workers=8)
+    enriched = enrich_rows(match_rows(pairs, index))
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .matching import PlayerIndex
+from .pipeline import Query
+
+# sotto questa soglia avviare i processi costa più del matching stesso
+MIN_PARALLEL_QUERIES = 512
+CHUNK_SIZE = 256
+
+# indice del worker, impostato una volta da `_init_worker`
+_INDEX: Optional[PlayerIndex] = None
+
+
+def _init_worker(index: PlayerIndex) -> None:
+    global _INDEX
+    _INDEX = index
+
+
+def _match_chunk(chunk: Sequence[Query]) -> List[Tuple[Optional[int], Optional[str]]]:
+    """Risolve un blocco di query nel worker → ``(id record, metodo)``."""
+    return [_INDEX.find_id(team_norm, tokens) for team_norm, tokens in chunk]
+
+
+def _mp_context():
+    # fork: l'indice è condiviso copy-on-write, niente serializzazione
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def resolve_parallel(
+    index: PlayerIndex,
+    queries: Iterable[Query],
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    """Risolve in parallelo le query non ancora note; ritorna quante erano."""
+    todo = index.unresolved(queries)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(todo) < MIN_PARALLEL_QUERIES:
+        for query in todo:
+            index.resolve_match(query)
+        return len(todo)
+
+    index.build_fuzzy()
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=_mp_context(),
+        initializer=_init_worker,
+        initargs=(index,),
+    ) as pool:
+        # map conserva l'ordine dei blocchi
+        for chunk, results in zip(chunks, pool.map(_match_chunk, chunks)):
+            for query, (rec_id, method) in zip(chunk, results):
+                index.remember(query, rec_id, method)
+    return len(todo)
+
+
+def resolve_in_pool(
+    pairs: Iterable[Tuple[dict, Optional[Query]]],
+    index: PlayerIndex,
+    workers: Optional[int] = None,
+) -> List[Tuple[dict, Optional[Query]]]:
+    """Stadio della pipeline: bufferizza le righe e ne pre-risolve le query.
+
+    Ritorna le coppie ``(riga, query)`` nello stesso ordine; il successivo
+    `match_rows` le trova tutte già risolte.
+    """
+    pairs = list(pairs)
+    resolve_parallel(index, (q for _, q in pairs if q is not None), workers)
+    return pairs
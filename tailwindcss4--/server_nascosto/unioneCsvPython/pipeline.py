@@ -0,0 +1,258 @@
+"""
+Pipeline di arricchimento in streaming
+======================================
+
+Ogni riga del listone attraversa una catena di generatori e viene scritta non
+appena è pronta: nessuna lista di righe in memoria, l'output parte subito e la
+memoria resta costante rispetto alla dimensione del file quotazioni.
+
+    read → normalize → match → enrich → number → write
+
+Esempio::
+
+    with open_listone(QUOTE_CSV) as (fields, rows):
+        pairs = normalize_rows(rows, index)
+        enriched = enrich_rows(match_rows(pairs, index), apply_stats)
+        write_rows(number_rows(enriched), output_path("data"), ["id"] + fields)
+
+`run_enrichment` è il run completo degli script ``squadra`` e ``voti`` (indice,
+cache, ``--incremental``, ``--out-of-core``, ``--workers``, ``--assign``): lo
+script sceglie solo quali righe cercare e come riempirle.
+"""
+
+import csv
+import os
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .ingest import open_csv
+from .instrumentation import RunReport
+from .match_cache import MatchCache
+from .matching import PlayerIndex, Record, normalize
+from .store import stored
+from .teams import TeamAliases
+
+Query = Tuple[str, Tuple[str, ...]]
+
+# =============================================================
+# READ
+# =============================================================
+
+
+def read_listone(f, delimiter: str = ";") -> Tuple[List[str], Iterator[dict]]:
+    """Restituisce l'header (senza colonne id) e un generatore di righe.
+
+    La vecchia colonna ``Id`` viene rimossa: l'id verrà rigenerato da
+    `number_rows`.
+    """
+    reader = csv.DictReader(f, delimiter=delimiter)
+    header = reader.fieldnames or []
+    id_cols = [c for c in header if c and c.lower() == "id"]
+    fields = [c for c in header if c and c.lower() != "id"]
+
+    def rows() -> Iterator[dict]:
+        for row in reader:
+            for c in id_cols:
+                row.pop(c, None)
+            yield row
+
+    return fields, rows()
+
+
+@contextmanager
+def open_listone(path: str, delimiter: Optional[str] = None) -> Iterator[Tuple[List[str], Iterator[dict]]]:
+    """`read_listone` sul file `path`: separatore ed encoding rilevati se non indicati.
+
+    Il file può essere compresso con gzip; vedi `ingest.open_csv`.
+    """
+    with open_csv(path, delimiter=delimiter) as (dialect, lines):
+        yield read_listone(lines, dialect.delimiter)
+
+# =============================================================
+# NORMALIZE → MATCH → ENRICH
+# =============================================================
+
+
+def normalize_rows(
+    rows: Iterable[dict],
+    index: PlayerIndex,
+    needs_match: Optional[Callable[[dict], bool]] = None,
+) -> Iterator[Tuple[dict, Optional[Query]]]:
+    """Associa a ogni riga la sua query normalizzata (None = da non cercare)."""
+    for row in rows:
+        if needs_match is not None and not needs_match(row):
+            yield row, None
+            continue
+        name_raw = row.get("Nome") or row.get("nome")
+        team_raw = row.get("Squadra") or row.get("squadra")
+        yield row, index.query(name_raw, team_raw)
+
+
+def match_rows(
+    pairs: Iterable[Tuple[dict, Optional[Query]]],
+    index: PlayerIndex,
+    report=None,
+) -> Iterator[Tuple[dict, Optional[Query], Optional[Record]]]:
+    """Risolve le query sull'indice → ``(riga, query, record o None)``.
+
+    Con un `instrumentation.RunReport` conta le righe per metodo di match
+    (``team:full``, ``global:fuzzy``, …, ``not_found``, ``skipped``).
+    """
+    for row, query in pairs:
+        if query is None:
+            record, method = None, "skipped"
+        else:
+            record, method = index.resolve_match(query)
+        if report is not None:
+            report.count("match", method or "not_found")
+        yield row, query, record
+
+
+def apply_stats(row: dict, record: Optional[Record]) -> None:
+    """Copia tutte le statistiche del record nella riga (se trovato)."""
+    if record:
+        row.update(record.stats)
+
+
+def stats_filler(stats_fields: Sequence[str]) -> Callable[[dict, Optional[Record]], None]:
+    """Come `apply_stats`, ma i campi statistici mancanti valgono sempre "0"."""
+    def fill_stats(row: dict, record: Optional[Record]) -> None:
+        for f in stats_fields:
+            row.setdefault(f, "0")
+        if record:
+            row.update(record.stats)
+    return fill_stats
+
+
+def enrich_rows(
+    matched: Iterable[Tuple[dict, Optional[Query], Optional[Record]]],
+    apply: Callable[[dict, Optional[Record]], None] = apply_stats,
+) -> Iterator[dict]:
+    """Applica `apply(riga, record)` alle sole righe che sono state cercate."""
+    for row, query, record in matched:
+        if query is not None:
+            apply(row, record)
+        yield row
+
+# =============================================================
+# NUMBER → WRITE
+# =============================================================
+
+
+def number_rows(rows: Iterable[dict], start: int = 1) -> Iterator[dict]:
+    """Assegna l'id sequenziale (1..N) nell'ordine di uscita."""
+    for idx, row in enumerate(rows, start):
+        row["id"] = str(idx)
+        yield row
+
+
+def output_path(output_dir: str, prefix: str = "quotazioni_enriched") -> str:
+    """Percorso con timestamp dentro `output_dir` (creata se manca)."""
+    os.makedirs(output_dir, exist_ok=True)
+    filename = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return os.path.join(output_dir, filename)
+
+
+def write_rows(rows: Iterable[dict], path: str, fieldnames: List[str], delimiter: str = ";") -> int:
+    """Scrive le righe man mano che arrivano; ritorna quante ne ha scritte."""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as fo:
+        writer = csv.DictWriter(
+            fo,
+            fieldnames=fieldnames,
+            delimiter=delimiter,
+            quotechar="\"",
+            quoting=csv.QUOTE_MINIMAL,
+        )
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+# =============================================================
+# RUN COMPLETO (squadra / voti)
+# =============================================================
+
+
+def run_enrichment(
+    args,
+    script: str,
+    needs_match: Callable[[dict], bool],
+    fill: Callable[[dict, Optional[Record]], None],
+) -> str:
+    """Arricchisce ``args.quote`` con ``args.stats`` → percorso del CSV scritto.
+
+    `args` viene da `cli.parse_enrichment_args`; `needs_match` sceglie le
+    righe da cercare, `fill` le riempie con il record trovato (o None).
+    Tempi e metodi di match finiscono in un ``.report.json`` accanto
+    all'output (``UNIONE_PROFILE=1`` aggiunge il profilo cProfile).
+    """
+    # importano a loro volta pipeline: qui evitano l'import circolare
+    from .external import NO_FUZZY_WARNING, SortMergeJoin, join_rows
+    from .incremental import open_state, write_output
+    from .parallel import resolve_in_pool
+
+    fields = args.stats_fields
+    report = RunReport(script).start()
+
+    # =============================================================
+    # INDICE: prima la squadra (evita omonimi), poi tutta la lega
+    # =============================================================
+    with report.stage("index"):
+        # grafie di squadra aggiuntive ("Inter" / "Internazionale" sono già note)
+        aliases = TeamAliases.load(args.team_aliases, normalize) if args.team_aliases else None
+        if args.out_of_core:
+            # file troppo grandi per la memoria: sort-merge su disco, senza fuzzy
+            index = SortMergeJoin.from_csv(args.stats, fields, delimiter=args.stats_delimiter,
+                                           team_aliases=aliases, memory_mb=args.memory_mb,
+                                           tmp_dir=args.tmp_dir)
+            print(NO_FUZZY_WARNING)
+        else:
+            # con --assign il ruolo dei record si legge nella stessa passata
+            index = PlayerIndex.from_csv(args.stats, fields, delimiter=args.stats_delimiter,
+                                         team_aliases=aliases, with_roles=args.assign)
+        if args.assign:
+            # --assign: omonimi di squadra risolti insieme (NumPy si carica solo qui)
+            from .assignment import assign_rows, record_roles
+            roles = record_roles(index)
+
+    # i giocatori già risolti nei run precedenti non ripassano dal matcher; la
+    # cache si azzera da sola solo se cambia l'elenco dei giocatori del file voti
+    cache_path = args.match_cache or os.path.join(args.output_dir, "match_cache.sqlite")
+    use_cache = not (args.no_match_cache or args.out_of_core)
+    cache = MatchCache.attach(cache_path, index) if use_cache else nullcontext()
+
+    # --incremental: le righe del listone identiche al run precedente riusano il
+    # loro abbinamento; con "delta" si scrivono solo le righe cambiate
+    state = open_state(args, script, index)
+
+    with cache, state or nullcontext(), open_listone(args.quote, args.quote_delimiter) as (original_fields, rows):
+        # header originale (senza "id", rigenerato) + colonne statistiche mancanti
+        fieldnames = ["id"] + original_fields + [f for f in fields if f not in original_fields]
+
+        # read → normalize → match → enrich: ogni riga viene scritta appena pronta
+        pairs = report.timed_iter("normalize", normalize_rows(report.timed_iter("read", rows), index, needs_match))
+        if args.workers != 1 and not (args.out_of_core or args.assign):
+            # le query distinte vengono risolte in parallelo, le righe restano in ordine
+            with report.stage("parallel_match"):
+                pairs = resolve_in_pool(pairs, index, args.workers)
+        if args.assign:
+            matched = assign_rows(pairs, index, report, roles)
+        else:
+            matched = (state.match_rows if state else join_rows)(pairs, index, report)
+        matched = report.timed_iter("match", matched)
+        enriched = report.timed_iter("enrich", enrich_rows(matched, fill))
+
+        # nome file con timestamp → evita sovrascritture; id incrementale (1..N)
+        with report.stage("write"):
+            filepath = write_output(stored(number_rows(enriched), args, fieldnames), fieldnames, args, state)
+
+    if state is not None:
+        print(state.summary())
+    report.stop()
+    report_path = report.write(filepath, index)
+    print(f"✅ File creato: {filepath}")
+    print(f"📊 Report: {report_path}")
+    return filepath
@@ -0,0 +1,203 @@
+"""
+Archivio SQLite dei listoni arricchiti
+======================================
+
+Oltre al CSV con timestamp, gli script possono scrivere il risultato in un
+database SQLite (``--store data/players.sqlite``): chi deve filtrare per
+squadra o ruolo, o ordinare per quotazione, usa un indice invece di
+rileggere e riparsare tutto il CSV.
+
+- una sola tabella ``players`` con chiave ``(season, id)``: più stagioni (o
+  snapshot) convivono nello stesso file; riscrivere una stagione sostituisce
+  le sue righe;
+- le colonne sono quelle del CSV di output, aggiunte con ``ALTER TABLE`` se
+  mancano (``Nome``/``Squadra``/``R``/``RM`` come testo, le altre numeriche);
+  due colonne che differiscono solo per maiuscole (``Pv`` / ``pv``) diventano
+  ``Pv`` e ``pv_2``, perché SQLite non distingue i nomi per maiuscole;
+- ``nome_norm`` è il nome normalizzato (`matching.normalize`);
+- indici per stagione su squadra, ``R``, ``RM``, colonne prezzo e nome
+  normalizzato;
+- inserimento a blocchi (``executemany``) in un'unica transazione per
+  stagione: se il run fallisce, la stagione precedente resta intatta.
+
+Uso::
+
+    store = PlayerStore("data/players.sqlite")
+    rows = store.write(number_rows(enriched), "2024-25", fieldnames)
+    write_rows(rows, csv_path, fieldnames)            # CSV e SQLite in un passaggio
+    store.players("2024-25", r="A", order_by="Qt.A")
+"""
+
+import os
+import sqlite3
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .matching import normalize
+
+TEXT_COLUMNS = ("Nome", "Squadra", "R", "RM")
+PRICE_COLUMNS = ("Qt.A", "Qt.I", "Diff.", "Qt.A M", "Qt.I M", "Diff.M", "FVM", "FVM M")
+INDEXED_COLUMNS = ("Squadra", "R", "RM") + PRICE_COLUMNS
+BATCH_SIZE = 5000  # righe per executemany
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    season    TEXT NOT NULL,
+    id        INTEGER NOT NULL,
+    nome_norm TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (season, id)
+);
+CREATE INDEX IF NOT EXISTS players_nome_norm ON players (season, nome_norm);
+"""
+
+
+def current_season(today: Optional[date] = None) -> str:
+    """Stagione in corso nella forma ``"2024-25"`` (inizia a luglio)."""
+    today = today or date.today()
+    start = today.year if today.month >= 7 else today.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class PlayerStore:
+    """Tabella ``players`` di un file SQLite (creata al primo uso)."""
+
+    def __init__(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.columns: List[str] = [row[1] for row in self.conn.execute("PRAGMA table_info(players)")]
+
+    # ---------------------------------------------------------------- schema
+    def _column_for(self, field: str, taken: set) -> str:
+        """Colonna della tabella per `field` (creata se manca)."""
+        existing = {c.lower() for c in self.columns}
+        k = 1
+        while True:
+            name = field if k == 1 else f"{field}_{k}"
+            if name in self.columns and name not in taken:
+                return name
+            if name.lower() not in existing:
+                kind = "TEXT" if field in TEXT_COLUMNS else "NUMERIC"
+                self.conn.execute(f"ALTER TABLE players ADD COLUMN {_quote(name)} {kind}")
+                self.columns.append(name)
+                if field in INDEXED_COLUMNS:
+                    index = "players_" + "".join(ch if ch.isalnum() else "_" for ch in name)
+                    self.conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {_quote(index)} ON players (season, {_quote(name)})"
+                    )
+                return name
+            k += 1
+
+    def map_fields(self, fieldnames: Sequence[str]) -> List[Tuple[str, str]]:
+        """``(campo del CSV, colonna)`` per ogni campo (escluso ``id``), in ordine."""
+        mapping: List[Tuple[str, str]] = []
+        taken = {"season", "id", "nome_norm"}
+        for field in dict.fromkeys(fieldnames):  # nomi ripetuti → una colonna
+            if field == "id":
+                continue
+            column = self._column_for(field, taken)
+            taken.add(column)
+            mapping.append((field, column))
+        self.conn.commit()
+        return mapping
+
+    # --------------------------------------------------------------- scrittura
+    def write(self, rows: Iterable[dict], season: str, fieldnames: Sequence[str]) -> Iterator[dict]:
+        """Salva le righe della stagione `season` mentre passano (generatore).
+
+        Le righe precedenti della stagione vengono sostituite solo se il
+        generatore arriva in fondo; altrimenti la transazione viene annullata.
+        """
+        mapping = self.map_fields(fieldnames)
+        columns = ["season", "id", "nome_norm"] + [c for _, c in mapping]
+        insert = (
+            f"INSERT INTO players ({', '.join(map(_quote, columns))}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        batch: List[tuple] = []
+        try:
+            self.conn.execute("DELETE FROM players WHERE season = ?", (season,))
+            for row in rows:
+                name = row.get("Nome") or row.get("nome") or ""
+                batch.append(
+                    (season, int(row["id"]), normalize(name)) + tuple(row.get(f, "") for f, _ in mapping)
+                )
+                if len(batch) >= BATCH_SIZE:
+                    self.conn.executemany(insert, batch)
+                    batch.clear()
+                yield row
+            if batch:
+                self.conn.executemany(insert, batch)
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    # ------------------------------------------------------------------ lettura
+    def seasons(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT season FROM players ORDER BY season")]
+
+    def players(
+        self,
+        season: str,
+        *,
+        squadra: Optional[str] = None,
+        r: Optional[str] = None,
+        rm: Optional[str] = None,
+        nome: Optional[str] = None,
+        order_by: Optional[str] = None,
+        descending: bool = True,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, object]]:
+        """Giocatori di una stagione, filtrati e ordinati sugli indici.
+
+        `nome` cerca per prefisso sul nome normalizzato; `order_by` deve essere
+        una colonna della tabella (es. ``"Qt.A"``).
+        """
+        where, params = ["season = ?"], [season]
+        for column, value in (("Squadra", squadra), ("R", r), ("RM", rm)):
+            if value is not None:
+                where.append(f"{_quote(column)} = ?")
+                params.append(value)
+        if nome:
+            prefix = normalize(nome)
+            where.append("nome_norm >= ? AND nome_norm < ?")
+            params += [prefix, prefix + "\uffff"]
+        sql = f"SELECT * FROM players WHERE {' AND '.join(where)}"
+        if order_by is not None:
+            if order_by not in self.columns:
+                raise ValueError(f"Colonna sconosciuta: {order_by}")
+            sql += f" ORDER BY {_quote(order_by)} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "PlayerStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def stored(rows: Iterable[dict], args, fieldnames: Sequence[str]) -> Iterable[dict]:
+    """Con ``--store`` le righe in uscita finiscono anche nell'archivio SQLite."""
+    if not getattr(args, "store", None):
+        return rows
+    return _store_rows(rows, args.store, args.season or current_season(), fieldnames)
+
+
+def _store_rows(rows: Iterable[dict], path: str, season: str, fieldnames: Sequence[str]) -> Iterator[dict]:
+    with PlayerStore(path) as store:
+        yield from store.write(rows, season, fieldnames)
@@ -0,0 +1,172 @@
+"""
+Generatori di dati sintetici (listone + voti/statistiche)
+=========================================================
+
+Producono file con lo stesso schema di quelli veri, a un multiplo `scale` di
+una stagione di Serie A (20 squadre × ~30 giocatori), con i casi che rendono
+difficile il matching:
+
+- accenti presenti solo da una parte (Nicolò / Nicolo);
+- omonimi (stesso cognome, anche nella stessa squadra);
+- ordine invertito ("Rossi Marco");
+- cognomi con refusi (→ ramo fuzzy);
+- giocatori del listone assenti dalle statistiche.
+
+Tutto è deterministico a parità di `seed`.
+"""
+
+import csv
+import os
+import random
+from typing import Dict, List, Tuple
+
+PLAYERS_PER_TEAM = 30
+TEAMS_PER_SEASON = 20
+
+FIRST_NAMES = [
+    "Marco", "Luca", "Andrea", "Federico", "Nicolò", "Álvaro", "Dušan", "Lautaro",
+    "Khvicha", "Mike", "Paulo", "Hakan", "Théo", "Rafael", "Mattia", "Alessandro",
+    "Giovanni", "Lorenzo", "Davide", "Matteo", "Gianluca", "Sandro", "Ciro", "Romelu",
+    "Victor", "Stefan", "Piotr", "Jesús", "João", "Arkadiusz",
+]
+SYLLABLES = [
+    "ro", "ssi", "bian", "chi", "ma", "ri", "ni", "gal", "li", "fer", "ra", "to",
+    "vla", "ho", "vić", "bar", "el", "la", "di", "mar", "co", "lu", "ka", "ku",
+    "chie", "sa", "zan", "io", "lo", "bo", "nuc", "ci", "ten", "pe", "dri", "kvar",
+    "at", "ske", "lé", "ñe", "gon", "zá", "tor", "re", "an", "gio", "mo", "ne",
+]
+TEAM_BASES = [
+    "Inter", "Milan", "Juventus", "Napoli", "Roma", "Lazio", "Atalanta", "Fiorentina",
+    "Bologna", "Torino", "Genoa", "Udinese", "Verona", "Lecce", "Cagliari", "Como",
+    "Parma", "Empoli", "Monza", "Venezia",
+]
+ROLES = ["P", "D", "C", "A"]
+
+LISTONE_FIELDS = [
+    "Id", "R", "RM", "Nome", "Squadra", "Qt.A", "Qt.I", "Diff.",
+    "Qt.A M", "Qt.I M", "Diff.M", "FVM", "FVM M",
+]
+VOTI_FIELDS = ["Pv", "Mv", "Fm", "Au"]
+
+
+def _surname(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def _strip_accents_cheap(name: str) -> str:
+    table = str.maketrans("àáèéìíòóùúćčšžñãçöüôâ", "aaeeiioouuccsznacouoa")
+    return name.translate(table)
+
+
+def _misspell(rng: random.Random, name: str) -> str:
+    if len(name) < 5:
+        return name
+    i = rng.randrange(1, len(name) - 1)
+    op = rng.random()
+    if op < 0.4:
+        return name[:i] + name[i + 1:]               # lettera mancante
+    if op < 0.7:
+        return name[:i] + name[i] + name[i:]         # lettera doppia
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]  # lettere scambiate
+
+
+def teams(scale: int) -> List[str]:
+    """20 squadre per stagione; oltre la prima stagione si aggiunge un suffisso."""
+    out = []
+    for season in range(scale):
+        for base in TEAM_BASES[:TEAMS_PER_SEASON]:
+            out.append(base if season == 0 else f"{base} {season}")
+    return out
+
+
+def players(scale: int, seed: int = 42) -> List[Tuple[str, str, str]]:
+    """Giocatori ``(nome, cognome, squadra)`` con omonimi voluti."""
+    rng = random.Random(seed)
+    out = []
+    for team in teams(scale):
+        roster: List[str] = []
+        for _ in range(PLAYERS_PER_TEAM):
+            # ~5% omonimi: cognome già usato in squadra o in lega
+            if roster and rng.random() < 0.05:
+                last = rng.choice(roster)
+            elif out and rng.random() < 0.05:
+                last = rng.choice(out)[1]
+            else:
+                last = _surname(rng)
+            roster.append(last)
+            out.append((rng.choice(FIRST_NAMES), last, team))
+    return out
+
+
+def write_voti(path: str, roster: List[Tuple[str, str, str]], seed: int = 42,
+               delimiter: str = ";", coverage: float = 0.92) -> int:
+    """File voti (player, squad, Pv, Mv, Fm, Au); ~8% dei giocatori manca."""
+    rng = random.Random(seed + 1)
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(["player", "squad"] + VOTI_FIELDS)
+        for first, last, team in roster:
+            if rng.random() > coverage:
+                continue
+            pv = rng.randint(1, 38)
+            mv = rng.uniform(5.2, 7.0)
+            fm = mv + rng.uniform(-0.5, 2.0)
+            writer.writerow([f"{first} {last}", team, pv, f"{mv:.2f}", f"{fm:.2f}", rng.randint(0, 1)])
+            n += 1
+    return n
+
+
+def listone_name(rng: random.Random, first: str, last: str) -> Tuple[str, str]:
+    """Nome come compare nel listone → ``(nome, variante)``."""
+    r = rng.random()
+    if r < 0.45:
+        return last, "surname"
+    if r < 0.60:
+        return f"{last} {first[0]}.", "initial"
+    if r < 0.70:
+        return f"{first} {last}", "full"
+    if r < 0.78:
+        return f"{last} {first}", "swapped"
+    if r < 0.88:
+        return _strip_accents_cheap(f"{first} {last}"), "no_accents"
+    return _misspell(rng, last), "misspelled"
+
+
+def write_listone(path: str, roster: List[Tuple[str, str, str]], seed: int = 42,
+                  extra_fields: Tuple[str, ...] = ()) -> Dict[str, int]:
+    """Listone quotazioni (delimitatore ';'); ritorna il conteggio per variante."""
+    rng = random.Random(seed + 2)
+    variants: Dict[str, int] = {}
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(LISTONE_FIELDS + list(extra_fields))
+        for idx, (first, last, team) in enumerate(roster, 1):
+            name, variant = listone_name(rng, first, last)
+            variants[variant] = variants.get(variant, 0) + 1
+            qa = rng.randint(1, 40)
+            qi = max(1, qa + rng.randint(-5, 5))
+            writer.writerow(
+                [idx, rng.choice(ROLES), rng.choice(ROLES), name, team, qa, qi, qa - qi,
+                 qa, qi, qa - qi, qa * 3, qi * 3]
+                + ["0"] * len(extra_fields)
+            )
+    return variants
+
+
+def generate(directory: str, scale: int, seed: int = 42) -> Dict[str, object]:
+    """Scrive `voti.csv` e `listone.csv` in `directory`; ritorna i metadati."""
+    os.makedirs(directory, exist_ok=True)
+    roster = players(scale, seed)
+    voti = os.path.join(directory, "voti.csv")
+    listone = os.path.join(directory, "listone.csv")
+    stats_rows = write_voti(voti, roster, seed)
+    variants = write_listone(listone, roster, seed, extra_fields=tuple(VOTI_FIELDS))
+    return {
+        "scale": scale,
+        "voti": voti,
+        "listone": listone,
+        "stats_rows": stats_rows,
+        "listone_rows": len(roster),
+        "variants": variants,
+    }
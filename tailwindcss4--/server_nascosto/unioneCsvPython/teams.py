@@ -0,0 +1,133 @@
+"""
+Indice alias delle squadre
+==========================
+
+Listone, voti e FBref non scrivono le squadre allo stesso modo: "Inter" /
+"Internazionale", "Hellas Verona" / "Verona", "AC Milan" / "Milan". Con il
+confronto esatto delle stringhe normalizzate la ricerca per squadra
+fallisce e si ripiega su tutta la lega (più lenta e più ambigua con gli
+omonimi).
+
+Qui ogni grafia viene ricondotta a un nome canonico e a un **id intero**
+di squadra:
+
+1. la grafia normalizzata viene cercata nella tabella degli alias;
+2. altrimenti si tolgono sigle societarie e anni di fondazione a 4 cifre
+   ("AC", "SSC", "Calcio", "1907", …) e si riprova;
+3. quello che resta è il nome canonico; ogni nome canonico nuovo riceve il
+   prossimo id libero.
+
+Le grafie già viste sono memorizzate (``grafia → id``): dopo la prima
+volta la risoluzione è un lookup. Alias aggiuntivi si caricano da un CSV
+``alias;squadra`` (vedi `TeamAliases.load`).
+
+    aliases = TeamAliases(normalize)
+    aliases.lookup("Internazionale") == aliases.lookup("Inter")   # True
+
+Ogni `PlayerIndex` ne ha uno, costruito con il suo normalizzatore.
+"""
+
+import csv
+import hashlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# sigle societarie che non distinguono una squadra dall'altra
+CLUB_AFFIXES = frozenset({
+    "ac", "acf", "afc", "as", "asd", "bc", "calcio", "cfc", "fc", "sc",
+    "spa", "ss", "ssc", "ssd", "uc", "us", "usd",
+})
+
+
+def _is_year(token: str) -> bool:
+    """Anno di fondazione ("1907"); altri numeri possono distinguere le squadre."""
+    return len(token) == 4 and token.isdigit() and token[:2] in ("18", "19", "20")
+
+
+# grafia normalizzata → nome canonico
+# (le sigle di CLUB_AFFIXES e gli anni si tolgono da soli: "AS Roma" → "roma")
+TEAM_ALIASES: Dict[str, str] = {
+    "internazionale": "inter",
+    "internazionale milano": "inter",
+    "inter milan": "inter",
+    "inter milano": "inter",
+    "hellas verona": "verona",
+    "hellas": "verona",
+    "juve": "juventus",
+    "samp": "sampdoria",
+    "alto adige": "sudtirol",
+}
+
+
+class TeamAliases:
+    """Grafie di squadra → id intero del nome canonico.
+
+    `normalizer` è quello dell'indice (es. `matching.normalize`): le grafie
+    passate a `team_id` devono essere già normalizzate con lo stesso.
+    """
+
+    def __init__(
+        self,
+        normalizer: Callable[[Optional[str]], str],
+        aliases: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.normalizer = normalizer
+        self.aliases: Dict[str, str] = dict(TEAM_ALIASES)
+        self.ids: Dict[str, int] = {}     # nome canonico → id
+        self.names: List[str] = []        # id → nome canonico
+        self._seen: Dict[str, int] = {}   # grafia già normalizzata → id
+        if aliases:
+            self.add_aliases(aliases.items())
+
+    def add_aliases(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        """Aggiunge alias ``(grafia, squadra)``; entrambi vengono normalizzati."""
+        for alias, team in pairs:
+            self.aliases[self.normalizer(alias)] = self.canonical(self.normalizer(team))
+        self._seen.clear()  # le grafie già viste vanno ricalcolate (gli id restano)
+
+    @classmethod
+    def load(cls, path: str, normalizer: Callable[[Optional[str]], str], delimiter: str = ";") -> "TeamAliases":
+        """Alias predefiniti più quelli del CSV ``alias;squadra`` (intestazione facoltativa)."""
+        aliases = cls(normalizer)
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [row for row in csv.reader(f, delimiter=delimiter) if len(row) >= 2]
+        if rows and [c.strip().lower() for c in rows[0][:2]] == ["alias", "squadra"]:
+            rows = rows[1:]
+        aliases.add_aliases((row[0], row[1]) for row in rows)
+        return aliases
+
+    # ---------------------------------------------------------------- lookup
+    def canonical(self, team_norm: str) -> str:
+        """Nome canonico di una grafia *già normalizzata*."""
+        alias = self.aliases.get(team_norm)
+        if alias is not None:
+            return alias
+        tokens = [t for t in team_norm.split() if t not in CLUB_AFFIXES and not _is_year(t)]
+        stripped = " ".join(tokens) or team_norm
+        return self.aliases.get(stripped, stripped)
+
+    def team_id(self, team_norm: str) -> int:
+        """Id della squadra di una grafia già normalizzata (assegnato se nuovo)."""
+        tid = self._seen.get(team_norm)
+        if tid is None:
+            name = self.canonical(team_norm)
+            tid = self.ids.get(name)
+            if tid is None:
+                tid = self.ids[name] = len(self.names)
+                self.names.append(name)
+            self._seen[team_norm] = tid
+        return tid
+
+    def lookup(self, team_raw: Optional[str]) -> Optional[int]:
+        """Id della squadra da una grafia grezza (None se vuota)."""
+        team_norm = self.normalizer(team_raw) if team_raw else ""
+        return self.team_id(team_norm) if team_norm else None
+
+    def fingerprint(self) -> str:
+        """Impronta della tabella alias (cambia il risultato del matching)."""
+        digest = hashlib.sha1()
+        for alias, team in sorted(self.aliases.items()):
+            digest.update(f"{alias}\t{team}\n".encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    def __len__(self) -> int:
+        return len(self.names)
@@ -0,0 +1,51 @@
+"""Aggregato stagionale: le grafie diverse dello stesso giocatore si sommano."""
+
+import json
+
+from unioneCsvPython.aggregate import SeasonAggregate, aggregate
+
+GIORNATA_1 = """Nome;Squadra;Voto;Fantavoto;Au
+Nicolò Barella;Inter;6.5;7.5;0
+Lautaro Martinez;Inter;7;10;0
+"""
+GIORNATA_2 = """Nome;Squadra;Voto;Fantavoto;Au
+nicolo  BARELLA;internazionale;5.5;5.5;0
+Lautaro Martinez;INTER;6;6;1
+"""
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_varianti_di_grafia_stesso_giocatore(tmp_path):
+    paths = [_write(tmp_path, "giornata_1.csv", GIORNATA_1), _write(tmp_path, "giornata_2.csv", GIORNATA_2)]
+    agg, applied = aggregate(paths)
+    assert applied == 2
+    assert list(agg.rows()) == [
+        ["Lautaro Martinez", "Inter", "2", "6.50", "8.00", "1"],
+        ["Nicolò Barella", "Inter", "2", "6.00", "6.50", "0"],
+    ]
+
+
+def test_stato_salvato_conserva_la_prima_grafia(tmp_path):
+    state = str(tmp_path / "stato.json")
+    aggregate([_write(tmp_path, "giornata_1.csv", GIORNATA_1)], state=state)
+    agg, applied = aggregate([_write(tmp_path, "giornata_2.csv", GIORNATA_2)], state=state)
+    assert applied == 1
+    assert [row[:3] for row in agg.rows()] == [["Lautaro Martinez", "Inter", "2"], ["Nicolò Barella", "Inter", "2"]]
+
+
+def test_stato_versione_1_convertito(tmp_path):
+    state = tmp_path / "stato.json"
+    state.write_text(json.dumps({
+        "version": 1,
+        "totals": [["Nicolò Barella", "Inter", 1, 1, 6.5, 7.5, 0],
+                   ["Nicolo Barella", "Inter", 1, 1, 5.5, 5.5, 0]],
+        "matchdays": {"1": {"fingerprint": "x", "rows": [["Nicolò Barella", "Inter", 1, 1, 6.5, 7.5, 0]]},
+                      "2": {"fingerprint": "y", "rows": [["Nicolo Barella", "Inter", 1, 1, 5.5, 5.5, 0]]}},
+    }), encoding="utf-8")
+    agg = SeasonAggregate.load(str(state))
+    assert list(agg.rows()) == [["Nicolò Barella", "Inter", "2", "6.00", "6.50", "0"]]
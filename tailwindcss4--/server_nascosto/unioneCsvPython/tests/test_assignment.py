@@ -0,0 +1,55 @@
+"""Assegnazione uno-a-uno degli omonimi di squadra (``--assign``)."""
+
+from unioneCsvPython.assignment import assign_rows, assign_team, record_roles
+from unioneCsvPython.matching import PlayerIndex
+from unioneCsvPython.pipeline import normalize_rows
+
+FIELDS = ["Pv", "Mv"]
+
+
+def _index(tmp_path, lines):
+    path = tmp_path / "stats.csv"
+    path.write_text("Player,Squad,Pos,Pv,Mv\n" + "\n".join(lines) + "\n", encoding="utf-8")
+    return PlayerIndex.from_csv(str(path), FIELDS, with_roles=True)
+
+
+def _assign(index, rows):
+    matched = assign_rows(normalize_rows(rows, index), index, roles=record_roles(index))
+    return [(record.full if record else None) for _, _, record in matched]
+
+
+def test_listone_initial_homonyms_split_by_role(tmp_path):
+    # formato del listone: cognome + iniziale, i due Rossi si distinguono solo dal ruolo
+    index = _index(tmp_path, ["Marco Rossi,Inter,MF,10,6.5", "Mattia Rossi,Inter,DF,20,6.0"])
+    rows = [
+        {"Nome": "Rossi M.", "Squadra": "Inter", "R": "D"},
+        {"Nome": "Rossi M.", "Squadra": "Inter", "R": "C"},
+    ]
+    assert _assign(index, rows) == ["mattia rossi", "marco rossi"]
+
+
+def test_listone_initial_single_record(tmp_path):
+    index = _index(tmp_path, ["Marco Rossi,Inter,MF,10,6.5", "Luca Bianchi,Inter,FW,5,6.0"])
+    rows = [{"Nome": "Rossi M.", "Squadra": "Inter", "R": "C"}]
+    assert _assign(index, rows) == ["marco rossi"]
+
+
+def test_ties_follow_file_order(tmp_path):
+    # punteggi identici: la prima riga prende il primo record, la seconda il secondo
+    index = _index(tmp_path, ["Marco Rossi,Inter,,1,6", "Mario Rossi,Inter,,2,6", "Mirko Rossi,Inter,,3,6"])
+    queries = [("rossi",), ("rossi",)]
+    assert assign_team(queries, [0, 0], index, [0, 1, 2]) == {0: 0, 1: 1}
+    assert assign_team([("rossi",)], [0], index, [0, 1, 2]) == {0: 0}
+
+
+def test_taken_record_is_reported(tmp_path, capsys):
+    index = _index(tmp_path, ["Marco Rossi,Inter,MF,10,6.5"])
+    rows = [
+        {"Nome": "Marco Rossi", "Squadra": "Inter", "R": "C"},
+        {"Nome": "Rossi", "Squadra": "Inter", "R": "C"},
+    ]
+    # la seconda riga è ammessa allo stesso record: vince la prima, l'altra resta senza
+    assert _assign(index, rows) == ["marco rossi", None]
+    rows[1]["Nome"] = "Rosi"  # fuori dall'assegnazione, il fuzzy trova il record già preso
+    assert _assign(index, rows) == ["marco rossi", None]
+    assert "rosi (inter) → marco rossi" in capsys.readouterr().out
@@ -0,0 +1,14 @@
+"""Riga di comando: il codice di uscita del comando arriva al chiamante."""
+
+from unioneCsvPython import cli, equivalence
+
+
+def test_codice_di_uscita_del_comando(monkeypatch):
+    monkeypatch.setattr(equivalence, "verify", lambda *args: 3)
+    assert cli.main(["verifica"]) == 1
+    monkeypatch.setattr(equivalence, "verify", lambda *args: 0)
+    assert cli.main(["verifica"]) == 0
+
+
+def test_comando_sconosciuto():
+    assert cli.main(["nessuno"]) == 2
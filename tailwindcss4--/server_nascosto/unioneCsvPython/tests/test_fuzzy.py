@@ -0,0 +1,65 @@
+"""`SurnameIndex.best` ≡ ``difflib.get_close_matches(..., n=1)``: soglie, spareggi, nomi lunghi."""
+
+import random
+from difflib import SequenceMatcher, get_close_matches
+
+import pytest
+
+from unioneCsvPython.fuzzy import _AUTOJUNK_LEN, SurnameIndex
+
+
+def _difflib(target, keys, cutoff):
+    return (get_close_matches(target, keys, n=1, cutoff=cutoff) or [None])[0]
+
+
+def test_spareggio_come_heapq_nlargest():
+    # stesso ratio (0.8): vince la chiave maggiore, in qualunque ordine
+    keys = ["rossa", "rosso", "rosse"]
+    assert SequenceMatcher(None, "rossi", "rossa").ratio() == SequenceMatcher(None, "rossi", "rosso").ratio()
+    for order in (keys, keys[::-1]):
+        assert SurnameIndex(order, cutoff=0.6).best("rossi") == "rosso" == _difflib("rossi", order, 0.6)
+
+
+def test_soglia_esatta_inclusa():
+    # ratio("rossi", "rosso") = 2·4 / 10 = 0.8
+    assert SurnameIndex(["rosso"], cutoff=0.8).best("rossi") == "rosso"
+    assert SurnameIndex(["rosso"], cutoff=0.8 + 1e-9).best("rossi") is None
+
+
+@pytest.mark.parametrize("cutoff", [0.0, 1.0])
+def test_soglie_estreme(cutoff):
+    keys = ["xy", "rossi", "r", "bianchi"]
+    for target in ["ab", "rossi", "r", "z"]:
+        assert SurnameIndex(keys, cutoff=cutoff).best(target) == _difflib(target, keys, cutoff)
+
+
+def test_indice_vuoto():
+    assert SurnameIndex([]).best("rossi") is None
+
+
+def test_casuale_contro_difflib():
+    rng = random.Random(7)
+    keys = ["".join(rng.choice("abcde") for _ in range(rng.randint(1, 9))) for _ in range(300)]
+    for cutoff in (0.5, 0.6, 0.78, 0.9):
+        index = SurnameIndex(keys, cutoff=cutoff)
+        for _ in range(200):
+            target = "".join(rng.choice("abcde") for _ in range(rng.randint(1, 9)))
+            assert index.best(target) == _difflib(target, keys, cutoff), (target, cutoff)
+        assert index.comparisons < 200 * len(keys)
+
+
+def test_autojunk_oltre_200_caratteri():
+    # con target ≥ 200 caratteri difflib scarta i caratteri "popolari": si usa difflib
+    rng = random.Random(3)
+    target = "a" * (_AUTOJUNK_LEN - 20) + "".join(rng.choice("bcd") for _ in range(20))
+    keys = [target[:-1] + "x", "a" * _AUTOJUNK_LEN, target[::-1], "bcd" * 70]
+    for cutoff in (0.0, 0.5, 0.9):
+        index = SurnameIndex(keys, cutoff=cutoff)
+        assert index.best(target) == _difflib(target, keys, cutoff)
+        assert index.comparisons == 0  # nessun confronto dell'indice: fallback completo
+    # senza autojunk il ratio del rovescio sarebbe 0.9: difflib invece non lo trova
+    assert SequenceMatcher(None, target[::-1], target, autojunk=False).ratio() >= 0.5
+    assert SurnameIndex([target[::-1]], cutoff=0.5).best(target) is None is _difflib(target, [target[::-1]], 0.5)
+    assert SurnameIndex(keys, cutoff=0.9).best(target[:_AUTOJUNK_LEN - 1]) == _difflib(
+        target[:_AUTOJUNK_LEN - 1], keys, 0.9
+    )
@@ -0,0 +1,46 @@
+"""Ri-arricchimento incrementale (``--incremental``)."""
+
+import csv
+import os
+
+from unioneCsvPython import unionePerVoti
+from unioneCsvPython.synthetic import generate
+
+
+def _run(meta, out, *options):
+    argv = ["--stats", meta["voti"], "--quote", meta["listone"], "--output-dir", str(out), "--no-match-cache"]
+    return unionePerVoti.main(argv + list(options))
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_roster_change_rematches_only_affected_rows(tmp_path, capsys):
+    meta = generate(str(tmp_path / "data"), 1, seed=3)
+    _run(meta, tmp_path / "o1", "--incremental", "snapshot")
+
+    # un giocatore tolto, uno aggiunto: il resto del file statistiche è identico
+    with open(meta["voti"], encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    del rows[5]
+    rows.append(["Marco Nuovissimo", rows[1][1]] + rows[1][2:])
+    with open(meta["voti"], "w", encoding="utf-8", newline="") as f:
+        csv.writer(f, delimiter=";").writerows(rows)
+
+    capsys.readouterr()
+    incremental = _run(meta, tmp_path / "o2", "--incremental", "snapshot")
+    summary = capsys.readouterr().out
+    full = _run(meta, tmp_path / "o3")
+    assert _read(incremental) == _read(full)
+    assert "2 giocatori aggiunti o tolti" in summary
+    assert "ri-abbinati: 0," not in summary and "riusati: 0," not in summary
+
+
+def test_delta_has_only_changed_rows(tmp_path):
+    meta = generate(str(tmp_path / "data"), 1, seed=3)
+    _run(meta, tmp_path / "o1", "--incremental", "snapshot")
+    delta = _run(meta, tmp_path / "o2", "--incremental", "delta")
+    assert os.path.basename(delta).startswith("quotazioni_enriched_delta_")
+    assert _read(delta).count("\n") == 1  # solo l'header: nulla è cambiato
@@ -0,0 +1,47 @@
+"""Arricchimento multi-sorgente: stesso output della catena di script."""
+
+from unioneCsvPython import multisource, unione2, unione3ConSquadra
+
+LISTONE = """Id;R;RM;Nome;Squadra;Qt.A;partite;minuti;goal
+1;A;Pc;Martinez L.;Inter;40;0;0;0
+2;C;C;Barella;Inter;20;0;0;0
+3;D;Dc;Rossi M.;Milan;5;0;0;0
+4;P;Por;Sconosciuto;Lecce;1;0;0;0
+5;C;C;Pulisic;Milan;30;0;0;0
+"""
+STATS = """Player,Squad,partite,minuti,goal
+Lautaro Martinez,Inter,30,2500,20
+Nicolo Barella,Inter,0,0,0
+Christian Pulisic,Milan,28,2300,11
+"""
+VOTI = """Player;Squad;Pv;Mv;Fm;Au
+Lautaro Martinez;Inter;30;6.8;8.1;0
+Nicolò Barella;Inter;29;6.4;6.9;0
+Marco Rossi;Milan;12;6.0;6.0;0
+Christian Pulisic;Milan;28;6.6;7.6;0
+"""
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_single_pass_matches_the_chain(tmp_path):
+    listone, stats, voti = tmp_path / "listone.csv", tmp_path / "stats.csv", tmp_path / "voti.csv"
+    listone.write_text(LISTONE, encoding="utf-8")
+    stats.write_text(STATS, encoding="utf-8")
+    voti.write_text(VOTI, encoding="utf-8")
+
+    # catena storica: unione2 (colonne esistenti) → squadra (voti dove partite/minuti sono a zero)
+    step = unione2.main(["--stats", str(stats), "--quote", str(listone),
+                         "--stats-fields", "partite,minuti,goal", "--output-dir", str(tmp_path / "chain1")])
+    chained = unione3ConSquadra.main(["--stats", str(voti), "--quote", step, "--no-match-cache",
+                                      "--output-dir", str(tmp_path / "chain2")])
+
+    single = multisource.main([
+        "--quote", str(listone), "--output-dir", str(tmp_path / "multi"),
+        "--source", str(stats), "--fields", "partite,minuti,goal", "--match", "exact", "--mode", "existing",
+        "--source", str(voti), "--fields", "Pv,Mv,Fm,Au", "--only-if-zero", "partite,minuti",
+    ])
+    assert _read(single) == _read(chained)
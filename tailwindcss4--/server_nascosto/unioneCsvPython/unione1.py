@@ -1,126 +1,103 @@
 # Qui andiamo a unire i csv listone + serie A 2024 2025. Listone rimarra cosi com'è andando ad aggiungere per ogni giocatore le stats quindi partite, ecc... da  serie a 2024 2025
+# Con l'opzione --vectorized il join viene fatto con pandas (stesso output, file molto grandi)
+#
+#   python -m unioneCsvPython unione1 [--stats ...] [--quote ...] [--vectorized]
 
-import csv
-import unicodedata
 import os
-from datetime import datetime
-
-# Funzione per normalizzare le stringhe (rimuove accenti e converte in minuscolo)
-def normalize_name(name):
-    if name is None:
-        return ''
-    name = name.strip()
-    # Separazione dei caratteri accentati dal carattere base
-    name_normalized = ''.join(
-        ch for ch in unicodedata.normalize('NFD', name)
-        if unicodedata.category(ch) != 'Mn'
-    )
-    return name_normalized.lower()
-
-# Passo 1: Leggi database.csv (UTF-8) e crea una mappa "cognome -> elenco di righe"
-surname_map = {}
-with open('voti_2024_25.csv', 'r', encoding='utf-8') as db_file:
-    reader = csv.DictReader(db_file)
-    for row in reader:
-        # Rimuovi la colonna 'id' se presente
-        row.pop('id', None)
-        # Normalizza il nome del giocatore e separa nome e cognome
-        player_name = row.get('player', '')
-        player_norm = normalize_name(player_name)
-        parts = player_norm.split()
-        if not parts:
-            continue  # salta la riga se il nome non è disponibile
-        first_name = parts[0]
-        last_name = parts[-1]
-        # Assicura che i campi statistici siano presenti, usa '0' se mancanti o vuoti
-        stats_fields = ['pv', 'mv', 'fm', 'au']
-        for field in stats_fields:
-            if field not in row or row[field] is None or row[field].strip() == '':
-                row[field] = '0'
-        # Crea un record con il nome normalizzato e i valori statistici
-        record = {
-            'first_name': first_name,
-            'stats': {field: row[field] for field in stats_fields}
-        }
-        # Aggiungi il record alla lista del cognome nella mappa
-        surname_map.setdefault(last_name, []).append(record)
-
-# Passo 2: Leggi Quotazioni_2025_26.csv (delimitato da ';') e arricchisci i dati con le statistiche
-output_rows = []
-with open('unione-Completata.csv', 'r', encoding='utf-8') as quot_file:
-    reader = csv.DictReader(quot_file, delimiter=';')
-    # Determina le colonne originali (escludendo 'Id')
-    original_fields = [fn for fn in reader.fieldnames if fn and fn != 'Id'] if reader.fieldnames else []
-    for row in reader:
-        # Rimuovi la colonna 'Id' se presente
-        row.pop('Id', None)
-        # Inizializza i campi statistici aggiuntivi a '0'
-               stats_fields = ['pv', 'mv', 'fm', 'au']
-        for field in stats_fields:
-            row[field] = '0'
-        # Verifica il campo Nome
-        nome_field = row.get('Nome', '')
-        if nome_field is None or nome_field.strip() == '':
-            # Se il nome è assente o vuoto, lascia i campi statistici a 0 e passa oltre
-            output_rows.append(row)
-            continue
-        # Normalizza il contenuto di Nome e ottieni cognome e nome proprio
-        nome_norm = normalize_name(nome_field)
-        parts = nome_norm.split()
-        if not parts:
-            output_rows.append(row)
-            continue
-        first_name_quot = parts[0]
-        last_name_quot = parts[-1]
-        # Cerca il cognome nella mappa
-        if last_name_quot in surname_map:
-            records = surname_map[last_name_quot]
-            chosen_record = None
-            # Cerca corrispondenza esatta sul nome proprio
-            for rec in records:
-                if rec['first_name'] == first_name_quot:
-                    chosen_record = rec
-                    break
-            if chosen_record is None and records:
-                # Nessuna corrispondenza esatta trovata, usa la prima riga del gruppo
-                chosen_record = records[0]
-            if chosen_record:
-                # Estrai i valori statistici dal record scelto
-                for field, value in chosen_record['stats'].items():
-                    # Usa '0' se il campo è mancante o vuoto, altrimenti il valore effettivo
-                    if value is None or (isinstance(value, str) and value.strip() == ''):
-                        row[field] = '0'
-                    else:
-                        row[field] = str(value)
-        # Aggiungi la riga (arricchita o con zeri) all'elenco di output
-        output_rows.append(row)
-
-# Passo 3: Aggiungi un nuovo ID sequenziale a partire da 1 per ogni riga di output
-for idx, row in enumerate(output_rows, start=1):
-    row['id'] = str(idx)
-
-# Passo 4: Scrivi il nuovo file CSV con il separatore ';' e nome file specificato
-os.makedirs('data', exist_ok=True)  # assicura che la cartella data esista
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-output_filename = f"quotazioni_enriched_{timestamp}.csv"
-output_path = os.path.join('data', output_filename)
-# Prepara l'ordine delle colonne per il file di output
-stats_fields = [
-    "pv","mv","fm","au"
-]
-# Se abbiamo le colonne originali dal file Quotazioni, usale nell'ordine originale
-if original_fields:
-    fieldnames = ['id'] + original_fields + stats_fields
-else:
+from typing import List, Optional
+
+from .cli import add_out_of_core, add_vectorized, enrichment_parser
+from .external import SortMergeJoin, join_rows
+from .instrumentation import RunReport
+from .matching import MATCH_OPTIONS, PlayerIndex
+from .pipeline import enrich_rows, normalize_rows, number_rows, open_listone, output_path, write_rows
+from .store import stored
+
+stats_fields = ['pv', 'mv', 'fm', 'au']
+VOTI_CSV = 'voti_2024_25.csv'
+QUOTE_CSV = 'unione-Completata.csv'
+
+
+def output_fields(original_fields, stats_fields=stats_fields):
+    # Se abbiamo le colonne originali dal file Quotazioni, usale nell'ordine originale
+    if original_fields:
+        return ['id'] + original_fields + stats_fields
     # In caso non siano state determinate (ad es. file vuoto), definisci manualmente
-    fieldnames = ['id', 'R', 'RM', 'Nome', 'Squadra', 'Qt.A', 'Qt.I', 'Diff.', 
-                  'Qt.A M', 'Qt.I M', 'Diff.M', 'FVM', 'FVM M'] + stats_fields
+    return ['id', 'R', 'RM', 'Nome', 'Squadra', 'Qt.A', 'Qt.I', 'Diff.',
+            'Qt.A M', 'Qt.I M', 'Diff.M', 'FVM', 'FVM M'] + stats_fields
+
+
+def zero_stats(row, stats_fields=stats_fields):
+    # Inizializza i campi statistici aggiuntivi a '0'
+    for field in stats_fields:
+        row[field] = '0'
+    return row
+
+
+def build_index(path, stats_fields=stats_fields, delimiter=None, args=None):
+    # Indice "cognome -> elenco di record" dal file voti (match esatto sul nome proprio);
+    # con --out-of-core stesso join ma ordinato su disco
+    if args is not None and args.out_of_core:
+        return SortMergeJoin.from_csv(path, stats_fields, delimiter=delimiter, memory_mb=args.memory_mb,
+                                      tmp_dir=args.tmp_dir, **MATCH_OPTIONS)
+    return PlayerIndex.from_csv(path, stats_fields, delimiter=delimiter, **MATCH_OPTIONS)
+
+
+def run(args) -> str:
+    fields = args.stats_fields
+    output_file = output_path(args.output_dir, args.prefix)
+    report = RunReport('unione1').start()  # tempi e metodi di match → .report.json
+    index = None
+
+    if args.vectorized:
+        from .vectorized import frame_rows, vectorized_join, write_frame
+
+        with report.stage('join'):
+            df, original_fields = vectorized_join(
+                args.stats, args.quote, fields,
+                stats_delimiter=args.stats_delimiter, quote_delimiter=args.quote_delimiter,
+            )
+        with report.stage('write'):
+            write_frame(df, output_file, output_fields(original_fields, fields), args.output_delimiter)
+            for _ in stored(frame_rows(df), args, output_fields(original_fields, fields)):
+                pass  # --store: stesse righe nell'archivio SQLite
+    else:
+        # Passo 1: indice dal file voti
+        with report.stage('index'):
+            index = build_index(args.stats, fields, args.stats_delimiter, args)
+
+        # Passo 2: Leggi il listone e arricchisci i dati riga per riga:
+        # corrispondenza esatta sul nome proprio, altrimenti prima riga con quel cognome;
+        # le righe senza Nome restano a zero
+        with open_listone(args.quote, args.quote_delimiter) as (original_fields, rows):
+            rows = (zero_stats(row, fields) for row in report.timed_iter('read', rows))
+            pairs = report.timed_iter('normalize', normalize_rows(rows, index))
+            enriched = report.timed_iter('enrich', enrich_rows(report.timed_iter('match', join_rows(pairs, index, report))))
+
+            # Passo 3-4: ID sequenziale da 1 e scrittura in ./data
+            with report.stage('write'):
+                fieldnames = output_fields(original_fields, fields)
+                write_rows(stored(number_rows(enriched), args, fieldnames), output_file, fieldnames,
+                           args.output_delimiter)
+
+    report.stop()
+    report_file = report.write(output_file, index)
+
+    # Stampa il messaggio di conferma
+    print(f"✅ File creato: {os.path.basename(output_file)}")
+    print(f"📊 Report: {os.path.basename(report_file)}")
+    return output_file
+
+
+def main(argv: Optional[List[str]] = None) -> str:
+    parser = enrichment_parser(
+        'unione1', 'Listone + voti: match esatto sul nome proprio, poi sul cognome.',
+        stats=VOTI_CSV, quote=QUOTE_CSV, stats_fields=stats_fields,
+    )
+    add_vectorized(parser)
+    add_out_of_core(parser)
+    return run(parser.parse_args(argv))
 
-# Scrivi il CSV arricchito
-with open(output_path, 'w', newline='', encoding='utf-8') as out_file:
-    writer = csv.DictWriter(out_file, fieldnames=fieldnames, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-    writer.writeheader()
-    writer.writerows(output_rows)
 
-# Stampa il messaggio di conferma
-print(f"✅ File creato: {output_filename}")
+if __name__ == '__main__':
+    main()
@@ -1,97 +1,82 @@
 # Qui andiamo a unire i csv listone con serie A + serie B 2024 2025
-import csv
-import unicodedata
+# Con l'opzione --vectorized il join viene fatto con pandas (stesso output, file molto grandi)
+#
+#   python -m unioneCsvPython unione2 [--stats ...] [--quote ...] [--vectorized]
 import os
-from datetime import datetime
+from typing import List, Optional
 
-# Funzione per normalizzare le stringhe (rimuove accenti e converte in minuscolo)
-def normalize_name(name):
-    if name is None:
-        return ''
-    name = name.strip()
-    name_normalized = ''.join(
-        ch for ch in unicodedata.normalize('NFD', name)
-        if unicodedata.category(ch) != 'Mn'
-    )
-    return name_normalized.lower()
+from .cli import add_out_of_core, add_vectorized, enrichment_parser
+from .external import join_rows
+from .instrumentation import RunReport
+from .pipeline import enrich_rows, normalize_rows, number_rows, open_listone, output_path, write_rows
+from .store import stored
+from .unione1 import build_index
 
-# Passo 1: costruiamo la mappa cognome → record statistici dal database (UTF‑8)
-surname_map = {}
-with open('stats-serieA-2024-2025.csv', newline='', encoding='utf-8') as db_file:
-    reader = csv.DictReader(db_file)
-    stats_fields = ['partite', 'minuti', 'goal', 'assist', 'rigori', 'gialli', 'rossi']
-    for row in reader:
-        # Il campo "id" non serve per l'unione
-        row.pop('id', None)
-        player_norm = normalize_name(row.get('player', ''))
-        parts = player_norm.split()
-        if not parts:
-            continue
-        first_name = parts[0]
-        last_name = parts[-1]
+stats_fields = ['partite', 'minuti', 'goal', 'assist', 'rigori', 'gialli', 'rossi']
+STATS_CSV = 'stats-serieA-2024-2025.csv'
+QUOTE_CSV = 'listone_serieAstats.csv'
 
-        record = {
-            'first_name': first_name,
-            'stats': {field: (row.get(field, '0') or '0') for field in stats_fields}
-        }
-        surname_map.setdefault(last_name, []).append(record)
 
-# Passo 2: leggiamo il listone "Quotazioni_2025_26.csv" e aggiorniamo solo le colonne già esistenti
-output_rows = []
-with open('listone_serieAstats.csv', newline='', encoding='utf-8') as quot_file:
-    reader = csv.DictReader(quot_file, delimiter=';')
-    original_fields = [fn for fn in reader.fieldnames if fn and fn != 'Id'] if reader.fieldnames else []
-    stats_fields = ['partite', 'minuti', 'goal', 'assist', 'rigori', 'gialli', 'rossi']
+def updater(stats_fields=stats_fields):
+    def update_existing(row, record):
+        # Se troviamo il giocatore, aggiorniamo i campi statistici SOLO se già presenti nel listone
+        if record:
+            for field in stats_fields:
+                if field in row:
+                    row[field] = record.stats[field]
+    return update_existing
 
-    for row in reader:
-        # Rimuoviamo la colonna "Id" del listone, se presente
-        row.pop('Id', None)
 
-        nome_field = row.get('Nome', '')
-        if not nome_field:
-            output_rows.append(row)
-            continue
+def run(args) -> str:
+    fields = args.stats_fields
+    # Passo 3-4: nuovo ID sequenziale e salvataggio in ./data
+    output_file = output_path(args.output_dir, args.prefix)
+    report = RunReport('unione2').start()  # tempi e metodi di match → .report.json
+    index = None
 
-        nome_norm = normalize_name(nome_field)
-        parts = nome_norm.split()
-        if not parts:
-            output_rows.append(row)
-            continue
+    if args.vectorized:
+        from .vectorized import frame_rows, vectorized_join, write_frame
 
-        first_name_quot = parts[0]
-        last_name_quot = parts[-1]
+        with report.stage('join'):
+            df, original_fields = vectorized_join(
+                args.stats, args.quote, fields, only_existing=True,
+                stats_delimiter=args.stats_delimiter, quote_delimiter=args.quote_delimiter,
+            )
+        with report.stage('write'):
+            write_frame(df, output_file, ['id'] + original_fields, args.output_delimiter)
+            for _ in stored(frame_rows(df), args, ['id'] + original_fields):
+                pass  # --store: stesse righe nell'archivio SQLite
+    else:
+        # Passo 1: costruiamo l'indice cognome → record statistici dal database (UTF‑8)
+        with report.stage('index'):
+            index = build_index(args.stats, fields, args.stats_delimiter, args)
 
-        chosen_record = None
-        if last_name_quot in surname_map:
-            # Corrispondenza esatta nome + cognome, altrimenti prima occorrenza del cognome
-            for rec in surname_map[last_name_quot]:
-                if rec['first_name'] == first_name_quot:
-                    chosen_record = rec
-                    break
-            if chosen_record is None:
-                chosen_record = surname_map[last_name_quot][0]
+        # Passo 2: leggiamo il listone e aggiorniamo solo le colonne già esistenti
+        # (corrispondenza esatta nome + cognome, altrimenti prima occorrenza del cognome)
+        with open_listone(args.quote, args.quote_delimiter) as (original_fields, rows):
+            pairs = report.timed_iter('normalize', normalize_rows(report.timed_iter('read', rows), index))
+            enriched = report.timed_iter('enrich', enrich_rows(report.timed_iter('match', join_rows(pairs, index, report)), updater(fields)))
+            with report.stage('write'):
+                fieldnames = ['id'] + original_fields  # stesso ordine del listone
+                write_rows(stored(number_rows(enriched), args, fieldnames), output_file, fieldnames,
+                           args.output_delimiter)
 
-        # Se troviamo il giocatore, aggiorniamo i campi statistici SOLO se già presenti nel listone
-        if chosen_record:
-            for field in stats_fields:
-                if field in row:
-                    row[field] = chosen_record['stats'].get(field, row[field])
+    report.stop()
+    report_file = report.write(output_file, index)
+    print(f"✅ File creato: {os.path.basename(output_file)}")
+    print(f"📊 Report: {os.path.basename(report_file)}")
+    return output_file
 
-        output_rows.append(row)
 
-# Passo 3: aggiungiamo un nuovo ID sequenziale; il listone originale resta intatto
-for idx, row in enumerate(output_rows, start=1):
-    row['id'] = str(idx)
-
-# Passo 4: salviamo il file arricchito in ./data, separatore ';'
-os.makedirs('data', exist_ok=True)
-output_filename = f"prova1_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-output_path = os.path.join('data', output_filename)
+def main(argv: Optional[List[str]] = None) -> str:
+    parser = enrichment_parser(
+        'unione2', 'Listone + statistiche: aggiorna solo le colonne già presenti nel listone.',
+        stats=STATS_CSV, quote=QUOTE_CSV, stats_fields=stats_fields, prefix='prova1',
+    )
+    add_vectorized(parser)
+    add_out_of_core(parser)
+    return run(parser.parse_args(argv))
 
-fieldnames = ['id'] + original_fields  # stesso ordine del listone
-with open(output_path, 'w', newline='', encoding='utf-8') as out_file:
-    writer = csv.DictWriter(out_file, fieldnames=fieldnames, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-    writer.writeheader()
-    writer.writerows(output_rows)
 
-print(f"✅ File creato: {output_filename}")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Join vettoriale pandas per `unione1.py` / `unione2.py`
+======================================================
+
+Il matching di questi due script è un semplice join per chiave (cognome + nome
+proprio): qui viene risolto colonna per colonna con pandas invece che riga per
+riga, così regge anche i file statistiche per giornata (30–40× più grandi dei
+totali di stagione).
+
+Le regole sono le stesse di `PlayerIndex` con ``prefix_first=False``,
+``reverse_tokens=False``, ``fuzzy_cutoff=None``, ``team_scoped=False``:
+
+1. nome completo identico            → primo record con quel nome;
+2. stesso (nome proprio, cognome)    → primo record;
+3. stesso cognome                    → primo record del cognome;
+
+e l'output è identico byte per byte a quello della pipeline Python.
+"""
+
+import csv
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .ingest import sniff_file
+from .matching import normalize_name
+
+# =============================================================
+# LETTURA E NORMALIZZAZIONE PER COLONNA
+# =============================================================
+
+
+def read_frame(path: str, delimiter: Optional[str] = None) -> pd.DataFrame:
+    """Legge un CSV tutto come stringhe (celle vuote = "", niente NaN).
+
+    Separatore, encoding e compressione come `ingest.open_csv`.
+    """
+    dialect = sniff_file(path, delimiter)
+    try:
+        return pd.read_csv(
+            path, sep=dialect.delimiter, dtype=str, keep_default_na=False, encoding=dialect.encoding,
+            compression="gzip" if dialect.compressed else None,
+        )
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+
+
+def normalize_column(col: pd.Series, normalizer: Callable[[str], str] = normalize_name) -> pd.Series:
+    """Normalizza una colonna calcolando il normalizzatore una volta per valore distinto."""
+    codes, uniques = pd.factorize(col, use_na_sentinel=False)
+    normalized = pd.Index(uniques).map(normalizer)
+    return pd.Series(normalized.take(codes), index=col.index, dtype=object)
+
+
+def first_nonempty(df: pd.DataFrame, columns: Sequence[str]) -> pd.Series:
+    """Primo valore non vuoto tra `columns` (equivale a ``a or b or c``)."""
+    out = pd.Series("", index=df.index, dtype=object)
+    for c in reversed(columns):
+        if c in df.columns:
+            out = df[c].where(df[c] != "", out)
+    return out
+
+
+def name_keys(names: pd.Series, normalizer: Callable[[str], str] = normalize_name) -> pd.DataFrame:
+    """Colonne ``full`` / ``first`` / ``last`` dai nomi grezzi."""
+    tokens = normalize_column(names, normalizer).str.split()
+    return pd.DataFrame({
+        "full": tokens.str.join(" "),
+        "first": tokens.str[0],
+        "last": tokens.str[-1],
+    }, index=names.index)
+
+# =============================================================
+# STATISTICHE
+# =============================================================
+
+
+def stats_frame(path: str, stats_fields: Sequence[str], delimiter: Optional[str] = None) -> pd.DataFrame:
+    """Stesso contenuto di `PlayerIndex.from_csv(..., require_team=False)`.
+
+    Intestazioni in lowercase, nome da ``player``/``nome``/``giocatore``,
+    statistiche vuote → "0"; le righe senza nome vengono scartate.
+    """
+    raw = read_frame(path, delimiter)
+    # come il dict di DictReader: a parità di header lowercase vince l'ultima colonna
+    cols = {}
+    for i, c in enumerate(raw.columns):
+        if not str(c).startswith("Unnamed:"):
+            cols[str(c).lower().strip()] = raw.iloc[:, i]
+    df = pd.DataFrame(cols, index=raw.index)
+
+    out = name_keys(first_nonempty(df, ["player", "nome", "giocatore"]))
+    for field in stats_fields:
+        value = df[field.lower()] if field.lower() in df.columns else pd.Series("", index=df.index)
+        out[field] = value.where(value.str.strip() != "", "0")
+    return out[out["last"].notna()].reset_index(drop=True)
+
+
+def resolve(keys: pd.DataFrame, stats: pd.DataFrame) -> pd.Series:
+    """Posizione del record statistiche scelto per ogni riga (NA = nessun match)."""
+    stats = stats.assign(rec=stats.index)
+
+    def lookup(on: List[str]) -> pd.Series:
+        first = stats.drop_duplicates(on, keep="first")[on + ["rec"]]
+        merged = keys[on].merge(first, on=on, how="left", validate="many_to_one")
+        return pd.Series(merged["rec"].to_numpy(), index=keys.index)
+
+    valid = keys["last"].notna()
+    chosen = lookup(["full"])
+    chosen = chosen.fillna(lookup(["first", "last"]))
+    chosen = chosen.fillna(lookup(["last"]))
+    return chosen.where(valid).astype("Int64")
+
+# =============================================================
+# JOIN LISTONE ⇆ STATISTICHE
+# =============================================================
+
+
+def vectorized_join(
+    stats_path: str,
+    quote_path: str,
+    stats_fields: Sequence[str],
+    *,
+    only_existing: bool = False,
+    stats_delimiter: Optional[str] = None,
+    quote_delimiter: Optional[str] = None,
+) -> Tuple[pd.DataFrame, List[str]]:
+    """Arricchisce il listone; ritorna ``(DataFrame, colonne originali)``.
+
+    - ``only_existing=False`` (unione1): le colonne stats vengono create a "0"
+      e sovrascritte per i giocatori trovati;
+    - ``only_existing=True`` (unione2): aggiorna solo le colonne stats già
+      presenti nel listone.
+    """
+    stats = stats_frame(stats_path, stats_fields, stats_delimiter)
+    listone = read_frame(quote_path, quote_delimiter)
+    listone = listone.drop(columns=[c for c in listone.columns if c.lower() == "id"])
+    original_fields = list(listone.columns)
+
+    chosen = resolve(name_keys(first_nonempty(listone, ["Nome", "nome"])), stats)
+    found = chosen.notna().to_numpy()
+    positions = chosen[found].to_numpy(dtype="int64")
+
+    for field in stats_fields:
+        if only_existing and field not in listone.columns:
+            continue
+        if not only_existing:
+            listone[field] = "0"
+        col = listone[field].to_numpy(dtype=object, copy=True)
+        col[found] = stats[field].to_numpy(dtype=object)[positions]
+        listone[field] = col
+
+    listone.insert(0, "id", [str(i) for i in range(1, len(listone) + 1)])
+    return listone, original_fields
+
+
+def frame_rows(df: pd.DataFrame) -> Iterator[dict]:
+    """Righe del DataFrame come dizionari (per chi consuma righe, es. store.py)."""
+    columns = list(df.columns)
+    for values in df.itertuples(index=False, name=None):
+        yield dict(zip(columns, values))
+
+
+def write_frame(df: pd.DataFrame, path: str, fieldnames: List[str], delimiter: str = ";") -> int:
+    """Scrive come `pipeline.write_rows` (stesso dialetto, colonne mancanti vuote)."""
+    # costruito per posizione: `fieldnames` può contenere nomi ripetuti
+    out = pd.DataFrame(
+        {i: (df[c] if c in df.columns else "") for i, c in enumerate(fieldnames)},
+        index=df.index,
+    )
+    out.columns = fieldnames
+    out.to_csv(
+        path,
+        sep=delimiter,
+        index=False,
+        quotechar="\"",
+        quoting=csv.QUOTE_MINIMAL,
+        lineterminator="\r\n",
+        encoding="utf-8",
+    )
+    return len(out)